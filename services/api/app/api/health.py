@@ -4,15 +4,18 @@ OmniRoute AI — Health Check Endpoints
 GET /health          → basic liveness (always fast)
 GET /health/ready    → dependency checks: DB + Redis
 GET /health/startup  → schema version status
+GET /metrics         → solver phase histograms (Prometheus text format)
 """
 
 import time
 
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
 from sqlalchemy import text
 
 from app.config import settings
 from app.infrastructure.database import engine
+from app.infrastructure.solver_metrics import get_solver_metrics
 
 router = APIRouter()
 
@@ -93,3 +96,9 @@ async def health_startup():
         return {"status": "ready", "message": "All required tables exist"}
     except Exception as exc:
         return {"status": "not_ready", "reason": str(exc)}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Solve timings per phase and search statistics by stop-count bucket, for Prometheus to scrape."""
+    return PlainTextResponse(get_solver_metrics().render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,148 @@
+"""
+OmniRoute AI — Optimization Job Endpoints
+
+POST   /api/v1/optimize/jobs        → Submit an optimization job (202, returns job id)
+GET    /api/v1/optimize/jobs/{id}   → Job status + result (?wait=N long-polls up to N s)
+DELETE /api/v1/optimize/jobs/{id}   → Cancel a pending or running job
+
+Same request body and result payload as POST /api/v1/optimize, but
+the request returns immediately; consumers in app/workers solve it.
+A problem found in the solution cache is stored as already completed.
+"""
+
+from datetime import UTC, datetime
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.optimize import build_problem, cached_payload, engine_error
+from app.config import settings
+from app.dependencies import get_current_user
+from app.infrastructure.database import async_session_factory, get_db
+from app.infrastructure.job_queue import QueueFullError, get_job_queue
+from app.infrastructure.models import JobStatus, OptimizationJob, OptimizationMode, User
+from app.infrastructure.solution_cache import get_solution_cache, problem_fingerprint
+from app.schemas import ApiResponse, OptimizationJobOut, OptimizeRequest
+
+router = APIRouter()
+
+_FINISHED = {JobStatus.completed, JobStatus.failed, JobStatus.timeout, JobStatus.cancelled}
+
+
+def _queue_or_503():
+    queue = get_job_queue()
+    if queue is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Job queue unavailable (Redis not reachable). Use POST /api/v1/optimize.",
+        )
+    return queue
+
+
+async def _get_job(db: AsyncSession, job_id: UUID, user: User) -> OptimizationJob:
+    result = await db.execute(
+        select(OptimizationJob).where(
+            OptimizationJob.id == job_id,
+            OptimizationJob.workspace_id == user.workspace_id,
+        )
+    )
+    job = result.scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.post("", response_model=ApiResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(
+    body: OptimizeRequest,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Validate the problem, store it as a pending job and enqueue it."""
+    queue = _queue_or_503()
+    try:
+        problem, solver, _ = build_problem(body)  # reject bad input now, not in the worker
+        fingerprint = problem_fingerprint(problem, solver)
+        hit = await get_solution_cache().get(user.workspace_id, fingerprint, db)
+    except (ImportError, Exception) as exc:
+        raise engine_error(exc)
+
+    job = OptimizationJob(
+        workspace_id=user.workspace_id,
+        solver_type=OptimizationMode.classical,
+        status=JobStatus.pending,
+        input_hash=fingerprint,
+        input_data=body.model_dump(mode="json"),
+    )
+    if hit is not None:
+        data = cached_payload(body.stops, *hit)
+        now = datetime.now(UTC)
+        job.status = JobStatus.completed
+        job.result_data = data
+        job.solution_quality_score = data["solution_quality_score"]
+        job.execution_time_ms = 0
+        job.started_at = job.completed_at = now
+        db.add(job)
+        await db.commit()
+        return ApiResponse(data={"job_id": str(job.id), "status": job.status.value, "cached": True})
+
+    db.add(job)
+    await db.commit()  # the row must exist before a consumer can take the id
+
+    try:
+        await queue.push(job.id)
+    except QueueFullError as exc:
+        await db.delete(job)
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+            headers={"Retry-After": "5"},
+        )
+
+    return ApiResponse(data={"job_id": str(job.id), "status": job.status.value})
+
+
+@router.get("/{job_id}", response_model=ApiResponse)
+async def get_job(
+    job_id: UUID,
+    wait: int = Query(0, ge=0, description="Long-poll: seconds to wait for the job to finish"),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Job status and, once completed, its result in `result_data`."""
+    job = await _get_job(db, job_id, user)
+
+    queue = get_job_queue()
+    if wait and job.status not in _FINISHED and queue is not None:
+        async def is_done() -> bool:
+            # Fresh session: the request's session would return its cached row
+            async with async_session_factory() as check:
+                current = await check.get(OptimizationJob, job_id)
+                return current is None or current.status in _FINISHED
+
+        await queue.wait_done(job_id, min(wait, settings.job_long_poll_max_seconds), is_done)
+        await db.refresh(job)
+
+    return ApiResponse(data=OptimizationJobOut.model_validate(job).model_dump(mode="json"))
+
+
+@router.delete("/{job_id}", response_model=ApiResponse)
+async def cancel_job(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Cancel a job. A running solve finishes, but its result is discarded."""
+    job = await _get_job(db, job_id, user)
+    if job.status in _FINISHED:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job already {job.status.value}")
+
+    job.status = JobStatus.cancelled
+    await db.commit()
+    queue = get_job_queue()
+    if queue is not None:
+        await queue.notify_done(job_id)
+    return ApiResponse(data={"job_id": str(job.id), "status": job.status.value})
@@ -1,33 +1,54 @@
 """
 OmniRoute AI — Optimize Endpoint
 
-POST /api/v1/optimize → Run route optimization
+POST /api/v1/optimize        → Run route optimization (also MessagePack / columnar, see app/api/wire.py)
+POST /api/v1/optimize/stream → Same, streaming improved solutions (SSE)
+POST /api/v1/optimize/batch  → Many problems at once, results as NDJSON
+POST /api/v1/optimize/insert → Add stops to an optimized plan (re-solves only if they fit badly)
+DELETE /api/v1/optimize/cache → Drop the workspace's cached solutions
 
-Accepts frontend stop format, bridges to OR-Tools engine,
-returns standardized result with savings comparison.
+Accepts frontend stop format, bridges to OR-Tools engine (or, for
+tiny problems and where OR-Tools is not installed, the pure-NumPy fast
+solver), returns standardized result with savings comparison. A repeat of a
+problem already solved in the workspace is answered from the solution
+cache, marked "cached": true.
 """
 
-import hashlib
+import asyncio
 import json
 import math
-import sys
-import os
+import threading
 import time as _time
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api import wire
+from app.config import settings
 from app.dependencies import get_current_user
+from app.infrastructure.database import get_db
 from app.infrastructure.models import User
-from app.schemas import ApiResponse, OptimizeRequest
-
-# Add routing-engine to path
-sys.path.insert(
-    0,
-    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", "routing-engine")),
+from app.infrastructure.solution_cache import get_solution_cache, problem_fingerprint
+from app.infrastructure.solver_metrics import get_solver_metrics
+from app.infrastructure.solver_pool import get_solver_executor  # also puts routing-engine on sys.path
+from app.schemas import (
+    ApiResponse,
+    InsertStopsRequest,
+    OptimizeBatchRequest,
+    OptimizeRequest,
+    StopColumnsIn,
+    stop_columns,
 )
 
 router = APIRouter()
 
+# How often a pooled solve checks whether the client is still connected
+_DISCONNECT_POLL_SECONDS = 0.5
+
+# solver_used by strategy; the rest are OR-Tools strategies
+_SOLVER_LABELS = {"fast": "NumPy (fast)", "insertion": "NumPy (insertion)"}
+
 
 def _haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
     """Compute great-circle distance between two GPS points in km."""
@@ -39,120 +60,454 @@ def _haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
     return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
 
 
-def _naive_total_distance(stops: list) -> float:
+def _naive_total_distance(stops: StopColumnsIn) -> float:
     """Total distance of unoptimized order (for savings calculation)."""
+    lat, lng = stops.lat, stops.lng
     total = 0.0
-    for i in range(len(stops) - 1):
-        total += _haversine_km(stops[i].lat, stops[i].lng, stops[i + 1].lat, stops[i + 1].lng)
-    if stops:
-        total += _haversine_km(stops[-1].lat, stops[-1].lng, stops[0].lat, stops[0].lng)
+    for i in range(len(lat) - 1):
+        total += _haversine_km(lat[i], lng[i], lat[i + 1], lng[i + 1])
+    if lat:
+        total += _haversine_km(lat[-1], lng[-1], lat[0], lng[0])
     return round(total, 2)
 
 
-@router.post("", response_model=ApiResponse)
+async def solve_off_loop(solver, problem):
+    """Solve in the worker pool, or on a thread when the pool is disabled."""
+    executor = get_solver_executor()
+    if executor is not None:
+        return await executor.solve(solver, problem)
+    return await asyncio.to_thread(solver.solve_sync, problem)
+
+
+async def _solve_until_disconnect(request: Request, solver, problem):
+    """
+    Solve in the worker pool, cancelling the solve (and killing its
+    worker) if the client goes away. Falls back to a solve on a thread
+    when the pool is disabled.
+    """
+    executor = get_solver_executor()
+    if executor is None:
+        return await solve_off_loop(solver, problem)
+
+    task = asyncio.ensure_future(executor.solve(solver, problem))
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=_DISCONNECT_POLL_SECONDS)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            task.cancel()
+            return await task  # raises CancelledError
+
+
+def _initial_routes(body: OptimizeRequest) -> list[list[str]] | None:
+    """Previous plan by stop name → engine stop ids (repeated names match in order)."""
+    if not body.initial_routes:
+        return None
+    ids_by_name: dict[str, list[str]] = {}
+    for i, name in enumerate(stop_columns(body.stops).name):
+        ids_by_name.setdefault(name, []).append(str(i))
+    return [
+        [ids_by_name[name].pop(0) for name in route if ids_by_name.get(name)]
+        for route in body.initial_routes
+    ]
+
+
+def build_problem(body: OptimizeRequest):
+    """Map the request to an engine RoutingProblem and pick its solver (and say why)."""
+    from engine.models import RoutingProblem, VehicleSpec, parse_clock
+    from engine.selector import build_solver, explain_selection
+
+    stops = stop_columns(body.stops)
+
+    depot_idx = next(
+        (i for i, kind in enumerate(stops.type) if kind == "depot"), 0
+    )
+
+    vehicle = VehicleSpec(
+        id="v0",
+        capacity_kg=body.constraints.vehicle_capacity_kg,
+        max_distance_km=body.constraints.max_distance_km,
+        max_stops=body.constraints.max_stops,
+    )
+
+    # Frontend stops → engine columns (ids are input positions); no per-stop engine objects
+    problem = RoutingProblem.from_arrays(
+        lat=stops.lat,
+        lng=stops.lng,
+        demand_kg=stops.load_kg,
+        service_time_min=stops.service_time_minutes,
+        window_start_s=[parse_clock(t) if t else -1 for t in stops.time_window_start],
+        window_end_s=[parse_clock(t) if t else -1 for t in stops.time_window_end],
+        vehicles=[vehicle],
+        depot_index=depot_idx,
+        optimize_for=body.constraints.optimize_for,
+        distance_metric=body.constraints.distance_metric,
+        initial_routes=_initial_routes(body),
+    )
+    selection = explain_selection(problem, body.latency_slo_ms)
+    return problem, build_solver(selection), selection
+
+
+def result_payload(stops, result, elapsed_ms: int, fingerprint: str, selection=None) -> dict:
+    """Response payload for a finished solve, which is also counted in the solver metrics."""
+    if not result.success:
+        raise ValueError(result.error or "Solver returned no result")
+
+    stops = stop_columns(stops)
+    m = result.metrics
+    get_solver_metrics().record(len(stops), m)
+    naive_dist = _naive_total_distance(stops)
+    opt_dist = round(m.total_distance_km, 2)
+    dist_saving = max(0, round((1 - opt_dist / naive_dist) * 100)) if naive_dist > 0 else 0
+
+    # Build ordered stop list from solver output (first vehicle)
+    ordered_raw = result.routes[0] if result.routes else []
+    ordered_stops = [
+        {
+            "stop_index": int(o.stop_id),
+            "name": stops.name[int(o.stop_id)],
+            "lat": o.lat,
+            "lng": o.lng,
+            "order": o.order,
+            "arrival_eta_min": round(o.arrival_eta_min),
+            "distance_from_prev_km": round(o.distance_from_prev_km, 2),
+        }
+        for o in ordered_raw
+    ]
+
+    return {
+        "total_distance_km": opt_dist,
+        "estimated_duration_minutes": int(m.total_duration_min),
+        "solution_quality_score": round(m.quality_score / 100, 4),
+        "solver_used": _SOLVER_LABELS.get(m.strategy, f"OR-Tools ({m.strategy})"),
+        "execution_time_ms": elapsed_ms,
+        "ordered_stops": ordered_stops,
+        "input_hash": fingerprint,
+        "savings": {
+            "distance": dist_saving,
+            "time": max(0, dist_saving - 3),
+            "fuel": max(0, dist_saving - 2),
+        },
+        "cached": False,
+        "objective": m.objective,
+        "solver_selection": selection.model_dump() if selection is not None else None,
+    }
+
+
+def cached_payload(stops, payload: dict, tier: str) -> dict:
+    """A cached payload relabelled with this request's stop names."""
+    names = stop_columns(stops).name
+    ordered_stops = [
+        {**o, "name": names[o["stop_index"]]} if "stop_index" in o else o
+        for o in payload["ordered_stops"]
+    ]
+    return {**payload, "ordered_stops": ordered_stops, "cached": True, "cache_tier": tier}
+
+
+def engine_error(exc: Exception) -> HTTPException:
+    """Engine not installed → 503; anything else the engine raised → 422."""
+    if isinstance(exc, ImportError):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Routing engine not available. Install OR-Tools in the routing-engine service.",
+        )
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail=str(exc),
+    )
+
+
+@router.post(
+    "",
+    response_model=ApiResponse,
+    responses={200: {"content": {wire.COLUMNAR_JSON: {}, wire.MSGPACK: {}}}},
+    openapi_extra=wire.request_body_openapi(OptimizeRequest),
+)
 async def optimize_route(
-    body: OptimizeRequest,
+    request: Request,
+    body: OptimizeRequest = Depends(wire.body(OptimizeRequest)),
+    db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
     """
     Optimize a route using OR-Tools classical solver.
     Depot is the first stop with type='depot', or index 0.
     Returns ordered stops, distance, duration, and savings vs naive ordering.
-    """
-    stops = body.stops
 
+    Besides JSON, takes and returns the compact formats of app/api/wire.py
+    (MessagePack, columnar stops, gzip), negotiated by Content-Type,
+    Content-Encoding, Accept and Accept-Encoding.
+    """
     # Try OR-Tools engine
     try:
-        from engine.models import RoutingProblem, Stop as EngineStop, VehicleSpec
-        from engine.selector import select_solver
-
-        # Map frontend stops to engine format
-        engine_stops = [
-            EngineStop(
-                id=str(i),
-                lat=s.lat,
-                lng=s.lng,
-                demand_kg=s.load_kg,
-                service_time_min=s.service_time_minutes,
-            )
-            for i, s in enumerate(stops)
+        problem, solver, selection = build_problem(body)
+        data = await _solve_cached(request, body.stops, problem, solver, selection, user.workspace_id, db)
+        return wire.respond(request, data)
+
+    except (ImportError, Exception) as exc:
+        raise engine_error(exc)
+
+
+async def _solve_cached(request: Request, stops, problem, solver, selection, workspace_id, db) -> dict:
+    """Payload from the workspace's solution cache, else solved (until the client leaves) and cached."""
+    cache = get_solution_cache()
+    fingerprint = problem_fingerprint(problem, solver)
+    hit = await cache.get(workspace_id, fingerprint, db)
+    if hit is not None:
+        return cached_payload(stops, *hit)
+
+    t0 = _time.monotonic()
+    result = await _solve_until_disconnect(request, solver, problem)
+    elapsed_ms = int((_time.monotonic() - t0) * 1000)
+
+    data = result_payload(stops, result, elapsed_ms, fingerprint, selection)
+    await cache.put(workspace_id, fingerprint, data)
+    return data
+
+
+# ─── Streaming (Server-Sent Events) ───
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _solve_streaming(solver, problem, on_solution):
+    """Solve, calling `on_solution` on the event loop for every improved solution."""
+    executor = get_solver_executor()
+    if executor is not None:
+        return await executor.solve(solver, problem, on_solution)
+
+    # In-process: search on a thread; a cancelled stream ends it at its next solution
+    loop = asyncio.get_running_loop()
+    stop = threading.Event()
+
+    def relay(update):
+        loop.call_soon_threadsafe(on_solution, update)
+        return not stop.is_set()
+
+    try:
+        return await asyncio.to_thread(solver.solve_sync, problem, None, relay)
+    finally:
+        stop.set()
+
+
+async def _solution_events(stops: list, solver, problem, workspace_id, fingerprint: str, selection=None):
+    """SSE stream: one `solution` event per improvement, then `result` or `error`."""
+    updates: asyncio.Queue = asyncio.Queue()
+    t0 = _time.monotonic()
+    task = asyncio.ensure_future(_solve_streaming(solver, problem, updates.put_nowait))
+
+    def solution_data(update) -> dict:
+        return {
+            "elapsed_ms": update.elapsed_ms,
+            "total_distance_km": update.total_distance_km,
+            "routes": [[int(stop_id) for stop_id in route] for route in update.routes],
+        }
+
+    try:
+        while not task.done():
+            getter = asyncio.ensure_future(updates.get())
+            await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield _sse("solution", solution_data(getter.result()))
+            else:
+                getter.cancel()
+        while not updates.empty():
+            yield _sse("solution", solution_data(updates.get_nowait()))
+
+        try:
+            elapsed_ms = int((_time.monotonic() - t0) * 1000)
+            data = result_payload(stops, task.result(), elapsed_ms, fingerprint, selection)
+        except Exception as exc:
+            yield _sse("error", {"detail": str(exc)})
+        else:
+            await get_solution_cache().put(workspace_id, fingerprint, data)
+            yield _sse("result", data)
+    finally:
+        # Client went away (or we are done): stop the search
+        task.cancel()
+
+
+async def _cached_events(data: dict):
+    yield _sse("result", data)
+
+
+@router.post("/stream")
+async def optimize_route_stream(
+    body: OptimizeRequest,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Streaming variant of POST /optimize over Server-Sent Events.
+
+    Emits an `event: solution` with distance, routes (indices into the
+    request's stops) and elapsed time for every improved solution the
+    search finds, then a final `event: result` carrying the same payload
+    as the non-streaming endpoint (or `event: error`). Closing the
+    connection stops the search. A cached solution is sent as the
+    `result` event alone.
+    """
+    try:
+        problem, solver, selection = build_problem(body)
+        fingerprint = problem_fingerprint(problem, solver)
+        hit = await get_solution_cache().get(user.workspace_id, fingerprint, db)
+    except (ImportError, Exception) as exc:
+        raise engine_error(exc)
+
+    if hit is not None:
+        events = _cached_events(cached_payload(body.stops, *hit))
+    else:
+        events = _solution_events(body.stops, solver, problem, user.workspace_id, fingerprint, selection)
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ─── Batch (NDJSON) ───
+
+def _ndjson(index: int, data: dict | None = None, error: str | None = None) -> str:
+    line = {"index": index, "data": data} if error is None else {"index": index, "error": error}
+    return json.dumps(line) + "\n"
+
+
+async def _batch_lines(items: list[OptimizeRequest], ready: list[str], solves: dict, workspace_id):
+    """
+    The `ready` lines, then one line per remaining item as its solve
+    finishes. `solves` maps a fingerprint to (item indices, problem,
+    solver, selection); the first index's request is solved and the rest
+    get its result under their own stop names.
+    """
+    for line in ready:
+        yield line
+
+    cache = get_solution_cache()
+    executor = get_solver_executor()
+    limit = settings.batch_concurrency or (executor.workers if executor is not None else 1)
+    slots = asyncio.Semaphore(limit)
+
+    async def run(fingerprint: str, indices: list[int], problem, solver, selection):
+        try:
+            async with slots:
+                t0 = _time.monotonic()
+                result = await solve_off_loop(solver, problem)
+                elapsed_ms = int((_time.monotonic() - t0) * 1000)
+            data = result_payload(items[indices[0]].stops, result, elapsed_ms, fingerprint, selection)
+        except Exception as exc:
+            return [_ndjson(index, error=str(exc)) for index in indices]
+        await cache.put(workspace_id, fingerprint, data)
+        return [_ndjson(indices[0], data)] + [
+            _ndjson(index, cached_payload(items[index].stops, data, "batch")) for index in indices[1:]
         ]
 
-        depot_idx = next(
-            (i for i, s in enumerate(stops) if s.type == "depot"), 0
-        )
+    tasks = [asyncio.ensure_future(run(fingerprint, *solve)) for fingerprint, solve in solves.items()]
+    try:
+        for done in asyncio.as_completed(tasks):
+            for line in await done:
+                yield line
+    finally:
+        # Client went away (or we are done): stop the remaining solves
+        for task in tasks:
+            task.cancel()
 
-        vehicle = VehicleSpec(
-            id="v0",
-            capacity_kg=body.constraints.vehicle_capacity_kg,
-            max_distance_km=body.constraints.max_distance_km,
-            max_stops=body.constraints.max_stops,
-        )
 
-        problem = RoutingProblem(
-            stops=engine_stops,
-            vehicles=[vehicle],
-            depot_index=depot_idx,
-        )
+@router.post("/batch")
+async def optimize_route_batch(
+    body: OptimizeBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Solve many independent problems in one request, streamed back as
+    NDJSON: one `{"index": i, "data": <POST /optimize payload>}` or
+    `{"index": i, "error": "..."}` line per item, in completion order.
+
+    Problems identical within the batch (same fingerprint) are solved
+    once; the copies are marked "cache_tier": "batch". Cached problems
+    come first. The rest run on the solver pool at most
+    BATCH_CONCURRENCY (default: one per worker) at a time, so a batch
+    cannot queue ahead of every interactive request. Closing the
+    connection cancels the solves not yet finished.
+    """
+    cache = get_solution_cache()
+    ready: list[str] = []
+    solves: dict[str, tuple[list[int], object, object, object]] = {}
+    for index, item in enumerate(body.items):
+        try:
+            problem, solver, selection = build_problem(item)
+            fingerprint = problem_fingerprint(problem, solver)
+        except (ImportError, Exception) as exc:
+            ready.append(_ndjson(index, error=engine_error(exc).detail))
+            continue
+        if fingerprint in solves:
+            solves[fingerprint][0].append(index)
+            continue
+        hit = await cache.get(user.workspace_id, fingerprint, db)
+        if hit is not None:
+            ready.append(_ndjson(index, cached_payload(item.stops, *hit)))
+            continue
+        solves[fingerprint] = ([index], problem, solver, selection)
 
-        solver = select_solver(problem)
+    return StreamingResponse(
+        _batch_lines(body.items, ready, solves, user.workspace_id),
+        media_type="application/x-ndjson",
+    )
+
+
+# ─── Live Insertion ───
+
+@router.post("/insert", response_model=ApiResponse)
+async def insert_stops(
+    request: Request,
+    body: InsertStopsRequest,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Add stops to an already-optimized plan without re-optimizing it.
+
+    The plan's order is kept and each new stop goes where it adds the
+    least cost, within capacity, max distance and time windows; only
+    the arcs to and from the new stops are computed, so this takes
+    milliseconds. Returns the POST /optimize payload for all the stops
+    plus "insertion": {"inserted": [new stop names], "escalated": null}.
+
+    When a new stop fits nowhere, or the insertions add more than
+    max_added_cost_pct to the plan's cost, the stops are re-solved in
+    full instead, warm-started from the plan (and cached like POST
+    /optimize); "escalated" then says why.
+    """
+    full = body.optimize_request()
+    try:
+        from engine.insertion import InsertionSolver
+
+        problem, solver, selection = build_problem(full)
+        inserter = InsertionSolver(max_added_ratio=body.max_added_cost_pct / 100)
         t0 = _time.monotonic()
-        result = await solver.solve(problem)
+        result = await asyncio.to_thread(inserter.solve_sync, problem)
         elapsed_ms = int((_time.monotonic() - t0) * 1000)
 
-        if not result.success:
-            raise ValueError(result.error or "Solver returned no result")
-
-        m = result.metrics
-        naive_dist = _naive_total_distance(stops)
-        opt_dist = round(m.total_distance_km, 2)
-        dist_saving = max(0, round((1 - opt_dist / naive_dist) * 100)) if naive_dist > 0 else 0
-
-        # Build ordered stop list from solver output (first vehicle)
-        ordered_raw = result.routes[0] if result.routes else []
-        ordered_stops = [
-            {
-                "name": stops[int(o.stop_id)].name,
-                "lat": o.lat,
-                "lng": o.lng,
-                "order": o.order,
-                "arrival_eta_min": round(o.arrival_eta_min),
-                "distance_from_prev_km": round(o.distance_from_prev_km, 2),
-            }
-            for o in ordered_raw
-        ]
+        if result.success:
+            # Not cached: the answer depends on the plan, which the fingerprint leaves out
+            data = result_payload(full.stops, result, elapsed_ms, problem_fingerprint(problem, inserter))
+        else:
+            data = await _solve_cached(request, full.stops, problem, solver, selection, user.workspace_id, db)
+    except (ImportError, Exception) as exc:
+        raise engine_error(exc)
 
-        input_hash = hashlib.sha256(
-            json.dumps(
-                [{"lat": s.lat, "lng": s.lng} for s in stops], sort_keys=True
-            ).encode()
-        ).hexdigest()[:16]
-
-        return ApiResponse(
-            data={
-                "total_distance_km": opt_dist,
-                "estimated_duration_minutes": int(m.total_duration_min),
-                "solution_quality_score": round(m.quality_score / 100, 4),
-                "solver_used": f"OR-Tools ({m.strategy})",
-                "execution_time_ms": elapsed_ms,
-                "ordered_stops": ordered_stops,
-                "input_hash": input_hash,
-                "savings": {
-                    "distance": dist_saving,
-                    "time": max(0, dist_saving - 3),
-                    "fuel": max(0, dist_saving - 2),
-                },
-            }
-        )
+    insertion = {
+        "inserted": [stop.name for stop in body.new_stops],
+        "escalated": None if result.success else result.error,
+    }
+    return ApiResponse(data={**data, "insertion": insertion})
 
-    except (ImportError, Exception) as exc:
-        # Engine not installed or errored — return HTTP 503 with clear message
-        if isinstance(exc, ImportError):
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Routing engine not available. Install OR-Tools in the routing-engine service.",
-            )
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=str(exc),
-        )
+
+# ─── Solution Cache ───
+
+@router.delete("/cache", response_model=ApiResponse)
+async def invalidate_solution_cache(user: User = Depends(get_current_user)):
+    """Forget every cached solution of the caller's workspace."""
+    await get_solution_cache().invalidate(user.workspace_id)
+    return ApiResponse(data={"invalidated": True})
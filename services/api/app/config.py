@@ -36,6 +36,23 @@ class Settings(BaseSettings):
     jwt_access_expiry_minutes: int = 15
     jwt_refresh_expiry_days: int = 7
 
+    # ── Solver Pool ──
+    solver_workers: int = 2                    # 0 solves in-process on a thread
+    solver_max_solves_per_worker: int = 200    # recycle a worker after this many solves
+    solver_max_rss_mb: int = 1536              # ...or once its RSS passes this
+    batch_concurrency: int = 0                 # solves in flight per batch (0: one per solver worker)
+
+    # ── Optimization Jobs ──
+    job_consumers: int = 2                     # concurrent jobs per API process (0: submit only)
+    job_queue_max: int = 1000                  # pending jobs before submit answers 503
+    job_timeout_seconds: int = 120
+    job_max_retries: int = 2                   # re-runs after a crashed solve
+    job_long_poll_max_seconds: int = 30
+
+    # ── Solution Cache ──
+    solution_cache_entries: int = 512          # in-process LRU size
+    solution_cache_ttl_seconds: int = 6 * 3600  # 0 disables
+
     # ── CORS ──
     cors_origins: list[str] = ["http://localhost:3000", "http://localhost:5173"]
 
@@ -0,0 +1,107 @@
+"""
+OmniRoute AI — Optimization Job Queue
+
+Redis lists feeding the optimization job consumers. Job state lives
+in the optimization_jobs table; Redis only carries job ids.
+
+  omniroute:jobs:pending     submitted ids (LPUSH, consumers take from the right)
+  omniroute:jobs:processing  ids a consumer has taken (BLMOVE), removed on ack
+  omniroute:jobs:done:<id>   pub/sub channel pinged when a job finishes,
+                             waking long-polling clients
+
+The pending list is bounded by settings.job_queue_max, so a burst
+of submissions is turned away with 503 instead of piling up.
+"""
+
+import time
+from collections.abc import Awaitable, Callable
+from uuid import UUID
+
+from app.config import settings
+from app.infrastructure.redis import get_redis
+
+PENDING_KEY = "omniroute:jobs:pending"
+PROCESSING_KEY = "omniroute:jobs:processing"
+DONE_CHANNEL = "omniroute:jobs:done:{}"
+
+
+class QueueFullError(RuntimeError):
+    """The pending list is at settings.job_queue_max."""
+
+
+class JobQueue:
+    """Thin wrapper over an async Redis client."""
+
+    def __init__(self, redis, max_length: int):
+        self.redis = redis
+        self.max_length = max_length
+
+    async def depth(self) -> int:
+        return await self.redis.llen(PENDING_KEY)
+
+    async def push(self, job_id: UUID) -> None:
+        """Enqueue a new job, refusing when the queue is full."""
+        if await self.depth() >= self.max_length:
+            raise QueueFullError("Optimization queue is full, retry shortly")
+        await self.redis.lpush(PENDING_KEY, str(job_id))
+
+    async def take(self, timeout: float) -> UUID | None:
+        """Block up to `timeout` seconds for the next job, moving it to processing."""
+        raw = await self.redis.blmove(PENDING_KEY, PROCESSING_KEY, timeout, "RIGHT", "LEFT")
+        return UUID(raw.decode() if isinstance(raw, bytes) else raw) if raw else None
+
+    async def ack(self, job_id: UUID) -> None:
+        await self.redis.lrem(PROCESSING_KEY, 1, str(job_id))
+
+    async def retry(self, job_id: UUID) -> None:
+        """Move a taken job back to the pending list (bypasses the bound)."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lrem(PROCESSING_KEY, 1, str(job_id))
+            pipe.lpush(PENDING_KEY, str(job_id))
+            await pipe.execute()
+
+    async def in_flight(self) -> list[UUID]:
+        raw = await self.redis.lrange(PROCESSING_KEY, 0, -1)
+        return [UUID(r.decode() if isinstance(r, bytes) else r) for r in raw]
+
+    async def notify_done(self, job_id: UUID) -> None:
+        await self.redis.publish(DONE_CHANNEL.format(job_id), "done")
+
+    async def wait_done(self, job_id: UUID, timeout: float, is_done: Callable[[], Awaitable[bool]]) -> None:
+        """
+        Return once the job finishes or `timeout` passes. Subscribes before
+        calling `is_done()`, so a completion in between is not missed.
+        """
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(DONE_CHANNEL.format(job_id))
+        try:
+            if await is_done():
+                return
+            deadline = time.monotonic() + timeout
+            while (remaining := deadline - time.monotonic()) > 0:
+                # Returns None early for the subscribe confirmation, so loop
+                if await pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining):
+                    return
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+
+
+_queue: JobQueue | None = None
+
+
+def get_job_queue() -> JobQueue | None:
+    """The job queue, or None when Redis is not available."""
+    return _queue
+
+
+def start_job_queue() -> None:
+    """Bind the queue to the shared Redis client (call after start_redis)."""
+    global _queue
+    redis = get_redis()
+    _queue = JobQueue(redis, settings.job_queue_max) if redis is not None else None
+
+
+def stop_job_queue() -> None:
+    global _queue
+    _queue = None
@@ -0,0 +1,39 @@
+"""
+OmniRoute AI — Redis Client
+
+One async Redis client per process, opened in the lifespan hook.
+get_redis() returns None when the redis package is missing or the
+server was unreachable at startup; every caller degrades without it.
+"""
+
+from app.config import settings
+
+_client = None
+
+
+def get_redis():
+    """The shared async Redis client, or None when Redis is unavailable."""
+    return _client
+
+
+async def start_redis() -> None:
+    global _client
+    try:
+        import redis.asyncio as aioredis
+    except ImportError:
+        return
+
+    client = aioredis.from_url(settings.redis_url, socket_connect_timeout=2)
+    try:
+        await client.ping()
+    except Exception:
+        await client.aclose()
+        return
+    _client = client
+
+
+async def stop_redis() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
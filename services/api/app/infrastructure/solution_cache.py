@@ -0,0 +1,179 @@
+"""
+OmniRoute AI — Solution Cache
+
+Optimize results keyed by a canonical fingerprint of everything that
+determines the solve: stop coordinates (quantized to 1e-6°), demands,
+service times and windows, vehicle specs, depot, cost settings and the
+solver strategy. Display-only fields (stop names and ids) are left out,
+so renaming a stop still hits.
+
+Tiers, fastest first; a hit in a slower tier is promoted upward:
+  1. in-process LRU (settings.solution_cache_entries)
+  2. Redis, omniroute:solution:<workspace>:<fingerprint>, EX ttl
+  3. the optimization_jobs table: latest completed job with the same
+     input_hash in the workspace (cold tier)
+
+Every entry is scoped to a workspace and expires after
+settings.solution_cache_ttl_seconds (0 disables the cache).
+invalidate(workspace) stamps omniroute:solution:<workspace>:invalidated;
+entries cached before that instant are ignored in every tier and every
+process.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import UTC, datetime
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.infrastructure.models import JobStatus, OptimizationJob
+from app.infrastructure.redis import get_redis
+
+_KEY = "omniroute:solution:{}:{}"
+_INVALIDATED_KEY = "omniroute:solution:{}:invalidated"
+
+COORD_SCALE = 1_000_000  # same quantization as the engine's matrix store
+
+
+def problem_fingerprint(problem, solver) -> str:
+    """Canonical hash of an engine RoutingProblem plus the solver settings."""
+    columns = problem.columns
+    canonical = {
+        # lat, lng (quantized), demand, service, window start/end in seconds of day (−1: open)
+        "stops": list(zip(
+            (columns.lat * COORD_SCALE).round().astype("int64").tolist(),
+            (columns.lng * COORD_SCALE).round().astype("int64").tolist(),
+            columns.demand_kg.tolist(),
+            columns.service_time_min.tolist(),
+            columns.window_start_s.tolist(),
+            columns.window_end_s.tolist(),
+        )),
+        "vehicles": [[v.capacity_kg, v.max_distance_km, v.max_stops, v.cost_per_km] for v in problem.vehicles],
+        "depot": problem.depot_index,
+        "optimize_for": problem.optimize_for.value,
+        "distance_metric": problem.distance_metric.value,
+        "avg_speed_kmh": problem.avg_speed_kmh,
+        "solver": type(solver).__name__,
+        "strategy": solver.strategy,
+        "sparse_k": getattr(solver, "sparse_k", None),
+        "time_limit_s": getattr(solver, "time_limit_s", None),
+    }
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+
+class SolutionCache:
+    """Memory → Redis → DB lookup of optimize payloads."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple[UUID, str], tuple[float, dict]] = OrderedDict()
+        self._invalidated: dict[UUID, float] = {}
+
+    async def get(
+        self, workspace_id: UUID, fingerprint: str, db: AsyncSession | None = None
+    ) -> tuple[dict, str] | None:
+        """Return (payload, tier) for a fresh entry, or None."""
+        if self.ttl_seconds <= 0:
+            return None
+        now = time.time()
+        redis = get_redis()
+
+        stored = None
+        invalidated_at = self._invalidated.get(workspace_id, 0.0)
+        if redis is not None:
+            try:
+                remote_invalidated, stored = await redis.mget(
+                    _INVALIDATED_KEY.format(workspace_id), _KEY.format(workspace_id, fingerprint)
+                )
+                if remote_invalidated:
+                    invalidated_at = max(invalidated_at, float(remote_invalidated))
+            except Exception:
+                stored = None  # Redis hiccup: memory and DB tiers still work
+        cutoff = max(now - self.ttl_seconds, invalidated_at)
+
+        key = (workspace_id, fingerprint)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > cutoff:
+                self._entries.move_to_end(key)
+                return entry[1], "memory"
+            del self._entries[key]
+
+        if stored:
+            cached_at, payload = json.loads(stored)
+            if cached_at > cutoff:
+                self._remember(key, cached_at, payload)
+                return payload, "redis"
+
+        if db is not None:
+            result = await db.execute(
+                select(OptimizationJob.result_data, OptimizationJob.completed_at)
+                .where(
+                    OptimizationJob.workspace_id == workspace_id,
+                    OptimizationJob.input_hash == fingerprint,
+                    OptimizationJob.status == JobStatus.completed,
+                    OptimizationJob.completed_at > datetime.fromtimestamp(cutoff, UTC),
+                )
+                .order_by(OptimizationJob.completed_at.desc())
+                .limit(1)
+            )
+            row = result.first()
+            if row is not None and row.result_data:
+                await self.put(workspace_id, fingerprint, row.result_data, cached_at=row.completed_at.timestamp())
+                return row.result_data, "db"
+        return None
+
+    async def put(self, workspace_id: UUID, fingerprint: str, payload: dict, cached_at: float | None = None) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        cached_at = time.time() if cached_at is None else cached_at
+        self._remember((workspace_id, fingerprint), cached_at, payload)
+
+        redis = get_redis()
+        if redis is None:
+            return
+        ttl = int(self.ttl_seconds - (time.time() - cached_at))
+        if ttl <= 0:
+            return
+        try:
+            await redis.set(_KEY.format(workspace_id, fingerprint), json.dumps([cached_at, payload]), ex=ttl)
+        except Exception:
+            pass  # A cache write must never fail a solve
+
+    async def invalidate(self, workspace_id: UUID) -> None:
+        """Drop every cached solution of a workspace, in all tiers and processes."""
+        if self.ttl_seconds <= 0:
+            return  # caching disabled: nothing stored, nothing to shadow
+        now = time.time()
+        self._invalidated[workspace_id] = now
+        for key in [k for k in self._entries if k[0] == workspace_id]:
+            del self._entries[key]
+
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            # Outlives every entry it shadows
+            await redis.set(_INVALIDATED_KEY.format(workspace_id), repr(now), ex=self.ttl_seconds)
+        except Exception:
+            pass  # Redis hiccup: this process is invalidated, others expire by TTL
+
+    def _remember(self, key: tuple[UUID, str], cached_at: float, payload: dict) -> None:
+        self._entries[key] = (cached_at, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+_cache = SolutionCache(settings.solution_cache_entries, settings.solution_cache_ttl_seconds)
+
+
+def get_solution_cache() -> SolutionCache:
+    return _cache
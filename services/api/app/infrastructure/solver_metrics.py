@@ -0,0 +1,120 @@
+"""
+OmniRoute AI — Solver Metrics
+
+Every fresh solve's metrics (phase timings, search statistics; see
+routing-engine engine/instrumentation.py) aggregated into histograms
+by stop-count bucket, exported at GET /metrics in the Prometheus text
+format:
+
+  omniroute_solve_seconds{stops}                 whole solve
+  omniroute_solve_phase_seconds{phase,stops}     matrix | model | search | extraction
+  omniroute_search_solutions{stops}              improving solutions per search
+  omniroute_search_branches_total{stops}
+  omniroute_search_time_limit_hits_total{stops}
+
+Counts are per API process (solves from its endpoints and job
+consumers); the scraper sums processes. Cached answers are not solves
+and are not counted.
+"""
+
+from collections import defaultdict
+
+# Upper bounds of the stop-count buckets; the last bucket is open
+STOP_BUCKETS = (50, 200, 1000, 5000)
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SOLUTIONS_BUCKETS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+def stop_bucket(stop_count: int) -> str:
+    """Label of the bucket a problem size falls in, e.g. "50-199"."""
+    lower = 0
+    for upper in STOP_BUCKETS:
+        if stop_count < upper:
+            return f"{lower}-{upper - 1}"
+        lower = upper
+    return f"{lower}+"
+
+
+class _Histogram:
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        sep = "," if labels else ""
+        out = [
+            f'{name}_bucket{{{labels}{sep}le="{bound}"}} {count}' for bound, count in zip(self.bounds, self.counts)
+        ]
+        out.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        out.append(f"{name}_sum{{{labels}}} {round(self.sum, 6)}")
+        out.append(f"{name}_count{{{labels}}} {self.count}")
+        return out
+
+
+class SolverMetricsRegistry:
+    """Histograms of solve metrics, keyed by stop-count bucket (and phase)."""
+
+    def __init__(self):
+        self._solve: dict[str, _Histogram] = defaultdict(lambda: _Histogram(SECONDS_BUCKETS))
+        self._phase: dict[tuple[str, str], _Histogram] = defaultdict(lambda: _Histogram(SECONDS_BUCKETS))
+        self._solutions: dict[str, _Histogram] = defaultdict(lambda: _Histogram(SOLUTIONS_BUCKETS))
+        self._branches: dict[str, int] = defaultdict(int)
+        self._time_limit_hits: dict[str, int] = defaultdict(int)
+
+    def record(self, stop_count: int, metrics) -> None:
+        """Add one solve's engine SolverMetrics."""
+        stops = stop_bucket(stop_count)
+        self._solve[stops].observe(metrics.execution_time_ms / 1000)
+        for phase, ms in metrics.phases_ms.items():
+            self._phase[(phase, stops)].observe(ms / 1000)
+        if metrics.search is not None:
+            self._solutions[stops].observe(metrics.search.solutions)
+            self._branches[stops] += metrics.search.branches
+            self._time_limit_hits[stops] += metrics.search.time_limit_hit
+
+    def render(self) -> str:
+        """The Prometheus text exposition of every histogram and counter."""
+        lines = [
+            "# HELP omniroute_solve_seconds Wall-clock time of a solve.",
+            "# TYPE omniroute_solve_seconds histogram",
+        ]
+        for stops, hist in sorted(self._solve.items()):
+            lines += hist.lines("omniroute_solve_seconds", f'stops="{stops}"')
+
+        lines += [
+            "# HELP omniroute_solve_phase_seconds Time spent in each phase of a solve.",
+            "# TYPE omniroute_solve_phase_seconds histogram",
+        ]
+        for (phase, stops), hist in sorted(self._phase.items()):
+            lines += hist.lines("omniroute_solve_phase_seconds", f'phase="{phase}",stops="{stops}"')
+
+        lines += [
+            "# HELP omniroute_search_solutions Improving solutions found per search.",
+            "# TYPE omniroute_search_solutions histogram",
+        ]
+        for stops, hist in sorted(self._solutions.items()):
+            lines += hist.lines("omniroute_search_solutions", f'stops="{stops}"')
+
+        for name, help_text, counter in (
+            ("omniroute_search_branches_total", "Constraint solver branches explored.", self._branches),
+            ("omniroute_search_time_limit_hits_total", "Searches stopped by their time limit.", self._time_limit_hits),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            lines += [f'{name}{{stops="{stops}"}} {value}' for stops, value in sorted(counter.items())]
+        return "\n".join(lines) + "\n"
+
+
+_registry = SolverMetricsRegistry()
+
+
+def get_solver_metrics() -> SolverMetricsRegistry:
+    return _registry
@@ -0,0 +1,53 @@
+"""
+OmniRoute AI — Solver Process Pool
+
+Owns the routing engine's SolverExecutor for the lifetime of the app.
+Started in the lifespan hook; endpoints fetch it with
+get_solver_executor(). When the pool is disabled (SOLVER_WORKERS=0)
+or the engine is not installed, this returns None and callers solve
+in-process as before.
+"""
+
+import os
+import sys
+
+from app.config import settings
+
+# Add routing-engine to path
+sys.path.insert(
+    0,
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "routing-engine")),
+)
+
+_executor = None
+
+
+def get_solver_executor():
+    """The running SolverExecutor, or None when solving in-process."""
+    return _executor
+
+
+async def start_solver_pool() -> None:
+    """Start the pre-warmed worker processes."""
+    global _executor
+    if settings.solver_workers <= 0:
+        return
+    try:
+        from engine.executor import SolverExecutor
+    except ImportError:
+        return  # Engine not installed — the optimize endpoint reports 503
+
+    executor = SolverExecutor(
+        workers=settings.solver_workers,
+        max_solves=settings.solver_max_solves_per_worker,
+        max_rss_mb=settings.solver_max_rss_mb,
+    )
+    await executor.start()
+    _executor = executor
+
+
+async def stop_solver_pool() -> None:
+    global _executor
+    if _executor is not None:
+        await _executor.shutdown()
+        _executor = None
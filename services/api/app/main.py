@@ -12,12 +12,17 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
 from app.infrastructure.database import engine
+from app.infrastructure.job_queue import start_job_queue, stop_job_queue
+from app.infrastructure.redis import start_redis, stop_redis
+from app.infrastructure.solver_pool import start_solver_pool, stop_solver_pool
+from app.workers.optimize_jobs import start_job_consumers, stop_job_consumers
 from app.api.health import router as health_router
 from app.api.v1.auth import router as auth_router
 from app.api.v1.vehicles import router as vehicles_router
 from app.api.v1.drivers import router as drivers_router
 from app.api.v1.routes import router as routes_router
 from app.api.v1.optimize import router as optimize_router
+from app.api.v1.jobs import router as jobs_router
 
 
 @asynccontextmanager
@@ -28,8 +33,17 @@ async def lifespan(app: FastAPI):
         await conn.execute(
             __import__("sqlalchemy").text("SELECT 1")
         )
+    # Startup: pre-warm solver worker processes, connect Redis, start job consumers
+    await start_solver_pool()
+    await start_redis()
+    start_job_queue()
+    await start_job_consumers()
     yield
-    # Shutdown: dispose connection pool
+    # Shutdown: stop consumers, Redis and solver workers, dispose connection pool
+    await stop_job_consumers()
+    stop_job_queue()
+    await stop_redis()
+    await stop_solver_pool()
     await engine.dispose()
 
 
@@ -57,6 +71,7 @@ def create_app() -> FastAPI:
     app.include_router(vehicles_router, prefix="/api/v1/vehicles", tags=["Vehicles"])
     app.include_router(drivers_router, prefix="/api/v1/drivers", tags=["Drivers"])
     app.include_router(routes_router, prefix="/api/v1/routes", tags=["Routes"])
+    app.include_router(jobs_router, prefix="/api/v1/optimize/jobs", tags=["Optimize"])
     app.include_router(optimize_router, prefix="/api/v1/optimize", tags=["Optimize"])
 
     return app
@@ -6,9 +6,10 @@ Separated by domain: auth, vehicles, routes, drivers, optimize.
 """
 
 from datetime import datetime
+from typing import Annotated
 from uuid import UUID
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, model_validator
 
 
 # ─── Standardized API Response ───
@@ -131,6 +132,64 @@ class StopIn(BaseModel):
     type: str = "stop"          # "depot" | "stop"
     service_time_minutes: int = 0
     load_kg: float = 0.0
+    time_window_start: str | None = None  # "HH:MM"
+    time_window_end: str | None = None    # "HH:MM"
+
+
+class StopColumnsIn(BaseModel):
+    """
+    The same stops as parallel arrays, stop i at index i of each: the
+    columnar form of list[StopIn], smaller on the wire and validated per
+    array rather than per stop. Optional columns default as in StopIn.
+    """
+    name: list[str]
+    lat: list[float]
+    lng: list[float]
+    type: list[str] | None = None
+    service_time_minutes: list[int] | None = None
+    load_kg: list[float] | None = None
+    time_window_start: list[str | None] | None = None
+    time_window_end: list[str | None] | None = None
+
+    @model_validator(mode="after")
+    def _fill_columns(self):
+        n = len(self.name)
+        if n < 2:
+            raise ValueError("At least 2 stops are required")
+        for field, default in (
+            ("type", "stop"),
+            ("service_time_minutes", 0),
+            ("load_kg", 0.0),
+            ("time_window_start", None),
+            ("time_window_end", None),
+        ):
+            if getattr(self, field) is None:
+                setattr(self, field, [default] * n)
+        for field in type(self).model_fields:
+            if len(getattr(self, field)) != n:
+                raise ValueError(f"stops.{field} has {len(getattr(self, field))} entries, stops.name has {n}")
+        return self
+
+    def __len__(self) -> int:
+        return len(self.name)
+
+    @classmethod
+    def from_rows(cls, stops: list[StopIn]) -> "StopColumnsIn":
+        return cls.model_construct(**{
+            field: [getattr(s, field) for s in stops] for field in cls.model_fields
+        })
+
+    def extended(self, stops: list[StopIn]) -> "StopColumnsIn":
+        """These stops followed by `stops`."""
+        more = StopColumnsIn.from_rows(stops)
+        return StopColumnsIn.model_construct(**{
+            field: getattr(self, field) + getattr(more, field) for field in type(self).model_fields
+        })
+
+
+def stop_columns(stops: "list[StopIn] | StopColumnsIn") -> StopColumnsIn:
+    """Request stops as columns, whichever form they were sent in."""
+    return stops if isinstance(stops, StopColumnsIn) else StopColumnsIn.from_rows(stops)
 
 
 class ConstraintsIn(BaseModel):
@@ -138,12 +197,50 @@ class ConstraintsIn(BaseModel):
     max_stops: int = 50
     vehicle_capacity_kg: float = 1000.0
     optimize_for: str = "distance"   # "distance" | "time" | "fuel"
+    distance_metric: str = "haversine"  # "haversine" | "road"
 
 
 class OptimizeRequest(BaseModel):
-    stops: list[StopIn] = Field(min_length=2)
+    # Rows (one object per stop) or columns (parallel arrays, for large requests)
+    stops: Annotated[list[StopIn], Field(min_length=2)] | StopColumnsIn
     constraints: ConstraintsIn = Field(default_factory=ConstraintsIn)
     mode: str = "classical"          # "classical" | "quantum"
+    # Previous plan to re-optimize from: stop names per vehicle, e.g. the
+    # ordered_stops names of an earlier result. Unknown names are ignored
+    initial_routes: list[list[str]] | None = None
+    # Latency target for the solve; with a fitted selector model it picks
+    # the strategy and time limit expected to do best within it
+    latency_slo_ms: int | None = Field(None, ge=100)
+
+
+class OptimizeBatchRequest(BaseModel):
+    # Independent problems; identical ones are solved once
+    items: list[OptimizeRequest] = Field(min_length=1, max_length=500)
+
+
+class InsertStopsRequest(BaseModel):
+    # The plan's stops as sent to POST /optimize, rows or columns
+    stops: Annotated[list[StopIn], Field(min_length=2)] | StopColumnsIn
+    # The plan: stop names per vehicle in visiting order, e.g. the
+    # ordered_stops names of its result
+    routes: list[list[str]] = Field(min_length=1)
+    # Stops to add to it, e.g. pickups that came in since
+    new_stops: list[StopIn] = Field(min_length=1)
+    constraints: ConstraintsIn = Field(default_factory=ConstraintsIn)
+    # Re-solve in full instead when the insertions add more than this
+    # share of the plan's cost
+    max_added_cost_pct: float = Field(15.0, ge=0)
+    # Latency target of that re-solve, as in OptimizeRequest
+    latency_slo_ms: int | None = Field(None, ge=100)
+
+    def optimize_request(self) -> OptimizeRequest:
+        """The plan's and the new stops as one problem to re-optimize, warm-started from the plan."""
+        return OptimizeRequest(
+            stops=stop_columns(self.stops).extended(self.new_stops),
+            constraints=self.constraints,
+            initial_routes=self.routes,
+            latency_slo_ms=self.latency_slo_ms,
+        )
 
 
 class OptimizeResult(BaseModel):
@@ -154,3 +251,18 @@ class OptimizeResult(BaseModel):
     execution_time_ms: int
     ordered_stops: list[dict]
     savings: dict | None = None
+    solver_selection: dict | None = None  # which solver was picked and why
+
+
+class OptimizationJobOut(BaseModel):
+    id: UUID
+    status: str                      # "pending" | "running" | "completed" | "failed" | "timeout" | "cancelled"
+    retry_count: int
+    error_message: str | None
+    result_data: dict | None         # OptimizeResult payload once completed
+    execution_time_ms: int | None
+    created_at: datetime
+    started_at: datetime | None
+    completed_at: datetime | None
+
+    model_config = {"from_attributes": True}
@@ -0,0 +1 @@
+"""Background workers — optimization job consumers."""
@@ -0,0 +1,173 @@
+"""
+OmniRoute AI — Optimization Job Consumers
+
+Background tasks that take job ids off the Redis queue, run the solve
+through the solver pool, and record the outcome on the job row:
+
+  completed  result_data holds the same payload as POST /optimize
+  failed     bad input or no feasible solution (not retried), or a
+             crashed solve that used up settings.job_max_retries
+  timeout    the solve ran past settings.job_timeout_seconds
+
+A consumer that dies mid-job leaves the id in the processing list. A
+recovery sweep, at startup and then every _RECOVERY_INTERVAL_SECONDS,
+retries those ids like any other crash: jobs "running" for twice the
+solve timeout, and jobs still "pending" on two sweeps in a row (the
+consumer died between taking the id and marking the job running).
+"""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+from pydantic import ValidationError
+
+from app.api.v1.optimize import build_problem, result_payload, solve_off_loop
+from app.config import settings
+from app.infrastructure.database import async_session_factory
+from app.infrastructure.job_queue import JobQueue, get_job_queue
+from app.infrastructure.models import JobStatus, OptimizationJob
+from app.infrastructure.solution_cache import get_solution_cache
+from app.schemas import OptimizeRequest
+
+# Seconds a consumer blocks on the queue before re-checking for shutdown
+_TAKE_TIMEOUT_SECONDS = 5
+# Back-off after an unexpected error (DB or Redis briefly unavailable)
+_ERROR_BACKOFF_SECONDS = 1
+# How often the processing list is swept for jobs whose consumer died
+_RECOVERY_INTERVAL_SECONDS = 60
+
+_consumers: list[asyncio.Task] = []
+
+
+async def start_job_consumers() -> None:
+    """Start settings.job_consumers consumer tasks and the recovery sweep."""
+    queue = get_job_queue()
+    if queue is None or settings.job_consumers <= 0:
+        return
+    _consumers.append(asyncio.create_task(_recover_periodically(queue)))
+    for _ in range(settings.job_consumers):
+        _consumers.append(asyncio.create_task(_consume(queue)))
+
+
+async def stop_job_consumers() -> None:
+    for task in _consumers:
+        task.cancel()
+    await asyncio.gather(*_consumers, return_exceptions=True)
+    _consumers.clear()
+
+
+async def _consume(queue: JobQueue) -> None:
+    while True:
+        try:
+            job_id = await queue.take(_TAKE_TIMEOUT_SECONDS)
+            if job_id is not None:
+                await _run_job(queue, job_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await asyncio.sleep(_ERROR_BACKOFF_SECONDS)
+
+
+async def _run_job(queue: JobQueue, job_id: UUID) -> None:
+    async with async_session_factory() as db:
+        job = await db.get(OptimizationJob, job_id)
+        if job is None or job.status != JobStatus.pending:
+            await queue.ack(job_id)  # cancelled, or already handled
+            return
+
+        job.status = JobStatus.running
+        job.started_at = datetime.now(UTC)
+        await db.commit()
+
+        try:
+            body = OptimizeRequest.model_validate(job.input_data)
+            problem, solver, selection = build_problem(body)
+            t0 = asyncio.get_running_loop().time()
+            result = await asyncio.wait_for(solve_off_loop(solver, problem), settings.job_timeout_seconds)
+            elapsed_ms = int((asyncio.get_running_loop().time() - t0) * 1000)
+            data = result_payload(body.stops, result, elapsed_ms, job.input_hash, selection)
+        except TimeoutError:
+            job.status = JobStatus.timeout
+            job.error_message = f"Solve exceeded {settings.job_timeout_seconds}s"
+        except (ImportError, ValidationError, ValueError) as exc:
+            # Deterministic: retrying would fail the same way
+            job.status = JobStatus.failed
+            job.error_message = str(exc)
+        except Exception as exc:
+            job.error_message = str(exc)
+            if job.retry_count < settings.job_max_retries:
+                job.retry_count += 1
+                job.status = JobStatus.pending
+                await db.commit()
+                await queue.retry(job_id)
+                return
+            job.status = JobStatus.failed
+        else:
+            job.status = JobStatus.completed
+            job.result_data = data
+            job.solution_quality_score = data["solution_quality_score"]
+            job.execution_time_ms = data["execution_time_ms"]
+
+        # A cancel that arrived during the solve wins
+        final_status = job.status
+        await db.refresh(job, ["status"])
+        if job.status == JobStatus.cancelled:
+            job.result_data = None
+        else:
+            job.status = final_status
+        job.completed_at = datetime.now(UTC)
+        await db.commit()
+        if job.status == JobStatus.completed:
+            await get_solution_cache().put(job.workspace_id, job.input_hash, job.result_data)
+
+    await queue.ack(job_id)
+    await queue.notify_done(job_id)
+
+
+async def _recover_periodically(queue: JobQueue) -> None:
+    pending_seen: set[UUID] = set()
+    while True:
+        try:
+            pending_seen = await _recover_stale(queue, pending_seen)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass  # DB or Redis briefly unavailable: next sweep
+        await asyncio.sleep(_RECOVERY_INTERVAL_SECONDS)
+
+
+async def _recover_stale(queue: JobQueue, pending_seen: set[UUID]) -> set[UUID]:
+    """
+    Retry jobs whose consumer died: still in processing and either running
+    past twice the timeout, or pending now and at the previous sweep
+    (`pending_seen`). Returns the pending ids left for the next sweep.
+    """
+    cutoff = datetime.now(UTC) - timedelta(seconds=settings.job_timeout_seconds * 2)
+    still_pending: set[UUID] = set()
+    async with async_session_factory() as db:
+        for job_id in await queue.in_flight():
+            job = await db.get(OptimizationJob, job_id)
+            if job is None or job.status not in (JobStatus.pending, JobStatus.running):
+                await queue.ack(job_id)
+                continue
+            if job.status == JobStatus.pending:
+                # A live consumer marks its job running right after taking it
+                if job_id in pending_seen:
+                    await queue.retry(job_id)
+                else:
+                    still_pending.add(job_id)
+                continue
+            if job.started_at and job.started_at < cutoff:
+                if job.retry_count < settings.job_max_retries:
+                    job.retry_count += 1
+                    job.status = JobStatus.pending
+                    await db.commit()
+                    await queue.retry(job_id)
+                else:
+                    job.status = JobStatus.failed
+                    job.error_message = "Worker stopped while solving"
+                    job.completed_at = datetime.now(UTC)
+                    await db.commit()
+                    await queue.ack(job_id)
+    return still_pending
@@ -0,0 +1,88 @@
+"""
+OmniRoute AI — Solver History Export
+
+Turns completed optimization_jobs into SolveRecord lines for the
+learned selector (routing-engine engine/learned_selector.py), and
+optionally the problems themselves, so calibrate can replay them under
+every candidate:
+
+    python -m app.workers.solver_history history.jsonl --problems problems.jsonl --days 30
+    cd ../routing-engine
+    python -m engine.learned_selector calibrate problems.jsonl history.jsonl
+    python -m engine.learned_selector fit history.jsonl model.json
+
+Only single-search solves are exported (not decompositions or
+portfolios), and not warm starts, whose budget differs.
+"""
+
+import argparse
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+from pydantic import ValidationError
+from sqlalchemy import select
+
+from app.api.v1.optimize import build_problem
+from app.infrastructure.database import async_session_factory
+from app.infrastructure.models import JobStatus, OptimizationJob
+from app.schemas import OptimizeRequest
+
+# What a solve picked by the rules ran (engine/learned_selector.py CANDIDATES)
+_RULE_CANDIDATES = {
+    "fast": "fast",
+    "first_solution": "first_solution",
+    "guided_local_search": "guided_local_search@10s",
+}
+
+
+async def export(history_path: str, problems_path: str | None, days: int) -> int:
+    from engine.learned_selector import SolveRecord, problem_features, problem_key
+
+    since = datetime.now(UTC) - timedelta(days=days)
+    exported = 0
+    async with async_session_factory() as db:
+        rows = await db.execute(
+            select(OptimizationJob.input_data, OptimizationJob.result_data, OptimizationJob.execution_time_ms).where(
+                OptimizationJob.status == JobStatus.completed,
+                OptimizationJob.completed_at > since,
+            )
+        )
+        with open(history_path, "a") as history, open(problems_path or "/dev/null", "a") as problems:
+            for input_data, result_data, execution_time_ms in rows:
+                selection = (result_data or {}).get("solver_selection")
+                if not selection or selection["solver"] not in ("fast", "classical") or execution_time_ms is None:
+                    continue
+                candidate = selection.get("candidate") or _RULE_CANDIDATES.get(selection["strategy"])
+                try:
+                    body = OptimizeRequest.model_validate(input_data)
+                    problem, _, _ = build_problem(body)
+                except (ValidationError, ValueError):
+                    continue
+                if candidate is None or problem.initial_routes:
+                    continue
+
+                record = SolveRecord(
+                    problem_key=problem_key(problem),
+                    features=problem_features(problem),
+                    candidate=candidate,
+                    elapsed_ms=execution_time_ms,
+                    objective=result_data.get("objective"),
+                )
+                history.write(record.model_dump_json() + "\n")
+                problems.write(problem.model_dump_json() + "\n")
+                exported += 1
+    return exported
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export solve history for the learned solver selector.")
+    parser.add_argument("history", help="SolveRecord JSON lines (appended)")
+    parser.add_argument("--problems", help="also append each RoutingProblem, for calibrate")
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+    count = asyncio.run(export(args.history, args.problems, args.days))
+    print(f"{count} solves exported to {args.history}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+OmniRoute AI — Wire Format Benchmark
+
+Payload size and request latency of the optimize endpoint's formats
+(app/api/wire.py) against today's JSON: rows in, validated through
+FastAPI's body parsing, and the ApiResponse model out through
+response_model validation and jsonable_encoder.
+
+Each format runs a minimal app with the endpoint's decode and encode
+steps around a fixed, precomputed result (stops in input order), so
+the numbers are the wire overhead alone: no auth, database, cache or
+solve. Latencies are over --requests in-process requests.
+
+Usage (from services/api, with the routing engine importable):
+    python -m benchmarks.bench_wire
+    python -m benchmarks.bench_wire --stops 1000 5000 --requests 200
+"""
+
+import argparse
+import gzip
+import random
+import statistics
+import time
+
+import msgpack
+import orjson
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.api import wire
+from app.api.v1.optimize import build_problem, result_payload
+from app.schemas import ApiResponse, OptimizeRequest
+
+
+def _request(n: int) -> dict:
+    rng = random.Random(n)
+    return {
+        "stops": [
+            {
+                "name": f"Stop {i}",
+                "lat": 28.5 + rng.random() * 0.3,
+                "lng": 77.1 + rng.random() * 0.3,
+                "type": "depot" if i == 0 else "delivery",
+                "service_time_minutes": 5,
+                "load_kg": round(rng.uniform(1, 20), 1),
+            }
+            for i in range(n)
+        ]
+    }
+
+
+def _payload(body: OptimizeRequest) -> dict:
+    """A result payload for the stops in input order, built like a real solve's."""
+    from engine.models import OptimizedStop, SolverMetrics, SolverResult, SolverType
+
+    problem, _, selection = build_problem(body)
+    columns = problem.columns
+    route = [
+        OptimizedStop(stop_id=columns.ids[i], order=i, lat=float(columns.lat[i]), lng=float(columns.lng[i]),
+                      arrival_eta_min=i * 6.5, distance_from_prev_km=1.25)
+        for i in range(problem.stop_count)
+    ]
+    metrics = SolverMetrics(solver_type=SolverType.classical, strategy="fast", total_distance_km=1.0, objective=1000)
+    return result_payload(body.stops, SolverResult(routes=[route], metrics=metrics), 0, "0" * 32, selection)
+
+
+def _app(payload: dict) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/json", response_model=ApiResponse)
+    async def today(body: OptimizeRequest):
+        return ApiResponse(data=payload)
+
+    @app.post("/wire")
+    async def negotiated(request: Request, body: OptimizeRequest = Depends(wire.body(OptimizeRequest))):
+        return wire.respond(request, payload)
+
+    return app
+
+
+def _columns(request: dict) -> dict:
+    rows = request["stops"]
+    return {**request, "stops": {key: [row[key] for row in rows] for key in rows[0]}}
+
+
+def _cases(request: dict):
+    """(label, path, body bytes, headers) per format."""
+    rows, columns = orjson.dumps(request), orjson.dumps(_columns(request))
+    packed = msgpack.packb(_columns(request))
+    yield "json (today)", "/json", rows, {"content-type": wire.JSON}
+    yield "json (orjson)", "/wire", rows, {"content-type": wire.JSON}
+    yield "columnar json", "/wire", columns, {"content-type": wire.JSON, "accept": wire.COLUMNAR_JSON}
+    yield "msgpack", "/wire", packed, {"content-type": wire.MSGPACK, "accept": wire.MSGPACK}
+    gzipped = {"content-encoding": "gzip", "accept-encoding": "gzip"}
+    yield "columnar json + gzip", "/wire", gzip.compress(columns, 5), {
+        "content-type": wire.JSON, "accept": wire.COLUMNAR_JSON, **gzipped,
+    }
+    yield "msgpack + gzip", "/wire", gzip.compress(packed, 5), {
+        "content-type": wire.MSGPACK, "accept": wire.MSGPACK, **gzipped,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stops", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--requests", type=int, default=100, help="requests per format; p99 needs ≥ 100")
+    args = parser.parse_args()
+
+    print(f"{'stops':>6} {'format':>22} {'request B':>10} {'response B':>11} {'p50 ms':>8} {'p99 ms':>8}")
+    for n in args.stops:
+        request = _request(n)
+        client = TestClient(_app(_payload(OptimizeRequest.model_validate(request))))
+        for label, path, content, headers in _cases(request):
+            # httpx would inflate the response itself; count the bytes as sent
+            headers = {"accept-encoding": "identity", **headers}
+            latencies = []
+            for _ in range(args.requests):
+                t0 = time.perf_counter()
+                response = client.post(path, content=content, headers=headers)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                assert response.status_code == 200, response.text[:200]
+            size = int(response.headers.get("content-length", len(response.content)))
+            p99 = statistics.quantiles(latencies, n=100)[98]
+            print(
+                f"{n:>6} {label:>22} {len(content):>10} {size:>11} "
+                f"{statistics.median(latencies):>8.1f} {p99:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
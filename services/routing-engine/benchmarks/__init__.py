@@ -0,0 +1 @@
+"""Routing engine benchmarks."""
@@ -0,0 +1,66 @@
+"""
+OmniRoute AI — Decomposition Benchmark
+
+Solves the same capacitated instance monolithically (guided local
+search over the dense matrix, as select_solver did for every large
+problem) and with DecompositionSolver. Reports wall time, total route
+length and the decomposition's gap to the monolithic solve.
+
+Sub-solves run on time budgets, so wall time is about
+(clusters / workers + 2 border rounds) × budget plus process start-up;
+with fewer cores than workers each sub-solve just gets less CPU.
+
+Usage (from services/routing-engine):
+    python -m benchmarks.bench_decomposition
+    python -m benchmarks.bench_decomposition --sizes 2000 --vehicles 20 --workers 8
+"""
+
+import argparse
+import time
+
+from benchmarks.bench_distance import _random_stops
+from benchmarks.bench_warm_start import _route_km
+from engine.classical_solver import ClassicalSolver
+from engine.decomposition import DEFAULT_CLUSTER_SIZE, DecompositionSolver
+from engine.models import RoutingProblem, VehicleSpec
+
+
+def _problem(n: int, vehicles: int) -> RoutingProblem:
+    stops = [s.model_copy(update={"demand_kg": 10 if i else 0}) for i, s in enumerate(_random_stops(n))]
+    capacity = -(-10 * (n - 1) // vehicles) + 50
+    return RoutingProblem(
+        stops=stops,
+        vehicles=[VehicleSpec(id=f"v{i}", capacity_kg=capacity, max_distance_km=5000) for i in range(vehicles)],
+    )
+
+
+def _timed(solver, problem: RoutingProblem) -> tuple[float, float]:
+    t0 = time.perf_counter()
+    result = solver.solve_sync(problem)
+    wall = time.perf_counter() - t0
+    assert result.success, result.error
+    assert sum(len(r) - 1 for r in result.routes) == problem.stop_count - 1, "stops lost"
+    return wall, _route_km(problem, result.routes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2000])
+    parser.add_argument("--vehicles", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=None, help="cluster solves in parallel (default: CPU count)")
+    parser.add_argument("--cluster-size", type=int, default=DEFAULT_CLUSTER_SIZE)
+    args = parser.parse_args()
+
+    print(f"{'stops':>7} {'mode':>14} {'seconds':>8} {'km':>9} {'gap':>7}")
+    for n in args.sizes:
+        problem = _problem(n, args.vehicles)
+        mono_s, mono_km = _timed(ClassicalSolver(strategy="guided_local_search"), problem)
+        print(f"{n:>7} {'monolithic':>14} {mono_s:>8.2f} {mono_km:>9.1f}")
+
+        solver = DecompositionSolver(cluster_size=args.cluster_size, workers=args.workers)
+        deco_s, deco_km = _timed(solver, problem)
+        print(f"{n:>7} {'decomposition':>14} {deco_s:>8.2f} {deco_km:>9.1f} {(deco_km / mono_km - 1) * 100:>+6.2f}%")
+
+
+if __name__ == "__main__":
+    main()
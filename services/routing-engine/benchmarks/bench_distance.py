@@ -0,0 +1,84 @@
+"""
+OmniRoute AI — Distance Matrix Benchmark
+
+Compares the original pure-Python double loop against the
+vectorized NumPy builder at 100 / 1k / 5k stops.
+
+Usage (from services/routing-engine):
+    python -m benchmarks.bench_distance
+    python -m benchmarks.bench_distance --sizes 100 1000 --repeat 5
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from engine.distance import (
+    build_distance_matrix_array,
+    configure_matrix_cache,
+    configure_matrix_store,
+    haversine,
+)
+from engine.models import Stop
+
+
+def _random_stops(n: int, seed: int = 42) -> list[Stop]:
+    """Uniform stops in a ~50 km box around Bengaluru."""
+    rng = random.Random(seed)
+    return [
+        Stop(id=str(i), lat=12.97 + rng.uniform(-0.25, 0.25), lng=77.59 + rng.uniform(-0.25, 0.25))
+        for i in range(n)
+    ]
+
+
+def _loop_matrix(stops: list[Stop]) -> list[list[int]]:
+    """The pre-NumPy implementation: n² scalar haversine calls."""
+    n = len(stops)
+    matrix = [[0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(n):
+            if i != j:
+                matrix[i][j] = int(haversine(stops[i].lat, stops[i].lng, stops[j].lat, stops[j].lng) * 1000)
+    return matrix
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-loop-above", type=int, default=5000, help="skip the slow loop above this size")
+    args = parser.parse_args()
+
+    # Time cold builds: repeats must not be served by the matrix caches
+    configure_matrix_cache(None)
+    configure_matrix_store(None)
+
+    print(f"{'stops':>7} {'loop ms':>12} {'numpy ms':>10} {'speedup':>9} {'max |Δ| m':>10}")
+    for n in args.sizes:
+        stops = _random_stops(n)
+        numpy_ms = _best_of(lambda: build_distance_matrix_array(stops), args.repeat)
+
+        if n > args.skip_loop_above:
+            print(f"{n:>7} {'skipped':>12} {numpy_ms:>10.1f} {'-':>9} {'-':>10}")
+            continue
+
+        t0 = time.perf_counter()
+        reference = _loop_matrix(stops)
+        loop_ms = (time.perf_counter() - t0) * 1000
+        max_diff = int(np.abs(np.asarray(reference) - build_distance_matrix_array(stops)).max())
+        print(f"{n:>7} {loop_ms:>12.1f} {numpy_ms:>10.1f} {loop_ms / numpy_ms:>8.1f}x {max_diff:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+OmniRoute AI — Fast Solver Benchmark
+
+Solves each instance with FastSolver (savings + 2-opt/Or-opt in NumPy)
+and with OR-Tools' first solution strategy, the rule-based choice below
+50 stops. Reports wall-clock time and FastSolver's objective gap to
+OR-Tools; the selector sends problems under FAST_MAX_STOPS to the fast
+path.
+
+Usage (from services/routing-engine):
+    python -m benchmarks.bench_fast
+    python -m benchmarks.bench_fast --sizes 10 20 30 50 --vehicles 2 --repeat 20
+"""
+
+import argparse
+import time
+
+from benchmarks.bench_decomposition import _problem
+from engine.classical_solver import ClassicalSolver
+from engine.fast_solver import FastSolver
+
+
+def _best_ms(solver, problem, repeat: int):
+    """Fastest of `repeat` solves, and the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = solver.solve_sync(problem)
+        best = min(best, (time.perf_counter() - t0) * 1000)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 20, 30, 50, 100])
+    parser.add_argument("--vehicles", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=10, help="solves per instance; the fastest counts")
+    args = parser.parse_args()
+
+    print(f"{'stops':>7} {'fast ms':>9} {'or-tools ms':>12} {'speedup':>8} {'fast obj':>10} {'or-tools obj':>13} {'gap':>7}")
+    for n in args.sizes:
+        problem = _problem(n, args.vehicles)
+        fast_ms, fast = _best_ms(FastSolver(), problem, args.repeat)
+        ortools_ms, ortools = _best_ms(ClassicalSolver(strategy="first_solution"), problem, args.repeat)
+        if not (fast.success and ortools.success):
+            print(f"{n:>7} {'failed':>9} {fast.error or ortools.error}")
+            continue
+        gap = (fast.metrics.objective / ortools.metrics.objective - 1) * 100
+        print(
+            f"{n:>7} {fast_ms:>9.1f} {ortools_ms:>12.1f} {ortools_ms / fast_ms:>7.1f}x "
+            f"{fast.metrics.objective:>10} {ortools.metrics.objective:>13} {gap:>+6.2f}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+OmniRoute AI — Live Insertion Benchmark
+
+Solves a base plan, adds a few new stops, and answers the edited
+problem twice: by InsertionSolver (the plan kept, new stops inserted)
+and by the full re-solve the API escalates to (the selector's solver,
+warm-started from the plan).
+
+Reports the latency of each (insertion: median over --repeat runs),
+the resulting distance, and how much longer the inserted plan is than
+the re-solved one.
+
+Usage (from services/routing-engine):
+    python -m benchmarks.bench_insertion
+    python -m benchmarks.bench_insertion --sizes 50 500 2000 --new 1 5 --slo-ms 5000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks.bench_distance import _random_stops
+from engine.insertion import InsertionSolver
+from engine.models import RoutingProblem, Stop, VehicleSpec
+from engine.selector import select_solver
+
+
+def _problem(stops: list[Stop], vehicles: int) -> RoutingProblem:
+    capacity = -(-10 * len(stops) // vehicles) + 50
+    return RoutingProblem(
+        stops=stops,
+        vehicles=[VehicleSpec(id=f"v{i}", capacity_kg=capacity, max_distance_km=5000) for i in range(vehicles)],
+    )
+
+
+def _added(stops: list[Stop], count: int, seed: int = 11) -> list[Stop]:
+    """The stops plus `count` new ones in the same area."""
+    rng = random.Random(seed)
+    return stops + [
+        Stop(id=f"new{i}", lat=12.97 + rng.uniform(-0.25, 0.25), lng=77.59 + rng.uniform(-0.25, 0.25), demand_kg=10)
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--new", type=int, nargs="+", default=[1, 3], help="stops added to the plan")
+    parser.add_argument("--vehicles", type=int, default=3)
+    parser.add_argument("--slo-ms", type=int, default=3000, help="latency target of the base and re-solves")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    insertion = InsertionSolver(max_added_ratio=float("inf"))
+    print(f"{'stops':>7} {'new':>4} {'insert ms':>10} {'re-solve ms':>12} {'insert km':>10} {'re-solve km':>12} {'gap':>7}")
+    for n in args.sizes:
+        stops = [s.model_copy(update={"demand_kg": 10 if i else 0}) for i, s in enumerate(_random_stops(n))]
+        base = _problem(stops, args.vehicles)
+        planned = select_solver(base, args.slo_ms).solve_sync(base)
+        assert planned.success, planned.error
+        plan = [[o.stop_id for o in route] for route in planned.routes]
+
+        for count in args.new:
+            edited = _problem(_added(stops, count), args.vehicles).model_copy(update={"initial_routes": plan})
+            times = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                inserted = insertion.solve_sync(edited)
+                times.append((time.perf_counter() - t0) * 1000)
+            assert inserted.success, inserted.error
+
+            t0 = time.perf_counter()
+            resolved = select_solver(edited, args.slo_ms).solve_sync(edited)
+            resolve_ms = (time.perf_counter() - t0) * 1000
+            assert resolved.success, resolved.error
+
+            insert_km, resolve_km = inserted.metrics.total_distance_km, resolved.metrics.total_distance_km
+            print(
+                f"{n:>7} {count:>4} {statistics.median(times):>10.1f} {resolve_ms:>12.0f} "
+                f"{insert_km:>10.1f} {resolve_km:>12.1f} {(insert_km / resolve_km - 1) * 100:>+6.2f}%"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+OmniRoute AI — Portfolio Benchmark
+
+Solves each instance with every portfolio configuration on its own,
+then with PortfolioSolver racing them under the same budget. Reports
+each configuration's objective and gap to the default guided local
+search (the first configuration), and which one the portfolio kept.
+
+With fewer cores than --workers the raced configurations share CPU
+and each searches less than it would alone.
+
+Usage (from services/routing-engine):
+    python -m benchmarks.bench_portfolio
+    python -m benchmarks.bench_portfolio --sizes 200 500 --workers 4 --seconds 10
+"""
+
+import argparse
+import time
+
+from benchmarks.bench_decomposition import _problem
+from engine.portfolio import DEFAULT_CONFIGS, PortfolioSolver
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 300])
+    parser.add_argument("--vehicles", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None, help="configurations raced (default: CPU count)")
+    parser.add_argument("--seconds", type=float, default=5, help="budget of every search")
+    args = parser.parse_args()
+
+    portfolio = PortfolioSolver(workers=args.workers, time_limit_s=args.seconds)
+    print(f"{'stops':>7} {'configuration':>50} {'seconds':>8} {'objective':>10} {'gap':>7}")
+    for n in args.sizes:
+        problem = _problem(n, args.vehicles)
+        baseline = None
+        for member in PortfolioSolver(DEFAULT_CONFIGS, len(DEFAULT_CONFIGS), args.seconds).members():
+            t0 = time.perf_counter()
+            result = member.solve_sync(problem)
+            seconds = time.perf_counter() - t0
+            if not result.success:
+                print(f"{n:>7} {member.strategy:>50} {seconds:>8.2f} {'failed':>10}")
+                continue
+            objective = result.metrics.objective
+            baseline = baseline or objective
+            print(f"{n:>7} {member.strategy:>50} {seconds:>8.2f} {objective:>10} {(objective / baseline - 1) * 100:>+6.2f}%")
+
+        t0 = time.perf_counter()
+        result = portfolio.solve_sync(problem)
+        seconds = time.perf_counter() - t0
+        assert result.success, result.error
+        objective = result.metrics.objective
+        print(f"{n:>7} {result.metrics.strategy:>50} {seconds:>8.2f} {objective:>10} {(objective / baseline - 1) * 100:>+6.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+OmniRoute AI — QUBO Solver Benchmark
+
+Solves small capacitated instances with QuantumSolver (QUBO sampled by
+simulated annealing and by parallel tempering, engine/annealing.py)
+over several seeds, and once with ClassicalSolver's guided local
+search as the reference. Reports, per sampler: the share of seeds that
+found a feasible plan, the median solve time and the mean objective
+gap to OR-Tools.
+
+Usage (from services/routing-engine):
+    python -m benchmarks.bench_qubo
+    python -m benchmarks.bench_qubo --sizes 6 8 10 12 --vehicles 2 --seeds 5 --sweeps 500 --replicas 64
+"""
+
+import argparse
+import math
+import statistics
+import time
+
+from benchmarks.bench_suite import generate
+from engine.classical_solver import ClassicalSolver
+from engine.models import RoutingProblem, VehicleSpec
+from engine.quantum_solver import SAMPLERS, QuantumSolver
+
+
+def _problem(n: int, vehicles: int) -> RoutingProblem:
+    """The suite's uniform CVRP instance with `vehicles` vehicles, capacity 85 % used."""
+    problem = generate("uniform", "cvrp", n)
+    capacity = math.ceil(sum(s.demand_kg for s in problem.stops) / vehicles / 0.85)
+    return problem.model_copy(update={
+        "vehicles": [VehicleSpec(id=f"v{i}", capacity_kg=capacity, max_distance_km=5000) for i in range(vehicles)],
+    })
+
+
+def _timed(solver, problem: RoutingProblem):
+    t0 = time.perf_counter()
+    result = solver.solve_sync(problem)
+    return (time.perf_counter() - t0) * 1000, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[6, 8, 10, 12])
+    parser.add_argument("--vehicles", type=int, default=2)
+    parser.add_argument("--seeds", type=int, default=5, help="sampler runs per instance")
+    parser.add_argument("--replicas", type=int, default=32)
+    parser.add_argument("--sweeps", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'stops':>6} {'sampler':>10} {'feasible':>9} {'median ms':>10} {'or-tools ms':>12} {'mean gap':>9}")
+    for n in args.sizes:
+        problem = _problem(n, args.vehicles)
+        ortools_ms, reference = _timed(ClassicalSolver(strategy="guided_local_search", time_limit_s=1), problem)
+        if not reference.success:
+            print(f"{n:>6} {'or-tools':>10} failed: {reference.error}")
+            continue
+        for method in SAMPLERS:
+            times, gaps = [], []
+            for seed in range(args.seeds):
+                solver = QuantumSolver(method, replicas=args.replicas, sweeps=args.sweeps, seed=seed)
+                ms, result = _timed(solver, problem)
+                times.append(ms)
+                if result.success:
+                    gaps.append((result.metrics.objective / reference.metrics.objective - 1) * 100)
+            gap = f"{statistics.mean(gaps):>+8.2f}%" if gaps else f"{'—':>9}"
+            print(
+                f"{n:>6} {method:>10} {len(gaps):>4}/{args.seeds:<4} {statistics.median(times):>10.0f} "
+                f"{ortools_ms:>12.0f} {gap}"
+            )
+
+
+if __name__ == "__main__":
+    main()
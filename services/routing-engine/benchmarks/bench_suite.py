@@ -0,0 +1,325 @@
+"""
+OmniRoute AI — Benchmark Suite
+
+Latency and quality regression tracking for the routing engine.
+Deterministic synthetic instances: three layouts around a Bengaluru
+depot (uniform in a 50 km box, clustered, on a ring around the depot),
+as CVRP or VRPTW, at 10/50/200/1000/5000 stops. Every registered
+solver runs each instance it is meant for, in a fresh process, and
+records matrix time, solve time, peak RSS (of that process: sub-solves
+a decomposition runs in a pool of its own are not counted) and
+objective.
+
+    run      solve the instances and write the results as JSON
+    compare  diff two result files; exits 1 on a regression
+
+A result is a regression when it fails where the baseline solved, its
+objective is worse by more than --objective-tolerance, or its solve
+time or peak RSS grew by more than --time-tolerance / --rss-tolerance
+(and by more than --min-time-ms, so millisecond jitter never counts).
+Results over the PRD latency targets (10 stops < 2 s, 50 stops < 10 s)
+are flagged in both commands.
+
+Usage (from services/routing-engine):
+    python -m benchmarks.bench_suite run --out baseline.json
+    python -m benchmarks.bench_suite run --sizes 10 50 200 --solvers fast selector --out current.json
+    python -m benchmarks.bench_suite compare baseline.json current.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from datetime import UTC, datetime
+from multiprocessing import get_context
+from typing import NamedTuple
+
+import numpy as np
+
+from engine.models import RoutingProblem, Stop, VehicleSpec
+
+DEPOT = (12.97, 77.59)
+SIZES = [10, 50, 200, 1000, 5000]
+SHAPES = ["uniform", "clustered", "ring"]
+KINDS = ["cvrp", "vrptw"]
+
+# PRD acceptance criteria: stops → max solve milliseconds
+PRD_TARGETS_MS = {10: 2_000, 50: 10_000}
+
+_KM_PER_DEGREE = 111.0
+
+
+# ── Instances ──
+
+def _seed(shape: str, kind: str, n: int) -> int:
+    """Stable across runs and machines (unlike hash())."""
+    return SHAPES.index(shape) * 1_000_003 + KINDS.index(kind) * 100_003 + n
+
+
+def _coordinates(shape: str, n: int, rng: np.random.Generator) -> np.ndarray:
+    """(n - 1, 2) km offsets from the depot."""
+    if shape == "uniform":
+        return rng.uniform(-25, 25, size=(n - 1, 2))
+    if shape == "clustered":
+        centres = rng.uniform(-20, 20, size=(max(3, n // 50), 2))
+        return centres[rng.integers(len(centres), size=n - 1)] + rng.normal(0, 1.5, size=(n - 1, 2))
+    if shape == "ring":
+        angle = rng.uniform(0, 2 * math.pi, size=n - 1)
+        radius = rng.uniform(15, 20, size=n - 1)
+        return np.column_stack((radius * np.cos(angle), radius * np.sin(angle)))
+    raise ValueError(f"Unknown shape: {shape}")
+
+
+def generate(shape: str, kind: str, n: int) -> RoutingProblem:
+    """The deterministic instance for (shape, kind, n): depot first, demands 1–20 kg."""
+    rng = np.random.default_rng(_seed(shape, kind, n))
+    offsets = _coordinates(shape, n, rng)
+    lats = DEPOT[0] + offsets[:, 0] / _KM_PER_DEGREE
+    lngs = DEPOT[1] + offsets[:, 1] / (_KM_PER_DEGREE * math.cos(math.radians(DEPOT[0])))
+    demands = rng.integers(1, 21, size=n - 1)
+
+    stops = [Stop(id="0", lat=DEPOT[0], lng=DEPOT[1])]
+    for i in range(n - 1):
+        stop = Stop(id=str(i + 1), lat=float(lats[i]), lng=float(lngs[i]), demand_kg=float(demands[i]))
+        if kind == "vrptw":
+            opens = int(rng.integers(8, 15))  # four-hour windows opening 08:00–14:00
+            stop.time_window_start, stop.time_window_end = f"{opens:02d}:00", f"{opens + 4:02d}:00"
+            stop.service_time_min = 5
+        stops.append(stop)
+    if kind == "vrptw":
+        stops[0].time_window_start, stops[0].time_window_end = "07:00", "21:00"
+
+    # ~25 stops per vehicle (15 with windows), loaded to about 85 %
+    vehicles = max(1, (n - 1) // (15 if kind == "vrptw" else 25))
+    capacity = math.ceil(int(demands.sum()) / vehicles / 0.85)
+    return RoutingProblem(
+        stops=stops,
+        vehicles=[VehicleSpec(id=f"v{i}", capacity_kg=capacity, max_distance_km=5000) for i in range(vehicles)],
+    )
+
+
+# ── Solvers ──
+
+class Entry(NamedTuple):
+    build: Callable[[], object] | None  # None: select_solver's pick for the instance
+    min_stops: int
+    max_stops: int
+    windows: bool  # also runs VRPTW instances
+
+
+def _fast():
+    from engine.fast_solver import FastSolver
+
+    return FastSolver()
+
+
+def _classical(**kwargs):
+    def build():
+        from engine.classical_solver import ClassicalSolver
+
+        return ClassicalSolver(**kwargs)
+
+    return build
+
+
+def _decomposition():
+    from engine.decomposition import DecompositionSolver
+
+    return DecompositionSolver()
+
+
+def _qubo():
+    from engine.quantum_solver import QuantumSolver
+
+    return QuantumSolver(seed=0)
+
+
+# Name → what it runs on. "selector" is whatever select_solver picks, the production path
+SOLVERS: dict[str, Entry] = {
+    "fast": Entry(_fast, 10, 1000, True),
+    "first_solution": Entry(_classical(strategy="first_solution"), 10, 1000, True),
+    "guided_local_search": Entry(_classical(strategy="guided_local_search"), 10, 1000, True),
+    "sparse": Entry(_classical(strategy="first_solution", sparse_k=20, time_limit_s=30), 1000, 5000, False),
+    "decomposition": Entry(_decomposition, 1000, 5000, False),
+    "qubo": Entry(_qubo, 10, 10, False),  # the QUBO encoding takes at most 16 stops
+    "selector": Entry(None, 10, 5000, False),
+}
+
+
+def _build(name: str, problem: RoutingProblem):
+    if name == "selector":
+        from engine.selector import select_solver
+
+        return select_solver(problem)
+    return SOLVERS[name].build()
+
+
+def _runs(name: str, kind: str, n: int) -> bool:
+    entry = SOLVERS[name]
+    if name == "selector" and kind == "vrptw":
+        return n <= 1000  # windows keep large problems monolithic: minutes per instance
+    return entry.min_stops <= n <= entry.max_stops and (entry.windows or kind == "cvrp")
+
+
+def _run_case(shape: str, kind: str, n: int, name: str) -> dict:
+    """Solve one instance in this (fresh) process; peak RSS is the process's."""
+    problem = generate(shape, kind, n)
+    solver = _build(name, problem)
+    t0 = time.perf_counter()
+    result = solver.solve_sync(problem)
+    solve_ms = int((time.perf_counter() - t0) * 1000)
+    metrics = result.metrics
+    return {
+        "case": f"{shape}/{kind}/{n}",
+        "solver": name,
+        "strategy": metrics.strategy if metrics else None,
+        "success": result.success,
+        "error": result.error,
+        "matrix_ms": metrics.phases_ms.get("matrix") if metrics else None,
+        "solve_ms": solve_ms,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "objective": metrics.objective if metrics else None,
+        "total_distance_km": metrics.total_distance_km if metrics else None,
+    }
+
+
+def _quality(result: dict) -> str:
+    """The objective, or route length for solvers without one (decomposition)."""
+    if result["objective"] is not None:
+        return str(result["objective"])
+    return f"{result['total_distance_km']} km"
+
+
+def _prd_miss(result: dict) -> bool:
+    target = PRD_TARGETS_MS.get(int(result["case"].rsplit("/", 1)[1]))
+    return target is not None and result["solve_ms"] > target
+
+
+def _meta() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        import ortools
+
+        ortools_version = ortools.__version__
+    except ImportError:
+        ortools_version = None
+    return {
+        "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "ortools": ortools_version,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run(args) -> None:
+    cases = [
+        (shape, kind, n, name)
+        for n in args.sizes
+        for shape in args.shapes
+        for kind in args.kinds
+        for name in args.solvers
+        if _runs(name, kind, n)
+    ]
+    results = []
+    print(f"{'case':>22} {'solver':>20} {'matrix ms':>10} {'solve ms':>9} {'rss MB':>7} {'objective':>12}")
+    # One process per case: peak RSS is that solve's, and nothing stays warm between solvers
+    with ProcessPoolExecutor(1, mp_context=get_context("spawn"), max_tasks_per_child=1) as pool:
+        for case in cases:
+            result = pool.submit(_run_case, *case).result()
+            results.append(result)
+            outcome = _quality(result) if result["success"] else f"failed: {result['error']}"
+            flag = "  over PRD target" if _prd_miss(result) else ""
+            print(
+                f"{result['case']:>22} {result['solver']:>20} {result['matrix_ms'] or 0:>10} "
+                f"{result['solve_ms']:>9} {result['peak_rss_mb']:>7} {outcome:>12}{flag}"
+            )
+
+    with open(args.out, "w") as f:
+        json.dump({"meta": _meta(), "results": results}, f, indent=1)
+    print(f"{len(results)} results written to {args.out}")
+
+
+def _regressions(old: dict, new: dict, args) -> list[str]:
+    if old["success"] and not new["success"]:
+        return [f"now fails: {new['error']}"]
+    if not (old["success"] and new["success"]):
+        return []
+    found = []
+    key = "objective" if old["objective"] is not None and new["objective"] is not None else "total_distance_km"
+    if old[key] and new[key] > old[key] * (1 + args.objective_tolerance):
+        found.append(f"{key} {old[key]} → {new[key]} ({new[key] / old[key] - 1:+.1%})")
+    grown = new["solve_ms"] - old["solve_ms"]
+    if grown > args.min_time_ms and new["solve_ms"] > old["solve_ms"] * (1 + args.time_tolerance):
+        found.append(f"solve {old['solve_ms']} → {new['solve_ms']} ms")
+    if new["peak_rss_mb"] > old["peak_rss_mb"] * (1 + args.rss_tolerance):
+        found.append(f"peak RSS {old['peak_rss_mb']} → {new['peak_rss_mb']} MB")
+    return found
+
+
+def compare(args) -> int:
+    with open(args.baseline) as f:
+        baseline = {(r["case"], r["solver"]): r for r in json.load(f)["results"]}
+    with open(args.current) as f:
+        current = json.load(f)["results"]
+
+    regressions = 0
+    print(f"{'case':>22} {'solver':>20} {'solve ms':>17} {'objective':>25}  verdict")
+    for new in current:
+        old = baseline.get((new["case"], new["solver"]))
+        if old is None:
+            continue
+        found = _regressions(old, new, args)
+        if _prd_miss(new):
+            found.append("over PRD target")
+        regressions += bool(found)
+        solve = f"{old['solve_ms']} → {new['solve_ms']}"
+        objective = f"{_quality(old)} → {_quality(new)}"
+        print(f"{new['case']:>22} {new['solver']:>20} {solve:>17} {objective:>25}  {'; '.join(found) or 'ok'}")
+
+    compared = sum((r["case"], r["solver"]) in baseline for r in current)
+    print(f"{regressions} regressions in {compared} compared results")
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="solve the instances, write results JSON")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    run_parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=SHAPES)
+    run_parser.add_argument("--kinds", nargs="+", choices=KINDS, default=KINDS)
+    run_parser.add_argument("--solvers", nargs="+", choices=list(SOLVERS), default=list(SOLVERS))
+    run_parser.add_argument("--out", default="bench-results.json")
+
+    compare_parser = commands.add_parser("compare", help="diff two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--objective-tolerance", type=float, default=0.01)
+    compare_parser.add_argument("--time-tolerance", type=float, default=0.25)
+    compare_parser.add_argument("--min-time-ms", type=int, default=100)
+    compare_parser.add_argument("--rss-tolerance", type=float, default=0.2)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
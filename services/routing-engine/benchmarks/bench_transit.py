@@ -0,0 +1,87 @@
+"""
+OmniRoute AI — Transit Registration Benchmark
+
+Runs the same guided-local-search solve twice per instance: once with
+the distance matrix and demand vector behind Python callbacks (the
+pre-native registration), once registered natively with
+RegisterTransitMatrix / RegisterUnaryTransitVector. Reports accepted
+local-search neighbours (search iterations) and branches per second
+over a fixed time budget, plus the final cost.
+
+Usage (from services/routing-engine):
+    python -m benchmarks.bench_transit
+    python -m benchmarks.bench_transit --sizes 200 1000 --seconds 10
+"""
+
+import argparse
+import time
+
+from ortools.constraint_solver import pywrapcp, routing_enums_pb2
+
+from benchmarks.bench_distance import _random_stops
+from engine.distance import build_distance_matrix_array
+
+
+def _build(matrix: list[list[int]], demands: list[int], vehicles: int, capacity: int, native: bool):
+    manager = pywrapcp.RoutingIndexManager(len(matrix), vehicles, 0)
+    routing = pywrapcp.RoutingModel(manager)
+
+    if native:
+        transit_id = routing.RegisterTransitMatrix(matrix)
+        demand_id = routing.RegisterUnaryTransitVector(demands)
+    else:
+        def distance_callback(from_idx, to_idx):
+            return matrix[manager.IndexToNode(from_idx)][manager.IndexToNode(to_idx)]
+
+        def demand_callback(from_idx):
+            return demands[manager.IndexToNode(from_idx)]
+
+        transit_id = routing.RegisterTransitCallback(distance_callback)
+        demand_id = routing.RegisterUnaryTransitCallback(demand_callback)
+
+    routing.SetArcCostEvaluatorOfAllVehicles(transit_id)
+    routing.AddDimensionWithVehicleCapacity(demand_id, 0, [capacity] * vehicles, True, "Capacity")
+    routing.AddDimension(transit_id, 0, 10_000_000, True, "Distance")
+    return routing
+
+
+def _run(matrix, demands, vehicles, capacity, native: bool, seconds: int) -> tuple[float, float, int]:
+    """Solve once; returns (accepted neighbours/s, branches/s, objective)."""
+    routing = _build(matrix, demands, vehicles, capacity, native)
+
+    params = pywrapcp.DefaultRoutingSearchParameters()
+    params.first_solution_strategy = routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+    params.local_search_metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+    params.time_limit.FromSeconds(seconds)
+
+    t0 = time.perf_counter()
+    solution = routing.SolveWithParameters(params)
+    wall = time.perf_counter() - t0
+    solver = routing.solver()
+    cost = solution.ObjectiveValue() if solution else -1
+    return solver.AcceptedNeighbors() / wall, solver.Branches() / wall, cost
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 1000])
+    parser.add_argument("--seconds", type=int, default=10, help="GLS time limit per run")
+    parser.add_argument("--vehicles", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'stops':>7} {'mode':>9} {'iters/s':>10} {'branches/s':>11} {'cost m':>10}")
+    for n in args.sizes:
+        matrix = build_distance_matrix_array(_random_stops(n)).tolist()
+        demands = [0] + [10] * (n - 1)
+        capacity = -(-10 * (n - 1) // args.vehicles) + 10
+
+        rates = {}
+        for mode, native in (("callback", False), ("native", True)):
+            rate, branch_rate, cost = _run(matrix, demands, args.vehicles, capacity, native, args.seconds)
+            rates[mode] = rate
+            print(f"{n:>7} {mode:>9} {rate:>10.0f} {branch_rate:>11.0f} {cost:>10}")
+        print(f"{n:>7} {'speedup':>9} {rates['native'] / max(rates['callback'], 1):>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+OmniRoute AI — Warm Start Benchmark
+
+Solves a base plan, then applies a small edit (removes and adds a
+few stops) and re-solves the edited problem twice: cold, from
+scratch, and warm, from the base plan repaired by cheapest insertion.
+
+Both runs get the same guided local search budget, so the comparison
+is time-to-quality rather than two different time limits: for each
+run it reports when the search first reached the cold run's final
+distance ("reach"), next to the final distance and the warm/cold gap.
+
+Usage (from services/routing-engine):
+    python -m benchmarks.bench_warm_start
+    python -m benchmarks.bench_warm_start --sizes 100 300 --edit 2
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.bench_distance import _random_stops
+from engine.classical_solver import ClassicalSolver
+from engine.distance import haversine
+from engine.models import RoutingProblem, Stop, VehicleSpec
+
+
+def _problem(stops: list[Stop], vehicles: int) -> RoutingProblem:
+    capacity = -(-10 * (len(stops) - 1) // vehicles) + 20
+    return RoutingProblem(
+        stops=stops,
+        vehicles=[VehicleSpec(id=f"v{i}", capacity_kg=capacity, max_distance_km=2000) for i in range(vehicles)],
+    )
+
+
+def _edit(stops: list[Stop], count: int, seed: int = 7) -> list[Stop]:
+    """Drop `count` random non-depot stops and add `count` new ones."""
+    rng = random.Random(seed)
+    dropped = set(rng.sample(range(1, len(stops)), count))
+    kept = [s for i, s in enumerate(stops) if i not in dropped]
+    added = [
+        Stop(id=f"new{i}", lat=12.97 + rng.uniform(-0.25, 0.25), lng=77.59 + rng.uniform(-0.25, 0.25), demand_kg=10)
+        for i in range(count)
+    ]
+    return kept + added
+
+
+def _route_km(problem: RoutingProblem, routes) -> float:
+    """Total length of the routes, depot to depot, measured from the stops."""
+    by_id = {s.id: s for s in problem.stops}
+    depot = problem.stops[problem.depot_index]
+    total = 0.0
+    for route in routes:
+        path = [depot, *(by_id[o.stop_id] for o in route if o.stop_id != depot.id), depot]
+        total += sum(haversine(a.lat, a.lng, b.lat, b.lng) for a, b in zip(path, path[1:]))
+    return total
+
+
+def _timed(solver: ClassicalSolver, problem: RoutingProblem):
+    """Solve, returning (seconds, result, [(seconds, km), ...] for every improvement)."""
+    trace: list[tuple[float, float]] = []
+    t0 = time.perf_counter()
+    result = solver.solve_sync(
+        problem, on_solution=lambda u: trace.append((time.perf_counter() - t0, u.total_distance_km))
+    )
+    assert result.success, result.error
+    return time.perf_counter() - t0, result, trace
+
+
+def _reach(trace: list[tuple[float, float]], target_km: float) -> float | None:
+    """Seconds until the search first found a solution no longer than `target_km`."""
+    return next((seconds for seconds, km in trace if km <= target_km + 1e-6), None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 300])
+    parser.add_argument("--edit", type=int, default=2, help="stops removed and added")
+    parser.add_argument("--vehicles", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=10, help="search budget of both runs")
+    args = parser.parse_args()
+
+    solver = ClassicalSolver(strategy="guided_local_search", time_limit_s=args.seconds)
+    print(f"{'stops':>7} {'mode':>6} {'seconds':>8} {'reach':>7} {'km':>9} {'gap':>7}")
+    for n in args.sizes:
+        stops = [s.model_copy(update={"demand_kg": 10 if i else 0}) for i, s in enumerate(_random_stops(n))]
+        _, base, _ = _timed(solver, _problem(stops, args.vehicles))
+        plan = [[o.stop_id for o in route] for route in base.routes]
+
+        edited = _problem(_edit(stops, args.edit), args.vehicles)
+        cold_s, cold, cold_trace = _timed(solver, edited)
+        warm_s, warm, warm_trace = _timed(solver, edited.model_copy(update={"initial_routes": plan}))
+
+        # The search's own distances, so that both traces share the cold target
+        target = cold_trace[-1][1]
+        cold_km, warm_km = _route_km(edited, cold.routes), _route_km(edited, warm.routes)
+        for mode, seconds, trace, km in (("cold", cold_s, cold_trace, cold_km), ("warm", warm_s, warm_trace, warm_km)):
+            reach = _reach(trace, target)
+            reached = f"{reach:>7.2f}" if reach is not None else f"{'—':>7}"
+            print(f"{n:>7} {mode:>6} {seconds:>8.2f} {reached} {km:>9.1f} {(km / cold_km - 1) * 100:>+6.2f}%")
+
+
+if __name__ == "__main__":
+    main()
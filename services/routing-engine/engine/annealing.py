@@ -0,0 +1,132 @@
+"""
+OmniRoute AI — Simulated Annealing / Parallel Tempering
+
+CPU samplers for a QUBO (engine/qubo.py), the "quantum-inspired"
+stand-in for an annealer. All replicas advance together: a sweep
+visits every variable once, and each visit is one array operation
+over every replica (Metropolis test, flip, local-field update along
+the variable's sparse couplings).
+
+  anneal   independent replicas cooled together from t_hot to t_cold
+  temper   parallel tempering: replicas on a fixed geometric ladder of
+           temperatures, neighbours swapping temperatures after every
+           sweep, so a replica stuck in a valley warms up and escapes
+
+After every sweep `inspect(x, energies)` sees the batch (e.g. to keep
+the best feasible decoding); returning False stops the run.
+"""
+
+import time
+from collections.abc import Callable
+
+import numpy as np
+
+from engine.qubo import QUBO
+
+Inspect = Callable[[np.ndarray, np.ndarray], bool | None]
+
+
+class _Batch:
+    """Replica states, their local fields and energies, stored variable-major (size × replicas)."""
+
+    def __init__(self, qubo: QUBO, x: np.ndarray):
+        self.indptr, self.indices, self.data = qubo.couplings()
+        self.bits = np.ascontiguousarray(x.T, dtype=np.int8)
+        # field[k, r]: energy change of setting x_k from 0 to 1 in replica r (x_k itself excluded)
+        row_of = np.repeat(np.arange(qubo.size), np.diff(self.indptr))
+        terms = self.bits[self.indices] * self.data[:, None]
+        self.field = qubo.diagonal()[:, None] + np.stack(
+            [np.bincount(row_of, weights=t, minlength=qubo.size) for t in terms.T], axis=1
+        )
+        self.energy = qubo.energy(x)
+
+    @property
+    def x(self) -> np.ndarray:
+        """Samples, replicas × size."""
+        return self.bits.T
+
+    def sweep(self, beta: np.ndarray, rng: np.random.Generator) -> None:
+        """One Metropolis visit of every variable, in random order, across all replicas."""
+        bits, field, energy = self.bits, self.field, self.energy
+        size = len(bits)
+        # Metropolis: accept when delta ≤ −ln(u)/β, drawn for the whole sweep at once
+        threshold = -np.log1p(-rng.random((size, bits.shape[1]))) / beta
+        for k in rng.permutation(size):
+            sign = 1 - 2 * bits[k]  # +1 sets the bit, −1 clears it
+            delta = sign * field[k]
+            accept = delta <= threshold[k]
+            if not accept.any():
+                continue
+            step = sign * accept
+            bits[k] += step
+            energy += delta * accept
+            lo, hi = self.indptr[k], self.indptr[k + 1]
+            field[self.indices[lo:hi]] += self.data[lo:hi, None] * step
+
+
+def _initial(qubo: QUBO, replicas: int, start: np.ndarray | None, rng: np.random.Generator) -> np.ndarray:
+    if start is not None:
+        return np.tile(start, (replicas, 1))
+    return (rng.random((replicas, qubo.size)) < 0.1).astype(np.int8)
+
+
+def anneal(
+    qubo: QUBO,
+    replicas: int = 32,
+    sweeps: int = 1000,
+    t_hot: float = 3.0,
+    t_cold: float = 0.01,
+    start: np.ndarray | None = None,
+    seed: int | None = None,
+    deadline: float | None = None,
+    inspect: Inspect | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Simulated annealing, geometric schedule; returns the final (x, energies).
+    `start` seeds every replica (default: sparse random bits); `deadline`
+    is a time.perf_counter() value after which no further sweep starts.
+    """
+    rng = np.random.default_rng(seed)
+    batch = _Batch(qubo, _initial(qubo, replicas, start, rng))
+    for beta in 1 / np.geomspace(t_hot, t_cold, sweeps):
+        batch.sweep(np.full(replicas, beta), rng)
+        if inspect is not None and inspect(batch.x, batch.energy) is False:
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+    return batch.x, batch.energy
+
+
+def temper(
+    qubo: QUBO,
+    replicas: int = 32,
+    sweeps: int = 1000,
+    t_hot: float = 3.0,
+    t_cold: float = 0.01,
+    start: np.ndarray | None = None,
+    seed: int | None = None,
+    deadline: float | None = None,
+    inspect: Inspect | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Parallel tempering over a geometric ladder t_cold…t_hot; same arguments as anneal."""
+    rng = np.random.default_rng(seed)
+    batch = _Batch(qubo, _initial(qubo, replicas, start, rng))
+    ladder = 1 / np.geomspace(t_cold, t_hot, replicas)  # β by rung, coldest first
+    at_rung = np.arange(replicas)                         # replica on each rung
+    beta = np.empty(replicas)
+    for sweep in range(sweeps):
+        beta[at_rung] = ladder
+        batch.sweep(beta, rng)
+
+        # Swap neighbouring rungs (even pairs, then odd): accept w.p. min(1, e^{(β_i − β_j)(E_i − E_j)})
+        first = np.arange(sweep % 2, replicas - 1, 2)
+        a, b = at_rung[first], at_rung[first + 1]
+        log_p = (ladder[first] - ladder[first + 1]) * (batch.energy[a] - batch.energy[b])
+        swap = np.log(rng.random(len(first))) < log_p
+        at_rung[first[swap]], at_rung[first[swap] + 1] = b[swap], a[swap]
+
+        if inspect is not None and inspect(batch.x, batch.energy) is False:
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+    return batch.x, batch.energy
@@ -8,135 +8,133 @@ the same BaseSolver interface later.
 Supports:
   - Basic VRP (shortest path visiting all stops)
   - CVRP (vehicle capacity constraints)
-  - VRPTW (time window constraints)
+  - VRPTW (time window constraints over travel + service time;
+    arcs that can never be on time are pruned up front, see
+    engine/time_windows.py)
+  - Warm starts from a previous plan (problem.initial_routes),
+    repaired for the current stops, see engine/warm_start.py
 """
 
 import time
+from collections.abc import Callable
 
+import numpy as np
 from ortools.constraint_solver import pywrapcp, routing_enums_pb2
 
-from engine.distance import build_distance_matrix, haversine
+from engine.costs import CostBundle
+from engine.distance import haversine, haversine_km_array, stop_coordinates
+from engine.instrumentation import PhaseTimer
 from engine.models import (
+    CostObjective,
     OptimizedStop,
     RoutingProblem,
+    SearchStats,
+    SolutionUpdate,
     SolverMetrics,
     SolverResult,
     SolverType,
 )
+from engine.sparse import build_sparse_costs, nearest_neighbour_tour
+from engine.time_windows import TimeWindows, service_seconds
+from engine.warm_start import WARM_GLS_SECONDS, repair_routes
 
 
 class ClassicalSolver:
     """OR-Tools based classical route optimizer."""
 
-    def __init__(self, strategy: str = "automatic"):
+    def __init__(
+        self,
+        strategy: str = "automatic",
+        sparse_k: int | None = None,
+        time_limit_s: float | None = None,
+        first_solution: str | None = None,
+        metaheuristic: str | None = None,
+    ):
         """
         Args:
             strategy: 'first_solution' for fast results,
                       'guided_local_search' for better quality on large problems.
+            sparse_k: if set, use k-nearest-neighbour candidate arcs (O(n·k))
+                      instead of a dense matrix — for 5k+ stop problems.
+                      Problems with time windows always use the dense model.
+            time_limit_s: search budget; overrides the strategy's default
+                      (guided local search otherwise runs 10 s, or 2 s warm).
+            first_solution: OR-Tools FirstSolutionStrategy name (e.g. 'SAVINGS');
+                      overrides the strategy's choice.
+            metaheuristic: OR-Tools LocalSearchMetaheuristic name (e.g.
+                      'TABU_SEARCH'); overrides the strategy's choice and
+                      runs as long as guided local search would.
         """
         self.strategy = strategy
+        self.sparse_k = sparse_k
+        self.time_limit_s = time_limit_s
+        self.first_solution = first_solution
+        self.metaheuristic = metaheuristic
         self._last_metrics: SolverMetrics | None = None
 
     async def solve(self, problem: RoutingProblem) -> SolverResult:
-        """Solve a routing problem using OR-Tools."""
+        """
+        Solve a routing problem using OR-Tools.
+
+        Runs the search on the calling thread; servers should go through
+        engine.executor.SolverExecutor to keep their event loop free.
+        """
+        return self.solve_sync(problem)
+
+    def uses_dense_costs(self, problem: RoutingProblem) -> bool:
+        """True when the solve needs the full n×n CostBundle."""
+        return not (self.sparse_k and not problem.has_time_windows)
+
+    def solve_sync(
+        self,
+        problem: RoutingProblem,
+        costs: CostBundle | None = None,
+        on_solution: Callable[[SolutionUpdate], bool | None] | None = None,
+    ) -> SolverResult:
+        """
+        Blocking solve. `costs` may carry prebuilt matrices for the dense model.
+
+        `on_solution` is called with every strictly better solution the
+        search finds; returning False from it ends the search early, and
+        the best solution so far is returned.
+        """
         start_time = time.perf_counter()
 
         if problem.stop_count < 2:
             return SolverResult(success=False, error="Need at least 2 stops to optimize")
 
+        timer = PhaseTimer()
+        trace: list[tuple[int, int]] = []
         try:
-            # Build distance matrix
-            distance_matrix = build_distance_matrix(problem.stops)
-
-            num_vehicles = len(problem.vehicles)
-            depot = problem.depot_index
-
-            # Create routing model
-            manager = pywrapcp.RoutingIndexManager(problem.stop_count, num_vehicles, depot)
-            routing = pywrapcp.RoutingModel(manager)
-
-            # Register distance callback
-            def distance_callback(from_idx, to_idx):
-                from_node = manager.IndexToNode(from_idx)
-                to_node = manager.IndexToNode(to_idx)
-                return distance_matrix[from_node][to_node]
-
-            transit_callback_id = routing.RegisterTransitCallback(distance_callback)
-            routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_id)
-
-            # Add capacity constraint if vehicles have capacity
-            if any(v.capacity_kg > 0 for v in problem.vehicles):
-                self._add_capacity_constraint(routing, manager, problem, transit_callback_id)
-
-            # Add distance constraint
-            routing.AddDimension(
-                transit_callback_id,
-                0,  # no slack
-                int(problem.vehicles[0].max_distance_km * 1000),  # max distance in meters
-                True,  # start cumul to zero
-                "Distance",
-            )
-
-            # Set search strategy
-            search_params = pywrapcp.DefaultRoutingSearchParameters()
-            search_params.first_solution_strategy = (
-                routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
-            )
-
-            if self.strategy == "guided_local_search":
-                search_params.local_search_metaheuristic = (
-                    routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
-                )
-                search_params.time_limit.FromSeconds(10)
-
-            # Solve
-            solution = routing.SolveWithParameters(search_params)
-
-            elapsed_ms = int((time.perf_counter() - start_time) * 1000)
+            def watch(routing, manager, arc_m):
+                self._trace_search(routing, trace, start_time)
+                if on_solution is not None:
+                    self._watch_solutions(routing, manager, problem, arc_m, on_solution, start_time)
+
+            if self.uses_dense_costs(problem):
+                routing, manager, solution, travel_s, search_params = self._solve_dense(problem, timer, costs, watch)
+            else:
+                routing, manager, solution, search_params = self._solve_sparse(problem, timer, watch)
+                travel_s = None
+            stats = self._search_stats(routing, search_params, timer, trace)
 
             if not solution:
                 self._last_metrics = SolverMetrics(
                     solver_type=SolverType.classical,
                     strategy=self.strategy,
-                    execution_time_ms=elapsed_ms,
+                    execution_time_ms=int((time.perf_counter() - start_time) * 1000),
                     stops_optimized=0,
+                    phases_ms=timer.phases_ms,
+                    search=stats,
                 )
                 return SolverResult(success=False, error="No solution found. Try relaxing constraints.")
 
-            # Extract solution
-            all_routes = []
-            total_distance_m = 0
-
-            for vehicle_idx in range(num_vehicles):
-                route_stops = []
-                index = routing.Start(vehicle_idx)
-                order = 0
-                prev_lat, prev_lng = problem.stops[depot].lat, problem.stops[depot].lng
-
-                while not routing.IsEnd(index):
-                    node = manager.IndexToNode(index)
-                    stop = problem.stops[node]
-
-                    dist_from_prev = haversine(prev_lat, prev_lng, stop.lat, stop.lng)
-
-                    route_stops.append(OptimizedStop(
-                        stop_id=stop.id,
-                        order=order,
-                        lat=stop.lat,
-                        lng=stop.lng,
-                        distance_from_prev_km=round(dist_from_prev, 2),
-                    ))
-
-                    prev_lat, prev_lng = stop.lat, stop.lng
-                    total_distance_m += solution.Value(routing.NextVar(index))
-                    index = solution.Value(routing.NextVar(index))
-                    order += 1
-
-                if route_stops:
-                    all_routes.append(route_stops)
-
+            with timer.phase("extraction"):
+                all_routes, total_distance_m, total_duration_s = self._extract(
+                    problem, routing, manager, solution, travel_s
+                )
             total_distance_km = round(total_distance_m / 1000, 2)
-            total_duration_min = round(total_distance_km / 40 * 60, 1)  # Estimate at 40 km/h
+            total_duration_min = round(total_duration_s / 60, 1)
 
             # Quality score: ratio of optimized vs naive distance
             quality = min(100.0, round(80 + (20 * (1 - total_distance_km / max(total_distance_km * 1.3, 1))), 1))
@@ -144,11 +142,14 @@ class ClassicalSolver:
             self._last_metrics = SolverMetrics(
                 solver_type=SolverType.classical,
                 strategy=self.strategy,
-                execution_time_ms=elapsed_ms,
+                execution_time_ms=int((time.perf_counter() - start_time) * 1000),
                 total_distance_km=total_distance_km,
                 total_duration_min=total_duration_min,
                 stops_optimized=problem.stop_count,
                 quality_score=quality,
+                objective=solution.ObjectiveValue(),
+                phases_ms=timer.phases_ms,
+                search=stats,
             )
 
             return SolverResult(
@@ -163,17 +164,405 @@ class ClassicalSolver:
                 solver_type=SolverType.classical,
                 strategy=self.strategy,
                 execution_time_ms=elapsed_ms,
+                phases_ms=timer.phases_ms,
             )
             return SolverResult(success=False, error=str(e))
 
-    def _add_capacity_constraint(self, routing, manager, problem, transit_cb_id):
-        """Add vehicle capacity (CVRP) constraints."""
+    def _solve_dense(self, problem, timer, costs=None, watch=None):
+        """Full n×n matrix model."""
+        with timer.phase("matrix"):
+            # Build the cost bundle (one geometry pass; time/fuel derive from it)
+            if costs is None:
+                costs = CostBundle.for_problem(problem)
+            windows = TimeWindows(problem, costs.time_s) if problem.has_time_windows else None
+
+        with timer.phase("model"):
+            manager, routing = self._create_model(problem)
+
+            # Matrices are handed to OR-Tools as native transits, so local
+            # search evaluates arcs without calling back into Python
+            transit_callback_id = self._register_matrix(routing, costs.distance_m)
+            self._set_arc_costs(
+                routing,
+                problem,
+                transit_callback_id,
+                lambda objective, rate: self._register_matrix(routing, costs.layer(objective, rate)),
+            )
+            self._add_constraints(routing, manager, problem, transit_callback_id)
+            if windows is not None:
+                self._add_time_windows(routing, manager, problem, windows)
+            if watch is not None:
+                watch(routing, manager, lambda a, b: int(costs.distance_m[a, b]))
+
+            search_params = self._search_parameters(problem)
+            seed = None
+            if problem.initial_routes:
+                seed = self._warm_start(routing, problem, search_params, lambda a, b: costs.distance_m[a, b], windows)
+                if seed is None:
+                    search_params = self._search_parameters(problem, warm=False)  # seed rejected: a full cold search
+
+        with timer.phase("search"):
+            if seed is not None:
+                solution = routing.SolveFromAssignmentWithParameters(seed, search_params)
+            else:
+                solution = routing.SolveWithParameters(search_params)
+        return routing, manager, solution, costs.time_s, search_params
+
+    def _solve_sparse(self, problem, timer, watch=None):
+        """
+        Candidate-arc model: each node may only be followed by its k nearest
+        neighbours, the depot, or its successor in a greedy seed tour. The
+        seed, cut into routes that respect capacity and max distance, is
+        handed to OR-Tools as the first solution, so the restricted model
+        is feasible without a search over the full n² arcs. A warm start
+        replaces the greedy seed with the repaired previous plan. If the
+        seed still breaks a constraint (too few vehicles to split it), the
+        search builds its own first solution over the candidate arcs.
+        """
+        with timer.phase("matrix"):
+            lats, lngs = stop_coordinates(problem.columns)
+            sparse = build_sparse_costs(lats, lngs, self.sparse_k, problem.depot_index, problem.avg_speed_kmh)
+
+        with timer.phase("model"):
+            if problem.initial_routes:
+                seed_routes = repair_routes(
+                    problem,
+                    problem.initial_routes,
+                    lambda a, b: haversine_km_array(lats[a], lngs[a], lats[b], lngs[b]) * 1000,
+                )
+            else:
+                tour = nearest_neighbour_tour(sparse, lats, lngs, problem.depot_index)
+                seed_routes = self._split_tour(problem, tour, lats, lngs)
 
-        def demand_callback(from_idx):
-            node = manager.IndexToNode(from_idx)
-            return int(problem.stops[node].demand_kg)
+            manager, routing = self._create_model(problem)
+            transit_callback_id = self._register_sparse(
+                routing, manager, sparse, CostObjective.distance, 0.0, lats, lngs
+            )
+            self._set_arc_costs(
+                routing,
+                problem,
+                transit_callback_id,
+                lambda objective, rate: self._register_sparse(routing, manager, sparse, objective, rate, lats, lngs),
+            )
+            self._add_constraints(routing, manager, problem, transit_callback_id)
+            self._restrict_to_candidates(routing, manager, problem, sparse, seed_routes)
+            if watch is not None:
+                watch(routing, manager, lambda a, b: int(haversine(lats[a], lngs[a], lats[b], lngs[b]) * 1000))
+
+            search_params = self._search_parameters(problem)
+            routing.CloseModelWithParameters(search_params)
+            seed = routing.ReadAssignmentFromRoutes(seed_routes, True)
+            if seed is None:
+                search_params = self._search_parameters(problem, warm=False)
+
+        with timer.phase("search"):
+            if seed is None:
+                solution = routing.SolveWithParameters(search_params)
+            else:
+                solution = routing.SolveFromAssignmentWithParameters(seed, search_params)
+        return routing, manager, solution, search_params
+
+    def _warm_start(self, routing, problem, search_params, arc_m, windows=None):
+        """
+        Close the model and read the repaired previous plan as the initial
+        assignment. None when it still breaks a constraint (e.g. a time
+        window no insertion could keep); the caller then solves cold.
+        """
+        routes = repair_routes(problem, problem.initial_routes, arc_m, windows)
+        routing.CloseModelWithParameters(search_params)
+        return routing.ReadAssignmentFromRoutes(routes, True)
+
+    def _extract(self, problem, routing, manager, solution, travel_s=None):
+        """
+        (routes, total metres, total seconds) read off the solution's
+        dimension cumuls, without recomputing a single distance.
+
+        Distances come from the Distance dimension. ETAs are minutes after
+        the vehicle leaves the depot: with time windows the Time cumuls
+        (service starts, waiting included), counted from a just-in-time
+        departure; otherwise travel from the `travel_s` matrix (or the
+        distance at the average speed) plus service time. Every vehicle
+        has a route, in vehicle order; an unused one is just the depot.
+        """
+        distance = routing.GetDimensionOrDie("Distance")
+        clock_dim = routing.GetDimensionOrDie("Time") if "Time" in routing.GetAllDimensionNames() else None
+        service_s = service_seconds(problem)
+        columns = problem.columns
+        metres_per_s = problem.avg_speed_kmh / 3.6
+
+        all_routes, total_m, total_s = [], 0, 0
+        for vehicle_idx in range(len(problem.vehicles)):
+            index = routing.Start(vehicle_idx)
+            first = solution.Value(routing.NextVar(index))
+            depart = 0
+            if clock_dim is not None and not routing.IsEnd(first):
+                # The earliest departure may wait at the first stop; leave just in time instead
+                leg = int(service_s[problem.depot_index]) + int(travel_s[problem.depot_index, manager.IndexToNode(first)])
+                depart = max(solution.Min(clock_dim.CumulVar(index)), solution.Min(clock_dim.CumulVar(first)) - leg)
+            clock, prev_node, prev_m, stops = depart, None, 0, []
+            while True:
+                node = manager.IndexToNode(index)
+                metres = solution.Value(distance.CumulVar(index))
+                if clock_dim is not None:
+                    clock = max(depart, solution.Min(clock_dim.CumulVar(index)))
+                elif prev_node is not None:
+                    travel = travel_s[prev_node, node] if travel_s is not None else (metres - prev_m) / metres_per_s
+                    clock += int(service_s[prev_node]) + int(travel)
+                if routing.IsEnd(index):
+                    break
+
+                stops.append(OptimizedStop(
+                    stop_id=columns.ids[node],
+                    order=len(stops),
+                    lat=float(columns.lat[node]),
+                    lng=float(columns.lng[node]),
+                    arrival_eta_min=round((clock - depart) / 60, 1),
+                    distance_from_prev_km=round((metres - prev_m) / 1000, 2),
+                ))
+                prev_node, prev_m = node, metres
+                index = solution.Value(routing.NextVar(index))
+
+            all_routes.append(stops)
+            if len(stops) > 1:
+                total_m += metres
+                total_s += clock - depart
+        return all_routes, total_m, total_s
+
+    def _trace_search(self, routing, trace, start_time):
+        """Record (elapsed ms, objective) for every strictly better solution."""
+        def at_solution():
+            objective = routing.CostVar().Value()
+            if not trace or objective < trace[-1][1]:
+                trace.append((int((time.perf_counter() - start_time) * 1000), objective))
+
+        routing.AddAtSolutionCallback(at_solution)
+
+    def _search_stats(self, routing, search_params, timer, trace):
+        """SearchStats of the finished search; a limit counts as hit once the search ran its length."""
+        limit_ms = search_params.time_limit.ToMilliseconds() if search_params.HasField("time_limit") else None
+        timed_out = routing.status() in (
+            routing_enums_pb2.RoutingSearchStatus.ROUTING_FAIL_TIMEOUT,
+            routing_enums_pb2.RoutingSearchStatus.ROUTING_PARTIAL_SUCCESS_LOCAL_OPTIMUM_NOT_REACHED,
+        )
+        return SearchStats(
+            solutions=len(trace),
+            branches=routing.solver().Branches(),
+            time_limit_hit=timed_out or (limit_ms is not None and timer.phases_ms.get("search", 0) >= limit_ms),
+            trace=trace,
+        )
+
+    def _watch_solutions(self, routing, manager, problem, arc_m, on_solution, start_time):
+        """Report each strictly better solution to `on_solution` while the search runs."""
+        best: list[int] = []
+        ids = problem.columns.ids
+
+        def at_solution():
+            objective = routing.CostVar().Value()
+            if best and objective >= best[0]:
+                return  # GLS also reports solutions that only improve its penalized cost
+            best[:] = [objective]
+
+            routes = []
+            for vehicle_idx in range(len(problem.vehicles)):
+                index = routing.Start(vehicle_idx)
+                nodes = [manager.IndexToNode(index)]
+                while not routing.IsEnd(index):
+                    index = routing.NextVar(index).Value()
+                    nodes.append(manager.IndexToNode(index))
+                if len(nodes) > 2:
+                    routes.append(nodes)
+
+            update = SolutionUpdate(
+                elapsed_ms=int((time.perf_counter() - start_time) * 1000),
+                objective=objective,
+                total_distance_km=round(sum(arc_m(a, b) for r in routes for a, b in zip(r, r[1:])) / 1000, 2),
+                routes=[ids[r].tolist() for r in routes],
+            )
+            if on_solution(update) is False:
+                routing.solver().FinishCurrentSearch()
+
+        routing.AddAtSolutionCallback(at_solution)
+
+    def _split_tour(self, problem, tour, lats, lngs):
+        """
+        Cut a giant tour into consecutive per-vehicle routes that fit each
+        vehicle's capacity and the Distance dimension's limit (including
+        the leg back to the depot). The last vehicle takes any remainder.
+        """
+        depot = problem.depot_index
+        max_distance_m = int(problem.vehicles[0].max_distance_km * 1000)
+        demands = problem.columns.demand_kg.astype(np.int64)
+
+        def arc_m(a, b):
+            return int(haversine(lats[a], lngs[a], lats[b], lngs[b]) * 1000)
+
+        routes: list[list[int]] = [[] for _ in problem.vehicles]
+        vehicle, load, distance = 0, 0, 0
+        for node in tour:
+            demand = int(demands[node])
+            capacity = int(problem.vehicles[vehicle].capacity_kg)
+            prev = routes[vehicle][-1] if routes[vehicle] else depot
+            extended = distance + arc_m(prev, node)
+            too_far = extended + arc_m(node, depot) > max_distance_m
+            if routes[vehicle] and (load + demand > capacity or too_far) and vehicle + 1 < len(routes):
+                vehicle, load = vehicle + 1, 0
+                extended = arc_m(depot, node)
+            routes[vehicle].append(node)
+            load += demand
+            distance = extended
+        return routes
+
+    def _create_model(self, problem):
+        manager = pywrapcp.RoutingIndexManager(problem.stop_count, len(problem.vehicles), problem.depot_index)
+        return manager, pywrapcp.RoutingModel(manager)
+
+    def _register_matrix(self, routing, layer):
+        """Register a node-indexed (n, n) cost layer as a native transit matrix."""
+        return routing.RegisterTransitMatrix(layer.tolist())
+
+    def _register_sparse(self, routing, manager, sparse, objective, rate, lats, lngs):
+        rows = sparse.row_dicts(sparse.layer(objective, rate))
+        scale = sparse.scale(objective, rate)
+
+        def sparse_callback(from_idx, to_idx):
+            from_node = manager.IndexToNode(from_idx)
+            to_node = manager.IndexToNode(to_idx)
+            value = rows[from_node].get(to_node)
+            if value is None:
+                # Outside the candidate set — only reachable if domains are widened
+                value = int(haversine(lats[from_node], lngs[from_node], lats[to_node], lngs[to_node]) * 1000 * scale)
+            return value
+
+        return routing.RegisterTransitCallback(sparse_callback)
+
+    def _restrict_to_candidates(self, routing, manager, problem, sparse, seed_routes):
+        """Limit every NextVar to its candidate row, the route ends and its seed successor."""
+        depot = problem.depot_index
+        ends = [routing.End(v) for v in range(len(problem.vehicles))]
+
+        seed_next: dict[int, int] = {}
+        for route in seed_routes:
+            for a, b in zip(route, route[1:]):
+                seed_next[a] = b
+
+        for node in range(sparse.size):
+            candidates = set(sparse.row(node).tolist())
+            if node in seed_next:
+                candidates.add(seed_next[node])
+            candidates.discard(depot)
+            successors = [manager.NodeToIndex(j) for j in candidates] + ends
+            if node == depot:
+                for v in range(len(problem.vehicles)):
+                    routing.NextVar(routing.Start(v)).SetValues(successors)
+            else:
+                routing.NextVar(manager.NodeToIndex(node)).SetValues(successors)
+
+    def _add_constraints(self, routing, manager, problem, transit_callback_id):
+        # Add capacity constraint if vehicles have capacity
+        if any(v.capacity_kg > 0 for v in problem.vehicles):
+            self._add_capacity_constraint(routing, manager, problem, transit_callback_id)
+
+        # Add distance constraint
+        routing.AddDimension(
+            transit_callback_id,
+            0,  # no slack
+            int(problem.vehicles[0].max_distance_km * 1000),  # max distance in meters
+            True,  # start cumul to zero
+            "Distance",
+        )
+
+    def _add_time_windows(self, routing, manager, problem, windows):
+        """VRPTW: a "Time" dimension over travel + service time, with pruned arcs."""
+        depot = problem.depot_index
+        time_cb_id = self._register_matrix(routing, windows.transit_s)
+        routing.AddDimension(
+            time_cb_id,
+            windows.horizon,  # waiting allowed up to the whole horizon
+            windows.horizon,  # latest any vehicle may be anywhere
+            False,            # vehicles may leave after the depot opens
+            "Time",
+        )
+        time_dimension = routing.GetDimensionOrDie("Time")
+
+        ends = [routing.End(v) for v in range(len(problem.vehicles))]
+        for node in range(problem.stop_count):
+            if node == depot:
+                continue
+            index = manager.NodeToIndex(node)
+            time_dimension.CumulVar(index).SetRange(int(windows.earliest[node]), int(windows.latest[node]))
+
+            # Drop arcs preprocessing proved can never be on time
+            row = windows.arcs[node]
+            if row.sum() < problem.stop_count - 1:
+                successors = [manager.NodeToIndex(j) for j in np.flatnonzero(row).tolist() if j != depot]
+                routing.NextVar(index).SetValues(successors + ends)
+
+        for v in range(len(problem.vehicles)):
+            for index in (routing.Start(v), routing.End(v)):
+                time_dimension.CumulVar(index).SetRange(int(windows.earliest[depot]), int(windows.latest[depot]))
+                routing.AddVariableMinimizedByFinalizer(time_dimension.CumulVar(index))
+
+    def _search_parameters(self, problem, warm=None):
+        """`warm` defaults to whether the problem carries a plan to start from."""
+        if warm is None:
+            warm = bool(problem.initial_routes)
+        search_params = pywrapcp.DefaultRoutingSearchParameters()
+        search_params.first_solution_strategy = (
+            routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+        )
+        if problem.has_time_windows:
+            # Greedy arc extension dead-ends on tight windows; insertion does not
+            search_params.first_solution_strategy = (
+                routing_enums_pb2.FirstSolutionStrategy.PARALLEL_CHEAPEST_INSERTION
+            )
+
+        if self.strategy == "guided_local_search":
+            search_params.local_search_metaheuristic = (
+                routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+            )
+            # A warm start is already near-optimal: polish it, don't re-search
+            search_params.time_limit.FromSeconds(WARM_GLS_SECONDS if warm else 10)
+
+        if self.first_solution:
+            search_params.first_solution_strategy = getattr(
+                routing_enums_pb2.FirstSolutionStrategy, self.first_solution
+            )
+        if self.metaheuristic:
+            search_params.local_search_metaheuristic = getattr(
+                routing_enums_pb2.LocalSearchMetaheuristic, self.metaheuristic
+            )
+            # Metaheuristics never stop on their own
+            search_params.time_limit.FromSeconds(WARM_GLS_SECONDS if warm else 10)
+
+        if self.time_limit_s is not None:
+            search_params.time_limit.FromMilliseconds(int(self.time_limit_s * 1000))
+
+        return search_params
+
+    def _set_arc_costs(self, routing, problem, distance_cb_id, register_layer):
+        """
+        Use the cost layer matching `problem.optimize_for` as the arc cost.
+        `register_layer(objective, cost_per_km)` registers a layer and returns its callback id.
+        """
+        if problem.optimize_for == CostObjective.distance:
+            routing.SetArcCostEvaluatorOfAllVehicles(distance_cb_id)
+            return
+
+        if problem.optimize_for == CostObjective.time:
+            routing.SetArcCostEvaluatorOfAllVehicles(register_layer(CostObjective.time, 0.0))
+            return
+
+        # Fuel: one evaluator per distinct cost rate, shared by vehicles with that rate
+        cb_by_rate: dict[float, int] = {}
+        for vehicle_idx, vehicle in enumerate(problem.vehicles):
+            if vehicle.cost_per_km not in cb_by_rate:
+                cb_by_rate[vehicle.cost_per_km] = register_layer(CostObjective.fuel, vehicle.cost_per_km)
+            routing.SetArcCostEvaluatorOfVehicle(cb_by_rate[vehicle.cost_per_km], vehicle_idx)
 
-        demand_cb_id = routing.RegisterUnaryTransitCallback(demand_callback)
+    def _add_capacity_constraint(self, routing, manager, problem, transit_cb_id):
+        """Add vehicle capacity (CVRP) constraints."""
+        demands = problem.columns.demand_kg.astype(np.int64).tolist()
+        demand_cb_id = routing.RegisterUnaryTransitVector(demands)
         max_capacity = int(max(v.capacity_kg for v in problem.vehicles))
 
         routing.AddDimensionWithVehicleCapacity(
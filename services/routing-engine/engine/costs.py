@@ -0,0 +1,114 @@
+"""
+OmniRoute AI — Cost Bundle
+
+One geometry pass, several cost layers. The distance matrix is built
+once; time and fuel layers are derived from it on first access with
+plain array arithmetic (no trig, no second O(n²) haversine pass).
+The road backend measures time itself, so its bundle carries both.
+for_path builds the same layers over a route's legs alone.
+
+Units (integers, as OR-Tools requires):
+  - distance_m : meters
+  - time_s     : seconds (road graph, or distance at the average speed)
+  - fuel       : paise (INR × 100) at a vehicle's cost_per_km
+"""
+
+import numpy as np
+
+from engine.distance import (
+    build_distance_matrix_array,
+    cached_matrix,
+    haversine_km_array,
+    stop_coordinates,
+    time_matrix_from_distance,
+)
+from engine.models import CostObjective, DistanceMetric, RoutingProblem
+from engine.road_network import get_road_network
+
+# Stops per road query when a path is costed leg by leg
+PATH_CHUNK = 256
+
+
+class CostBundle:
+    """Distance, time and fuel-cost layers over a single distance matrix."""
+
+    def __init__(self, distance_m: np.ndarray, avg_speed_kmh: float = 40.0, time_s: np.ndarray | None = None):
+        self.distance_m = distance_m
+        self.avg_speed_kmh = avg_speed_kmh
+        self._time_s = time_s
+        self._fuel_layers: dict[float, np.ndarray] = {}
+
+    @classmethod
+    def for_problem(cls, problem: RoutingProblem) -> "CostBundle":
+        """Build the matrices for a problem with its distance metric and wrap them."""
+        if problem.distance_metric == DistanceMetric.road:
+            distance_m, time_s = road_matrices(*stop_coordinates(problem.columns))
+            return cls(distance_m, avg_speed_kmh=problem.avg_speed_kmh, time_s=time_s)
+        return cls(build_distance_matrix_array(problem.columns), avg_speed_kmh=problem.avg_speed_kmh)
+
+    @classmethod
+    def for_path(cls, problem: RoutingProblem, path: np.ndarray) -> "CostBundle":
+        """
+        Layers of a path's legs path[i] → path[i + 1] only, as 1-D arrays,
+        without the n² matrix: great-circle legs directly, road legs from
+        the graph's matrices over consecutive runs of the path.
+        """
+        path = np.asarray(path)
+        columns = problem.columns
+        if problem.distance_metric == DistanceMetric.road:
+            distance_m, time_s = [], []
+            for start in range(0, len(path) - 1, PATH_CHUNK):
+                run = path[start : start + PATH_CHUNK + 1]
+                distance, time = road_matrices(columns.lat[run], columns.lng[run])
+                legs = np.arange(len(run) - 1)
+                distance_m.append(distance[legs, legs + 1])
+                time_s.append(time[legs, legs + 1])
+            return cls(np.concatenate(distance_m), problem.avg_speed_kmh, np.concatenate(time_s))
+        a, b = path[:-1], path[1:]
+        km = haversine_km_array(columns.lat[a], columns.lng[a], columns.lat[b], columns.lng[b])
+        return cls((km * 1000.0).astype(np.int32), avg_speed_kmh=problem.avg_speed_kmh)
+
+    @property
+    def size(self) -> int:
+        return self.distance_m.shape[0]
+
+    @property
+    def time_s(self) -> np.ndarray:
+        """Travel time layer in seconds (derived from distance unless measured)."""
+        if self._time_s is None:
+            self._time_s = time_matrix_from_distance(self.distance_m, self.avg_speed_kmh)
+        return self._time_s
+
+    def fuel(self, cost_per_km: float) -> np.ndarray:
+        """Fuel-cost layer in paise for a vehicle cost rate. Cached per rate."""
+        layer = self._fuel_layers.get(cost_per_km)
+        if layer is None:
+            # meters × INR/km × 100 paise/INR ÷ 1000 m/km
+            layer = (self.distance_m * (cost_per_km / 10.0)).astype(np.int32)
+            self._fuel_layers[cost_per_km] = layer
+        return layer
+
+    def layer(self, objective: CostObjective, cost_per_km: float = 0.0) -> np.ndarray:
+        """Return the arc-cost layer matching an optimization objective."""
+        if objective == CostObjective.time:
+            return self.time_s
+        if objective == CostObjective.fuel:
+            return self.fuel(cost_per_km)
+        return self.distance_m
+
+
+def road_matrices(lats: np.ndarray, lngs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Road (distance_m, time_s) through the matrix caches; one graph query on a miss."""
+    network = get_road_network()
+    computed: list[tuple[np.ndarray, np.ndarray]] = []
+
+    def layer(i: int):
+        def compute(la, ln):
+            if not computed:
+                computed.append(network.matrices(la, ln))
+            return computed[0][i]
+        return compute
+
+    distance_m = cached_matrix(lats, lngs, f"road-distance:{network.fingerprint}", layer(0))
+    time_s = cached_matrix(lats, lngs, f"road-time:{network.fingerprint}", layer(1))
+    return distance_m, time_s
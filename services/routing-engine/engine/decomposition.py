@@ -0,0 +1,507 @@
+"""
+OmniRoute AI — Decomposition Solver
+
+Large problems (thousands of stops) are split geographically, solved
+piecewise in parallel and stitched back together:
+
+  1. Sweep: stops are ordered by angle around the depot, starting
+     after the widest empty sector, and cut into groups of balanced
+     demand. With at least as many vehicles as clusters each group is
+     one cluster and gets vehicles in proportion to its demand;
+     otherwise each vehicle gets one group, split into clusters of
+     at most `cluster_size` stops that it serves one after another.
+  2. Clusters are solved concurrently, each a guided local search
+     limited to `cluster_seconds`.
+  3. Stitch: each vehicle runs its clusters back to back. The stitched
+     routes are checked against capacity and max distance (a cluster
+     only knew its own round trip); a violation falls back to one
+     monolithic solve.
+  4. Boundary pass, for every pair of neighbouring clusters. Between
+     clusters on different vehicles, the routes that visit a stop in
+     the band along their shared border are re-optimized together,
+     warm-started from the stitched plan (engine/warm_start.py) and
+     limited to `boundary_seconds`; sets over 2 × cluster_size stops
+     are left as stitched. Between clusters one vehicle serves in turn,
+     the band is a window of its route around the junction, re-ordered
+     between the fixed stops on either side (PathSolver) and spliced
+     back. Even borders run in parallel, then odd ones, so no two
+     concurrent passes share a cluster.
+
+Every leg is costed from engine/costs.py (CostBundle.for_path), like
+the solvers it stitches: a border result is kept only if it lowers the
+problem's objective, and distances, ETAs and durations (service times
+included) match theirs.
+
+The sub-solves run in separate processes (engine/parallel.py):
+SolverExecutor drives the steps over its worker pool; a direct
+solve_sync uses a process pool of `workers` processes.
+
+Problems with time windows are solved monolithically: a sweep cut
+ignores when stops can be served.
+"""
+
+import math
+import os
+import time
+from collections.abc import Callable
+
+import numpy as np
+
+from engine.classical_solver import ClassicalSolver
+from engine.costs import CostBundle
+from engine.distance import stop_coordinates
+from engine.fast_solver import FastSolver
+from engine.instrumentation import PhaseTimer
+from engine.models import (
+    OptimizedStop,
+    RoutingProblem,
+    SolutionUpdate,
+    SolverMetrics,
+    SolverResult,
+    SolverType,
+)
+from engine.parallel import Steps, run_steps
+
+
+DEFAULT_CLUSTER_SIZE = 200
+DEFAULT_CLUSTER_SECONDS = 1.0
+DEFAULT_BOUNDARY_SECONDS = 1.0
+
+# Share of each cluster's stops, nearest the cut, that form a border band
+BORDER_FRACTION = 0.25
+
+
+def sweep_order(problem: RoutingProblem) -> list[int]:
+    """Non-depot stops by polar angle around the depot, starting after the widest gap."""
+    lats, lngs = stop_coordinates(problem.columns)
+    depot = problem.depot_index
+    nodes = np.array([i for i in range(problem.stop_count) if i != depot])
+    if nodes.size == 0:
+        return []
+
+    dx = (lngs[nodes] - lngs[depot]) * math.cos(math.radians(lats[depot]))
+    dy = lats[nodes] - lats[depot]
+    order = np.argsort(np.arctan2(dy, dx), kind="stable")
+    angles = np.arctan2(dy, dx)[order]
+
+    gaps = np.diff(np.append(angles, angles[0] + 2 * math.pi))
+    start = (int(np.argmax(gaps)) + 1) % nodes.size
+    return nodes[np.roll(order, -start)].tolist()
+
+
+def _cut(nodes: list[int], weights: np.ndarray, parts: int) -> list[list[int]]:
+    """Split a sequence into `parts` consecutive non-empty runs of about equal weight."""
+    parts = max(1, min(parts, len(nodes)))
+    cumulative = np.cumsum(weights)
+    targets = cumulative[-1] * np.arange(1, parts) / parts
+    cuts = np.searchsorted(cumulative, targets, side="right").tolist()
+
+    runs, start = [], 0
+    for i, cut in enumerate(cuts + [len(nodes)]):
+        # Leave at least one node for every remaining run
+        cut = min(max(cut, start + 1), len(nodes) - (parts - 1 - i))
+        runs.append(nodes[start:cut])
+        start = cut
+    return runs
+
+
+def _share(total: int, weights: list[float]) -> list[int]:
+    """Distribute `total` items over weights (largest remainder), at least one each."""
+    spare = total - len(weights)
+    scaled = [spare * w / sum(weights) for w in weights]
+    counts = [1 + int(s) for s in scaled]
+    by_remainder = sorted(range(len(weights)), key=lambda i: int(scaled[i]) - scaled[i])
+    for i in by_remainder[: total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+def partition(problem: RoutingProblem, cluster_size: int) -> list[tuple[list[int], list[int]]]:
+    """
+    Capacity-balanced sweep partition.
+
+    Returns (stop nodes in sweep order, vehicle indices) per cluster;
+    clusters sharing a single vehicle are consecutive and listed in the
+    order it serves them.
+    """
+    order = sweep_order(problem)
+    if not order:
+        return []
+    demands = problem.columns.demand_kg[order]
+    weights = demands if demands.sum() > 0 else np.ones(len(order))
+
+    vehicle_count = len(problem.vehicles)
+    cluster_count = math.ceil(len(order) / cluster_size)
+
+    if vehicle_count >= cluster_count:
+        groups = _cut(order, weights, cluster_count)
+        weight_of = dict(zip(order, weights.tolist()))
+        group_weights = [sum(weight_of[n] for n in g) or 1.0 for g in groups]
+        counts = _share(vehicle_count, group_weights)
+        vehicle_ids = np.cumsum([0] + counts).tolist()
+        return [(g, list(range(vehicle_ids[i], vehicle_ids[i + 1]))) for i, g in enumerate(groups)]
+
+    clusters = []
+    for vehicle_idx, group in enumerate(_cut(order, weights, vehicle_count)):
+        for cluster in _cut(group, np.ones(len(group)), math.ceil(len(group) / cluster_size)):
+            clusters.append((cluster, [vehicle_idx]))
+    return clusters
+
+
+class PathSolver:
+    """
+    Best order of the stops strictly between stops[0] and stops[-1],
+    which stay first and last: a window of a longer route. Solved by
+    FastSolver as a round trip from a virtual depot that leaves like
+    the first stop and returns like the last. Capacity and distance are
+    the caller's to check on the spliced route.
+    """
+
+    def __init__(self):
+        self.strategy = "path"
+
+    def uses_dense_costs(self, problem: RoutingProblem) -> bool:
+        """Builds its own folded matrix."""
+        return False
+
+    def solve_sync(
+        self,
+        problem: RoutingProblem,
+        costs: CostBundle | None = None,
+        on_solution: Callable[[SolutionUpdate], bool | None] | None = None,
+    ) -> SolverResult:
+        """Route 0 of the result starts with stops[0] (order 0) and omits stops[-1]."""
+        if costs is None:
+            costs = CostBundle.for_problem(problem)
+        last = problem.stop_count - 1
+        keep = np.arange(last)
+
+        def folded(layer: np.ndarray) -> np.ndarray:
+            matrix = layer[np.ix_(keep, keep)].copy()
+            matrix[:, 0] = layer[keep, last]
+            matrix[0, 0] = 0
+            return matrix
+
+        distance_m, time_s = folded(costs.distance_m), folded(costs.time_s)
+        vehicle = problem.vehicles[0].model_copy(
+            update={"capacity_kg": 0, "max_distance_km": float(distance_m.sum()) / 1000 + 1}
+        )
+        window = problem.model_copy(update={"stops": problem.columns.take(keep), "depot_index": 0, "vehicles": [vehicle]})
+        return FastSolver().solve_sync(window, CostBundle(distance_m, problem.avg_speed_kmh, time_s))
+
+
+class DecompositionSolver:
+    """Sweep-cluster, solve clusters in parallel, stitch and re-optimize the borders."""
+
+    def __init__(
+        self,
+        cluster_size: int = DEFAULT_CLUSTER_SIZE,
+        workers: int | None = None,
+        cluster_seconds: float = DEFAULT_CLUSTER_SECONDS,
+        boundary_seconds: float = DEFAULT_BOUNDARY_SECONDS,
+    ):
+        """
+        Args:
+            cluster_size: most stops per cluster sub-problem.
+            workers: processes for a direct solve_sync (default: one per
+                     CPU core). Under SolverExecutor its pool is used instead.
+            cluster_seconds: search budget of each cluster solve.
+            boundary_seconds: search budget of each border re-optimization.
+        """
+        self.strategy = "decomposition"
+        self.cluster_size = cluster_size
+        self.workers = workers or os.cpu_count() or 1
+        self.cluster_seconds = cluster_seconds
+        self.boundary_seconds = boundary_seconds
+        self._last_metrics: SolverMetrics | None = None
+
+    async def solve(self, problem: RoutingProblem) -> SolverResult:
+        """Solve on the calling thread (see ClassicalSolver.solve)."""
+        return self.solve_sync(problem)
+
+    def uses_dense_costs(self, problem: RoutingProblem) -> bool:
+        """Sub-problems build their own matrices."""
+        return False
+
+    def solve_sync(
+        self,
+        problem: RoutingProblem,
+        costs: CostBundle | None = None,
+        on_solution: Callable[[SolutionUpdate], bool | None] | None = None,
+    ) -> SolverResult:
+        """
+        Blocking solve over a process pool. `on_solution` gets the stitched
+        plan and the plan after each boundary round (or, for a monolithic
+        solve, every improvement); returning False skips the remaining work.
+        """
+        return run_steps(self.steps(problem, on_solution), self.workers)
+
+    def steps(
+        self,
+        problem: RoutingProblem,
+        on_solution: Callable[[SolutionUpdate], bool | None] | None = None,
+    ) -> Steps:
+        """The solve as batches of independent sub-solves (see engine/parallel.py)."""
+        start_time = time.perf_counter()
+
+        if problem.has_time_windows or problem.stop_count <= self.cluster_size:
+            monolithic = ClassicalSolver(strategy="guided_local_search")
+            (result,) = yield [(monolithic, problem, on_solution)]
+            self._last_metrics = result.metrics
+            return result
+
+        capacity = max(v.capacity_kg for v in problem.vehicles)
+        demand = float(problem.columns.demand_kg.sum())
+        if capacity > 0 and demand > capacity * len(problem.vehicles):
+            self._last_metrics = self._failed_metrics(start_time)
+            return SolverResult(
+                success=False,
+                error=f"Total demand {demand:g} kg exceeds the fleet's capacity "
+                f"({len(problem.vehicles)} × {capacity:g} kg)",
+            )
+
+        timer = PhaseTimer()
+        with timer.phase("model"):
+            clusters = partition(problem, self.cluster_size)
+            cluster_solver = ClassicalSolver(strategy="guided_local_search", time_limit_s=self.cluster_seconds)
+            batch = [(cluster_solver, self._subproblem(problem, nodes, vehicles), None) for nodes, vehicles in clusters]
+        with timer.phase("search"):
+            results = yield batch
+
+        failed = next((r for r in results if not r.success), None)
+        if failed is not None:
+            self._last_metrics = self._failed_metrics(start_time)
+            return SolverResult(success=False, error=f"Cluster solve failed: {failed.error}")
+
+        node_of = {stop_id: i for i, stop_id in enumerate(problem.columns.ids)}
+
+        def nodes_of(route: list[OptimizedStop]) -> list[int]:
+            return [node_of[o.stop_id] for o in route if node_of[o.stop_id] != problem.depot_index]
+
+        # Stitch: a vehicle serving several clusters runs them back to back;
+        # starts[i] is where cluster i begins on its route when it has one vehicle
+        plan: list[list[int]] = [[] for _ in problem.vehicles]
+        starts: list[int | None] = []
+        for (_, vehicle_ids), result in zip(clusters, results):
+            starts.append(len(plan[vehicle_ids[0]]) if len(vehicle_ids) == 1 else None)
+            for vehicle_idx, route in zip(vehicle_ids, result.routes):
+                plan[vehicle_idx].extend(nodes_of(route))
+
+        if not self._feasible(problem, dict(enumerate(plan))):
+            # The dropped depot returns made a route too heavy or too long
+            monolithic = ClassicalSolver(strategy="guided_local_search")
+            (result,) = yield [(monolithic, problem, on_solution)]
+            self._last_metrics = result.metrics
+            return result
+        keep_going = self._report(problem, plan, on_solution, start_time)
+
+        boundary_solver = ClassicalSolver(strategy="guided_local_search", time_limit_s=self.boundary_seconds)
+        path_solver = PathSolver()
+        for parity in (0, 1):
+            if not keep_going:
+                break
+            borders = self._borders(plan, clusters, starts, parity)
+            if not borders:
+                continue
+            batch = []
+            for vehicles, window in borders:
+                if window is None:
+                    subproblem = self._subproblem(problem, [], vehicles, [plan[v] for v in vehicles])
+                    batch.append((boundary_solver, subproblem, None))
+                else:
+                    batch.append((path_solver, self._window(problem, vehicles[0], plan[vehicles[0]], *window), None))
+            with timer.phase("search"):
+                results = yield batch
+            for (vehicles, window), result in zip(borders, results):
+                if not result.success:
+                    continue
+                if window is None:
+                    candidate = {v: nodes_of(route) for v, route in zip(vehicles, result.routes)}
+                else:
+                    (vehicle_idx,), (lo, hi) = vehicles, window
+                    route = plan[vehicle_idx]
+                    # Order 0 is the fixed stop before the window
+                    inner = [node_of[o.stop_id] for o in result.routes[0][1:]]
+                    if sorted(inner) != sorted(route[lo:hi]):
+                        continue
+                    candidate = {vehicle_idx: route[:lo] + inner + route[hi:]}
+                # A rejected warm start solves cold and can come back worse
+                current = {v: plan[v] for v in candidate}
+                if self._feasible(problem, candidate) and self._cost(problem, candidate) < self._cost(problem, current):
+                    for vehicle_idx, route in candidate.items():
+                        plan[vehicle_idx] = route
+            keep_going = self._report(problem, plan, on_solution, start_time)
+
+        return self._result(problem, plan, len(clusters), start_time, timer)
+
+    def _subproblem(
+        self,
+        problem: RoutingProblem,
+        nodes: list[int],
+        vehicle_ids: list[int],
+        routes: list[list[int]] | None = None,
+    ) -> RoutingProblem:
+        """The depot, the given stops (or those on `routes`) and vehicles as their own problem."""
+        if routes is not None:
+            nodes = [node for route in routes for node in route]
+        ids = problem.columns.ids
+        return RoutingProblem(
+            stops=problem.columns.take([problem.depot_index, *nodes]),
+            vehicles=[problem.vehicles[v] for v in vehicle_ids],
+            depot_index=0,
+            optimize_for=problem.optimize_for,
+            avg_speed_kmh=problem.avg_speed_kmh,
+            distance_metric=problem.distance_metric,
+            initial_routes=[ids[route].tolist() for route in routes] if routes else None,
+        )
+
+    @staticmethod
+    def _window(problem: RoutingProblem, vehicle_idx: int, route: list[int], lo: int, hi: int) -> RoutingProblem:
+        """route[lo:hi] between its fixed neighbours (the depot at either end), for PathSolver."""
+        depot = problem.depot_index
+        entry = route[lo - 1] if lo > 0 else depot
+        exit_ = route[hi] if hi < len(route) else depot
+        return RoutingProblem(
+            stops=problem.columns.take([entry, *route[lo:hi], exit_]),
+            vehicles=[problem.vehicles[vehicle_idx]],
+            depot_index=0,
+            optimize_for=problem.optimize_for,
+            avg_speed_kmh=problem.avg_speed_kmh,
+            distance_metric=problem.distance_metric,
+        )
+
+    def _borders(self, plan, clusters, starts, parity: int) -> list[tuple[list[int], tuple[int, int] | None]]:
+        """
+        What to re-optimize at each border between cluster i and i + 1 (i of
+        the given parity): (vehicles, None) for every vehicle whose route
+        visits the border band, or, when one vehicle serves both clusters,
+        ([vehicle], (lo, hi)) for the band as a window of its route around
+        the junction. Sets are disjoint and small enough to solve quickly.
+        """
+        vehicle_of = {node: v for v, route in enumerate(plan) for node in route}
+        taken: set[int] = set()
+        borders = []
+        for i in range(parity, len(clusters) - 1, 2):
+            (left, left_vehicles), (right, right_vehicles) = clusters[i], clusters[i + 1]
+            head, tail = math.ceil(len(left) * BORDER_FRACTION), math.ceil(len(right) * BORDER_FRACTION)
+            if len(left_vehicles) == 1 and left_vehicles == right_vehicles:
+                # Windows of one parity are a whole cluster apart
+                junction = starts[i + 1]
+                borders.append((left_vehicles, (max(starts[i], junction - head), junction + tail)))
+                continue
+            vehicles = sorted({vehicle_of[node] for node in left[-head:] + right[:tail]})
+            if taken.intersection(vehicles) or sum(len(plan[v]) for v in vehicles) > 2 * self.cluster_size:
+                continue
+            taken.update(vehicles)
+            borders.append((vehicles, None))
+        return borders
+
+    @staticmethod
+    def _legs(problem: RoutingProblem, route: list[int]) -> tuple[np.ndarray, CostBundle]:
+        """(depot, *route, depot) and the layers of the round trip's legs."""
+        depot = problem.depot_index
+        path = np.array([depot, *route, depot])
+        return path, CostBundle.for_path(problem, path)
+
+    def _cost(self, problem: RoutingProblem, routes: dict[int, list[int]]) -> int:
+        """Objective of the given vehicles' routes, in the units the solvers minimize."""
+        return sum(
+            int(self._legs(problem, route)[1].layer(problem.optimize_for, problem.vehicles[v].cost_per_km).sum())
+            for v, route in routes.items()
+        )
+
+    @staticmethod
+    def _feasible(problem: RoutingProblem, routes: dict[int, list[int]]) -> bool:
+        """Load and length within the limits ClassicalSolver applies to every vehicle."""
+        capacity = max(v.capacity_kg for v in problem.vehicles)
+        max_distance_m = int(problem.vehicles[0].max_distance_km * 1000)
+        demand = problem.columns.demand_kg
+        for route in routes.values():
+            if capacity > 0 and float(demand[route].sum()) > capacity:
+                return False
+            if int(DecompositionSolver._legs(problem, route)[1].distance_m.sum()) > max_distance_m:
+                return False
+        return True
+
+    def _routes(self, problem: RoutingProblem, plan: list[list[int]]):
+        """
+        Plan → (OptimizedStop routes, depot first as ClassicalSolver returns
+        them; total metres; total seconds; objective). ETAs count the drive
+        and the service at every earlier stop, as FastSolver's do.
+        """
+        columns = problem.columns
+        service_s = columns.service_time_min * 60
+        routes, total_m, total_s, objective = [], 0, 0, 0
+        for vehicle_idx, route in enumerate(plan):
+            path, legs = self._legs(problem, route)
+            stops, clock = [], 0
+            for order, node in enumerate(path[:-1].tolist()):
+                if order:
+                    prev = int(path[order - 1])
+                    clock += (int(service_s[prev]) if order > 1 else 0) + int(legs.time_s[order - 1])
+                stops.append(OptimizedStop(
+                    stop_id=columns.ids[node],
+                    order=order,
+                    lat=float(columns.lat[node]),
+                    lng=float(columns.lng[node]),
+                    arrival_eta_min=round(clock / 60, 1),
+                    distance_from_prev_km=round(int(legs.distance_m[order - 1]) / 1000, 2) if order else 0.0,
+                ))
+            routes.append(stops)
+
+            total_m += int(legs.distance_m.sum())
+            if route:
+                total_s += clock + int(service_s[route[-1]]) + int(legs.time_s[-1])
+            objective += int(legs.layer(problem.optimize_for, problem.vehicles[vehicle_idx].cost_per_km).sum())
+        return routes, total_m, total_s, objective
+
+    def _report(self, problem, plan, on_solution, start_time) -> bool:
+        """Send the current plan to `on_solution`; False when it asks to stop."""
+        if on_solution is None:
+            return True
+        total_m = sum(int(self._legs(problem, route)[1].distance_m.sum()) for route in plan)
+        ids = problem.columns.ids
+        depot_id = ids[problem.depot_index]
+        update = SolutionUpdate(
+            elapsed_ms=int((time.perf_counter() - start_time) * 1000),
+            objective=self._cost(problem, dict(enumerate(plan))),
+            total_distance_km=round(total_m / 1000, 2),
+            routes=[[depot_id, *ids[route].tolist(), depot_id] for route in plan if route],
+        )
+        return on_solution(update) is not False
+
+    def _failed_metrics(self, start_time) -> SolverMetrics:
+        return SolverMetrics(
+            solver_type=SolverType.classical,
+            strategy=self.strategy,
+            execution_time_ms=int((time.perf_counter() - start_time) * 1000),
+        )
+
+    def _result(self, problem, plan, cluster_count: int, start_time, timer) -> SolverResult:
+        with timer.phase("extraction"):
+            routes, total_m, total_s, objective = self._routes(problem, plan)
+        total_distance_km = round(total_m / 1000, 2)
+        self._last_metrics = SolverMetrics(
+            solver_type=SolverType.classical,
+            strategy=f"{self.strategy} ({cluster_count} clusters)",
+            execution_time_ms=int((time.perf_counter() - start_time) * 1000),
+            total_distance_km=total_distance_km,
+            total_duration_min=round(total_s / 60, 1),
+            stops_optimized=problem.stop_count,
+            quality_score=min(100.0, round(80 + 20 * (1 - total_distance_km / max(total_distance_km * 1.3, 1)), 1)),
+            objective=objective,
+            phases_ms=timer.phases_ms,
+        )
+        return SolverResult(success=True, routes=routes, metrics=self._last_metrics)
+
+    async def validate(self, result: SolverResult) -> bool:
+        """Check that the result is valid (all stops visited)."""
+        if not result.success:
+            return False
+        return len(result.routes) > 0
+
+    def get_metrics(self) -> SolverMetrics:
+        """Return metrics from the last solve run."""
+        if self._last_metrics is None:
+            return SolverMetrics(solver_type=SolverType.classical, strategy=self.strategy)
+        return self._last_metrics
@@ -4,16 +4,53 @@ OmniRoute AI — Distance Matrix Calculator
 Computes distance between stops using the Haversine formula.
 This gives straight-line (great-circle) distance in km.
 
-For production, replace with a road-network API (OSRM, Valhalla).
+Matrices are built in one vectorized NumPy pass and returned as
+compact int32 arrays. The list-of-lists builders remain as thin
+adapters for callers that expect plain Python lists. Lookups go
+through the in-process MatrixCache (which also slices subsets out of
+cached supersets), then the persistent MatrixStore if configured,
+before anything is computed.
+
+For real driving distances, see engine/road_network.py
+(distance_metric="road").
 """
 
 import math
+from collections.abc import Callable
 
-from engine.models import Stop
+import numpy as np
+
+from engine.matrix_cache import MatrixCache
+from engine.matrix_store import MatrixStore, matrix_fingerprint, point_keys
+from engine.models import Stop, StopTable
 
 
 EARTH_RADIUS_KM = 6371.0
 
+# Rows per block when filling the upper triangle. Keeps the float64
+# temporaries around 8 MB each even for 5k+ stop matrices.
+_BLOCK_ROWS = 256
+
+_matrix_cache: MatrixCache | None = MatrixCache.from_env()
+_matrix_store: MatrixStore | None = MatrixStore.from_env()
+
+
+def configure_matrix_cache(cache: MatrixCache | None) -> None:
+    """Install (or disable with None) the in-process matrix cache."""
+    global _matrix_cache
+    _matrix_cache = cache
+
+
+def matrix_cache_stats() -> dict | None:
+    """Hit/miss counters of the in-process cache, or None when disabled."""
+    return _matrix_cache.stats() if _matrix_cache is not None else None
+
+
+def configure_matrix_store(store: MatrixStore | None) -> None:
+    """Install (or disable with None) the persistent matrix store."""
+    global _matrix_store
+    _matrix_store = store
+
 
 def haversine(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
     """Calculate the great-circle distance between two GPS coordinates in km."""
@@ -27,40 +64,147 @@ def haversine(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
     return EARTH_RADIUS_KM * c
 
 
-def build_distance_matrix(stops: list[Stop]) -> list[list[int]]:
+def haversine_km_array(lat1, lng1, lat2, lng2) -> np.ndarray:
+    """Element-wise (broadcasting) great-circle distance in km between coordinate arrays."""
+    lat1_r, lat2_r = np.radians(lat1), np.radians(lat2)
+    dlat = lat2_r - lat1_r
+    dlng = np.radians(lng2) - np.radians(lng1)
+
+    a = np.sin(dlat * 0.5) ** 2 + np.cos(lat1_r) * np.cos(lat2_r) * np.sin(dlng * 0.5) ** 2
+    return (2.0 * EARTH_RADIUS_KM) * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def stop_coordinates(stops: list[Stop] | StopTable) -> tuple[np.ndarray, np.ndarray]:
+    """Return (lats, lngs) as float64 arrays (a StopTable's own columns, not copies)."""
+    if isinstance(stops, StopTable):
+        return stops.lat, stops.lng
+    lats = np.fromiter((s.lat for s in stops), dtype=np.float64, count=len(stops))
+    lngs = np.fromiter((s.lng for s in stops), dtype=np.float64, count=len(stops))
+    return lats, lngs
+
+
+def haversine_matrix_km(lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
     """
-    Build a distance matrix for OR-Tools.
+    Pairwise great-circle distances in km as a float64 (n, n) array.
+
+    Only the upper triangle is evaluated; each block of rows is
+    mirrored into the lower triangle, halving the trig work.
+    """
+    lat_r = np.radians(np.asarray(lats, dtype=np.float64))
+    lng_r = np.radians(np.asarray(lngs, dtype=np.float64))
+    cos_lat = np.cos(lat_r)
+    n = lat_r.shape[0]
+
+    out = np.zeros((n, n), dtype=np.float64)
+    for i0 in range(0, n, _BLOCK_ROWS):
+        i1 = min(i0 + _BLOCK_ROWS, n)
+        dlat = lat_r[i0:n][None, :] - lat_r[i0:i1][:, None]
+        dlng = lng_r[i0:n][None, :] - lng_r[i0:i1][:, None]
+
+        a = np.sin(dlat * 0.5) ** 2 + cos_lat[i0:i1][:, None] * cos_lat[i0:n][None, :] * np.sin(dlng * 0.5) ** 2
+        np.clip(a, 0.0, 1.0, out=a)
+        block = (2.0 * EARTH_RADIUS_KM) * np.arcsin(np.sqrt(a))
+
+        out[i0:i1, i0:n] = block
+        out[i0:n, i0:i1] = block.T
+
+    np.fill_diagonal(out, 0.0)
+    return out
+
+
+def distance_matrix_from_coords(lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """Distance matrix in METERS as an int32 array (truncated, like the scalar builder)."""
+    return (haversine_matrix_km(lats, lngs) * 1000.0).astype(np.int32)
+
+
+def cached_distance_matrix(lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """
+    Distance matrix in meters: memory cache → persistent store → compute.
+
+    Cached matrices are shared and read-only; copy before mutating.
+    """
+    return cached_matrix(lats, lngs, "haversine", distance_matrix_from_coords)
+
+
+def cached_matrix(
+    lats: np.ndarray,
+    lngs: np.ndarray,
+    metric: str,
+    compute: Callable[[np.ndarray, np.ndarray], np.ndarray],
+) -> np.ndarray:
+    """Look up a `metric` matrix in the memory cache and store, computing it on a miss."""
+    cache = _matrix_cache
+    keys = None
+    if cache is not None:
+        keys = point_keys(lats, lngs)
+        matrix = cache.get(keys, metric)
+        if matrix is not None:
+            return matrix
+
+    matrix = _stored_matrix(lats, lngs, metric, compute)
+    if cache is not None:
+        cache.put(keys, matrix, metric)
+    return matrix
+
+
+def _stored_matrix(lats, lngs, metric, compute) -> np.ndarray:
+    """Matrix via the persistent store when one is configured."""
+    store = _matrix_store
+    n = len(lats)
+    if store is None or n < store.min_stops:
+        return compute(lats, lngs)
+
+    key = matrix_fingerprint(lats, lngs, metric)
+    matrix = store.get(key, n)
+    if matrix is None:
+        matrix = compute(lats, lngs)
+        try:
+            store.put(key, matrix)
+        except OSError:
+            pass  # A full or read-only cache dir must never fail a solve
+    return matrix
+
+
+def time_matrix_from_distance(distance_m: np.ndarray, avg_speed_kmh: float = 40.0) -> np.ndarray:
+    """Derive a travel time matrix in SECONDS from a distance matrix in meters — no trig."""
+    return (distance_m * (3.6 / avg_speed_kmh)).astype(np.int32)
+
+
+def time_matrix_from_coords(lats: np.ndarray, lngs: np.ndarray, avg_speed_kmh: float = 40.0) -> np.ndarray:
+    """Travel time matrix in SECONDS as an int32 array at a constant average speed."""
+    return time_matrix_from_distance(cached_distance_matrix(lats, lngs), avg_speed_kmh)
+
+
+def build_distance_matrix_array(stops: list[Stop] | StopTable) -> np.ndarray:
+    """
+    Build a distance matrix for OR-Tools as an int32 ndarray.
 
     Returns distances in METERS (integer) because OR-Tools
     requires integer cost values internally.
     """
-    n = len(stops)
-    matrix = [[0] * n for _ in range(n)]
+    return cached_distance_matrix(*stop_coordinates(stops))
 
-    for i in range(n):
-        for j in range(n):
-            if i != j:
-                dist_km = haversine(stops[i].lat, stops[i].lng, stops[j].lat, stops[j].lng)
-                matrix[i][j] = int(dist_km * 1000)  # Convert km → meters
 
-    return matrix
+def build_time_matrix_array(stops: list[Stop] | StopTable, avg_speed_kmh: float = 40.0) -> np.ndarray:
+    """Build a travel time matrix in SECONDS as an int32 ndarray."""
+    return time_matrix_from_coords(*stop_coordinates(stops), avg_speed_kmh=avg_speed_kmh)
+
+
+def build_distance_matrix(stops: list[Stop] | StopTable) -> list[list[int]]:
+    """
+    Build a distance matrix for OR-Tools.
+
+    Returns distances in METERS (integer) because OR-Tools
+    requires integer cost values internally.
+    """
+    return build_distance_matrix_array(stops).tolist()
 
 
-def build_time_matrix(stops: list[Stop], avg_speed_kmh: float = 40.0) -> list[list[int]]:
+def build_time_matrix(stops: list[Stop] | StopTable, avg_speed_kmh: float = 40.0) -> list[list[int]]:
     """
     Build a travel time matrix.
 
     Returns times in SECONDS (integer) for OR-Tools compatibility.
     Uses average speed to estimate travel time from distance.
     """
-    n = len(stops)
-    matrix = [[0] * n for _ in range(n)]
-
-    for i in range(n):
-        for j in range(n):
-            if i != j:
-                dist_km = haversine(stops[i].lat, stops[i].lng, stops[j].lat, stops[j].lng)
-                time_hours = dist_km / avg_speed_kmh
-                matrix[i][j] = int(time_hours * 3600)  # Convert hours → seconds
-
-    return matrix
+    return build_time_matrix_array(stops, avg_speed_kmh).tolist()
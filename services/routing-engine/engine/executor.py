@@ -0,0 +1,327 @@
+"""
+OmniRoute AI — Solver Executor
+
+Runs solves in a pool of pre-started worker processes so a 10 s
+guided local search never blocks the API's event loop.
+
+  - Workers import OR-Tools and the engine once at startup (pre-warmed),
+    so a solve never pays the import cost.
+  - The problem and its dense cost matrices travel through one
+    SharedMemory block per solve; only offsets cross the pipe. Matrices
+    are built in the parent, so its MatrixCache / MatrixStore serve
+    every worker.
+  - Cancelling the awaiting task (e.g. the client disconnected) kills
+    the worker mid-search, and a fresh one is started in its place.
+  - Workers are recycled after `max_solves` solves, or once their RSS
+    passes `max_rss_mb` (OR-Tools models can fragment the heap).
+  - Improved solutions found mid-search can be streamed back to the
+    caller as SolutionUpdate messages before the final result.
+  - A DecompositionSolver or PortfolioSolver is run from the parent:
+    its sub-solves (clusters and borders, or raced configurations) are
+    spread over the workers concurrently.
+"""
+
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import time
+from collections.abc import Callable
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from engine.classical_solver import ClassicalSolver
+from engine.costs import CostBundle
+from engine.decomposition import DecompositionSolver
+from engine.models import DistanceMetric, RoutingProblem, SolutionUpdate, SolverResult
+from engine.portfolio import PortfolioSolver
+
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_SOLVES = 200
+DEFAULT_MAX_RSS_MB = 1536
+
+# Seconds a retiring worker gets to exit on its own before it is killed
+_STOP_GRACE_SECONDS = 5
+
+# Matrix sections start on 8-byte boundaries
+_ALIGN = 8
+
+
+# ── Shared-memory layout ──
+
+def _pack(problem: RoutingProblem, costs: CostBundle | None) -> tuple[shared_memory.SharedMemory, dict]:
+    """Copy the problem JSON and its matrices into a new SharedMemory block."""
+    payload = problem.model_dump_json().encode()
+    arrays: dict[str, np.ndarray] = {}
+    if costs is not None:
+        arrays["distance_m"] = costs.distance_m
+        if problem.distance_metric == DistanceMetric.road:
+            arrays["time_s"] = costs.time_s  # measured on the graph, not derivable
+
+    layout: dict = {"problem": (0, len(payload)), "avg_speed_kmh": problem.avg_speed_kmh}
+    offset = -(-len(payload) // _ALIGN) * _ALIGN
+    for name, array in arrays.items():
+        layout[name] = (offset, array.shape)
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    shm.buf[: len(payload)] = payload
+    for name, array in arrays.items():
+        start, shape = layout[name]
+        view = np.ndarray(shape, dtype=np.int32, buffer=shm.buf, offset=start)
+        view[...] = array
+        del view
+    return shm, layout
+
+
+def _unpack(buf: memoryview, layout: dict) -> tuple[RoutingProblem, CostBundle | None]:
+    """Rebuild the problem and a zero-copy CostBundle over the shared block."""
+    start, size = layout["problem"]
+    problem = RoutingProblem.model_validate_json(bytes(buf[start : start + size]))
+    if "distance_m" not in layout:
+        return problem, None
+
+    def array(name):
+        offset, shape = layout[name]
+        return np.ndarray(shape, dtype=np.int32, buffer=buf, offset=offset)
+
+    time_s = array("time_s") if "time_s" in layout else None
+    return problem, CostBundle(array("distance_m"), avg_speed_kmh=layout["avg_speed_kmh"], time_s=time_s)
+
+
+# ── Worker process ──
+
+def _rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _worker_main(conn) -> None:
+    """
+    Solve jobs from the pipe until told to stop (None) or the parent goes away.
+
+    Messages to the parent: ("ready", rss), then per job any number of
+    ("solution", update_json) followed by ("result", result_json, rss).
+    """
+    conn.send(("ready", _rss_bytes()))
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+
+        shm_name, layout, solver, stream = job
+        on_solution = None
+        if stream:
+            def on_solution(update):
+                conn.send(("solution", update.model_dump_json()))
+
+        shm = shared_memory.SharedMemory(name=shm_name)
+        try:
+            problem, costs = _unpack(shm.buf, layout)
+            result = solver.solve_sync(problem, costs, on_solution)
+        except Exception as e:
+            result = SolverResult(success=False, error=str(e))
+        finally:
+            # Views into the block must be gone before it can be closed
+            costs = None
+            shm.close()
+        conn.send(("result", result.model_dump_json(), _rss_bytes()))
+
+
+# ── Parent side ──
+
+class WorkerCrashed(RuntimeError):
+    """A worker process exited while solving."""
+
+
+async def _recv(conn):
+    """Await the next message on a pipe without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    ready = loop.create_future()
+    fd = conn.fileno()
+    loop.add_reader(fd, lambda: ready.done() or ready.set_result(None))
+    try:
+        await ready
+    finally:
+        loop.remove_reader(fd)
+    return conn.recv()
+
+
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        self.solves = 0
+        self.rss = 0
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.conn.close()
+
+
+class SolverExecutor:
+    """Pool of pre-warmed solver processes, used from an asyncio event loop."""
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        max_solves: int = DEFAULT_MAX_SOLVES,
+        max_rss_mb: int = DEFAULT_MAX_RSS_MB,
+        start_method: str = "spawn",
+    ):
+        if workers < 1:
+            raise ValueError("SolverExecutor needs at least one worker")
+        self.workers = workers
+        self.max_solves = max_solves
+        self.max_rss_bytes = max_rss_mb * 1024**2
+        self._ctx = multiprocessing.get_context(start_method)
+        self._idle: asyncio.Queue[_Worker] = asyncio.Queue()
+        self._all: set[_Worker] = set()
+        self._background: set[asyncio.Task] = set()
+        self.recycled = 0
+
+    async def start(self) -> None:
+        """Start every worker and wait until each has imported the engine."""
+        await asyncio.gather(*(self._spawn() for _ in range(self.workers)))
+
+    async def shutdown(self) -> None:
+        """Stop all workers; busy ones are killed after a short grace period."""
+        for task in self._background:
+            task.cancel()
+        while not self._idle.empty():
+            self._idle.get_nowait()
+        await asyncio.gather(*(self._retire(w) for w in list(self._all)), return_exceptions=True)
+
+    async def solve(
+        self,
+        solver: ClassicalSolver | DecompositionSolver | PortfolioSolver,
+        problem: RoutingProblem,
+        on_solution: Callable[[SolutionUpdate], None] | None = None,
+    ) -> SolverResult:
+        """
+        Run `solver` on `problem` in a worker process.
+
+        If `on_solution` is given it is called on the event loop with each
+        improved solution as the search finds it. To stop early, cancel
+        the awaiting task.
+        """
+        if isinstance(solver, (DecompositionSolver, PortfolioSolver)):
+            return await self._solve_steps(solver, problem, on_solution)
+
+        shm = worker = None
+        try:
+            costs, matrix_ms = None, 0
+            if problem.stop_count >= 2 and solver.uses_dense_costs(problem):
+                t0 = time.perf_counter()
+                costs = await asyncio.to_thread(CostBundle.for_problem, problem)
+                matrix_ms = int((time.perf_counter() - t0) * 1000)
+            shm, layout = _pack(problem, costs)
+
+            worker = await self._idle.get()
+            worker.conn.send((shm.name, layout, solver, on_solution is not None))
+            while True:
+                kind, *message = await _recv(worker.conn)
+                if kind == "result":
+                    payload, worker.rss = message
+                    break
+                on_solution(SolutionUpdate.model_validate_json(message[0]))
+        except BaseException as e:
+            if worker is None:
+                raise  # cancelled before a worker was taken: nothing to clean up but the block
+            # Cancelled mid-search, or the worker died: it cannot be reused
+            self._replace(worker)
+            if isinstance(e, (EOFError, OSError)):
+                raise WorkerCrashed(f"Solver worker exited unexpectedly (exit code {worker.process.exitcode})") from e
+            raise
+        finally:
+            # Also on a cancel while queued for a worker or building costs
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+        self._release(worker)
+        result = SolverResult.model_validate_json(payload)
+        if result.metrics is not None and matrix_ms:
+            # Built here rather than in the worker: still the solve's matrix phase
+            phases = result.metrics.phases_ms
+            phases["matrix"] = phases.get("matrix", 0) + matrix_ms
+        return result
+
+    async def _solve_steps(
+        self, solver: DecompositionSolver | PortfolioSolver, problem: RoutingProblem, on_solution
+    ) -> SolverResult:
+        """Drive a solver's steps (engine/parallel.py), each batch spread over the workers."""
+        steps = solver.steps(problem, on_solution)
+        try:
+            batch = next(steps)
+            while True:
+                results = await asyncio.gather(*(
+                    self.solve(sub_solver, sub_problem, relay) for sub_solver, sub_problem, relay in batch
+                ))
+                batch = steps.send(list(results))
+        except StopIteration as done:
+            return done.value
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._all),
+            "idle": self._idle.qsize(),
+            "recycled": self.recycled,
+            "rss_mb": {w.process.pid: round(w.rss / 1024**2, 1) for w in self._all},
+        }
+
+    # ── Worker lifecycle ──
+
+    async def _spawn(self) -> None:
+        worker = _Worker(self._ctx)
+        self._all.add(worker)
+        try:
+            _, worker.rss = await _recv(worker.conn)  # ("ready", rss)
+        except BaseException:
+            self._all.discard(worker)
+            worker.kill()
+            raise
+        self._idle.put_nowait(worker)
+
+    def _release(self, worker: _Worker) -> None:
+        worker.solves += 1
+        if worker.solves >= self.max_solves or worker.rss > self.max_rss_bytes:
+            self.recycled += 1
+            self._in_background(self._retire(worker))
+            self._in_background(self._spawn())
+        else:
+            self._idle.put_nowait(worker)
+
+    def _replace(self, worker: _Worker) -> None:
+        self._all.discard(worker)
+        worker.kill()
+        self._in_background(asyncio.to_thread(worker.process.join))
+        self._in_background(self._spawn())
+
+    async def _retire(self, worker: _Worker) -> None:
+        self._all.discard(worker)
+        with contextlib.suppress(OSError):
+            worker.conn.send(None)
+        await asyncio.to_thread(worker.process.join, _STOP_GRACE_SECONDS)
+        if worker.process.is_alive():
+            worker.kill()
+            await asyncio.to_thread(worker.process.join)
+        worker.conn.close()
+
+    def _in_background(self, coro) -> None:
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
@@ -0,0 +1,368 @@
+"""
+OmniRoute AI — Fast Solver (pure NumPy)
+
+Importing OR-Tools and building a RoutingModel costs more than the
+whole search on a small interactive request (a driver reordering 15
+stops). This solver needs nothing beyond NumPy:
+
+  1. Construction: Clarke–Wright savings. The savings of every pair of
+     stops come from one array expression; routes are merged in
+     descending order of savings while the merged route stays
+     feasible. If that leaves more routes than vehicles (tight time
+     windows), the smallest routes are dissolved into the others by
+     cheapest feasible insertion.
+  2. Improvement, per route, to a local optimum: 2-opt (segment
+     reversal, correct for asymmetric road matrices through forward
+     and backward prefix sums) and Or-opt (moving runs of 1–3 stops).
+     Every move's gain is evaluated for all positions at once.
+
+Constraints are those ClassicalSolver enforces, with the same
+semantics: the largest vehicle capacity, the first vehicle's max
+distance and time windows (engine/time_windows.py). It also runs when
+OR-Tools is not installed, for every problem (see engine/selector.py).
+"""
+
+import time
+from collections.abc import Callable
+
+import numpy as np
+
+from engine.costs import CostBundle
+from engine.instrumentation import PhaseTimer
+from engine.models import (
+    OptimizedStop,
+    RoutingProblem,
+    SearchStats,
+    SolutionUpdate,
+    SolverMetrics,
+    SolverResult,
+    SolverType,
+)
+from engine.time_windows import TimeWindows
+
+
+# Longest run of stops Or-opt moves
+OR_OPT_MAX_RUN = 3
+
+# Improving moves tried, best first, before giving up on a constrained route
+_MAX_CANDIDATE_MOVES = 32
+
+
+class _Constraints:
+    """Feasibility of a single route (nodes without the depot)."""
+
+    def __init__(self, problem: RoutingProblem, costs: CostBundle, windows: TimeWindows | None):
+        self.depot = problem.depot_index
+        self.demand = problem.columns.demand_kg
+        capacity = max(v.capacity_kg for v in problem.vehicles)
+        self.capacity = capacity if capacity > 0 else None
+        self.max_distance_m = int(problem.vehicles[0].max_distance_km * 1000)
+        self.distance_m = costs.distance_m
+        self.windows = windows
+
+    def load(self, route: list[int]) -> float:
+        return float(self.demand[route].sum())
+
+    def length_m(self, route: list[int]) -> int:
+        path = [self.depot, *route, self.depot]
+        return int(self.distance_m[path[:-1], path[1:]].sum())
+
+    def schedule(self, route: list[int]) -> list[int] | None:
+        """Service start (seconds of day) at each stop, or None if a window is missed."""
+        w = self.windows
+        t = int(w.earliest[self.depot])
+        starts, prev = [], self.depot
+        for node in route:
+            t = max(int(w.earliest[node]), t + int(w.transit_s[prev, node]))
+            if t > w.latest[node]:
+                return None
+            starts.append(t)
+            prev = node
+        if t + w.transit_s[prev, self.depot] > w.latest[self.depot]:
+            return None
+        return starts
+
+    def ok(self, route: list[int], check_load: bool = True) -> bool:
+        if check_load and self.capacity is not None and self.load(route) > self.capacity:
+            return False
+        if self.length_m(route) > self.max_distance_m:
+            return False
+        return self.windows is None or self.schedule(route) is not None
+
+
+class FastSolver:
+    """Savings construction + 2-opt / Or-opt local search, no OR-Tools."""
+
+    def __init__(self):
+        self.strategy = "fast"
+        self._last_metrics: SolverMetrics | None = None
+
+    async def solve(self, problem: RoutingProblem) -> SolverResult:
+        """Solve on the calling thread; small problems take milliseconds."""
+        return self.solve_sync(problem)
+
+    def uses_dense_costs(self, problem: RoutingProblem) -> bool:
+        return True
+
+    def solve_sync(
+        self,
+        problem: RoutingProblem,
+        costs: CostBundle | None = None,
+        on_solution: Callable[[SolutionUpdate], bool | None] | None = None,
+    ) -> SolverResult:
+        """Blocking solve. `on_solution` gets the final plan (there is no longer search to stream)."""
+        start_time = time.perf_counter()
+        if problem.stop_count < 2:
+            return SolverResult(success=False, error="Need at least 2 stops to optimize")
+
+        timer = PhaseTimer()
+        try:
+            with timer.phase("matrix"):
+                if costs is None:
+                    costs = CostBundle.for_problem(problem)
+                cost = costs.layer(problem.optimize_for, problem.vehicles[0].cost_per_km).astype(np.int64)
+                windows = TimeWindows(problem, costs.time_s) if problem.has_time_windows else None
+                constraints = _Constraints(problem, costs, windows)
+
+            with timer.phase("search"):
+                routes = self._savings(problem, cost, constraints)
+                routes = self._eliminate(routes, len(problem.vehicles), cost, constraints, problem.depot_index)
+                # A stop no route could take stays alone, possibly over capacity or out of reach
+                feasible = len(routes) <= len(problem.vehicles) and all(constraints.ok(route) for route in routes)
+                if feasible:
+                    routes = [self._improve(route, cost, constraints, problem.depot_index) for route in routes]
+            if not feasible:
+                self._last_metrics = self._metrics(problem, start_time, phases_ms=timer.phases_ms)
+                return SolverResult(success=False, error="No solution found. Try relaxing constraints.")
+            return self._result(problem, routes, cost, costs, constraints, start_time, on_solution, timer)
+
+        except Exception as e:
+            self._last_metrics = self._metrics(problem, start_time, phases_ms=timer.phases_ms)
+            return SolverResult(success=False, error=str(e))
+
+    # ── Construction ──
+
+    def _savings(self, problem: RoutingProblem, cost: np.ndarray, constraints: _Constraints) -> list[list[int]]:
+        """Clarke–Wright: merge route ends in descending order of savings."""
+        depot = problem.depot_index
+        nodes = np.array([i for i in range(problem.stop_count) if i != depot])
+        symmetric = np.array_equal(cost, cost.T)
+
+        # savings[i, j]: what joining "… i" to "j …" saves over two depot round trips
+        savings = cost[nodes, depot][:, None] + cost[depot, nodes][None, :] - cost[np.ix_(nodes, nodes)]
+        np.fill_diagonal(savings, np.iinfo(np.int64).min)
+        order = np.argsort(savings, axis=None)[::-1]
+        tails, heads = nodes[order // nodes.size], nodes[order % nodes.size]
+        values = savings.ravel()[order]
+
+        route_of = {int(n): [int(n)] for n in nodes}
+        routes = len(route_of)
+        for i, j, value in zip(tails.tolist(), heads.tolist(), values.tolist()):
+            if i == j or (value <= 0 and routes <= len(problem.vehicles)):
+                break
+            a, b = route_of[i], route_of[j]
+            if a is b:
+                continue
+            if a[-1] != i:
+                if not (symmetric and a[0] == i):
+                    continue
+                a = a[::-1]
+            if b[0] != j:
+                if not (symmetric and b[-1] == j):
+                    continue
+                b = b[::-1]
+            merged = a + b
+            if not constraints.ok(merged):
+                continue
+            for node in merged:
+                route_of[node] = merged
+            routes -= 1
+
+        unique = {id(r): r for r in route_of.values()}
+        return list(unique.values())
+
+    def _eliminate(
+        self, routes: list[list[int]], vehicles: int, cost: np.ndarray, constraints: _Constraints, depot: int
+    ) -> list[list[int]]:
+        """Dissolve the smallest routes into the others until every route has a vehicle."""
+        routes = sorted(routes, key=len)
+        tried = 0
+        while len(routes) > vehicles and tried < len(routes):
+            victim, others = routes[tried], routes[:tried] + routes[tried + 1:]
+            others = [list(r) for r in others]
+            for node in victim:
+                if not self._insert(node, others, cost, constraints, depot):
+                    tried += 1  # this one cannot go; try the next smallest
+                    break
+            else:
+                routes, tried = sorted(others, key=len), 0
+        return routes
+
+    def _insert(self, node: int, routes: list[list[int]], cost: np.ndarray, constraints: _Constraints, depot: int):
+        """Cheapest feasible insertion of `node` into one of `routes`, in place; False if none."""
+        options = []
+        for r, route in enumerate(routes):
+            path = np.array([depot, *route, depot])
+            deltas = cost[path[:-1], node] + cost[node, path[1:]] - cost[path[:-1], path[1:]]
+            options.extend((int(delta), r, position) for position, delta in enumerate(deltas.tolist()))
+        for _, r, position in sorted(options)[:_MAX_CANDIDATE_MOVES * 4]:
+            candidate = routes[r][:position] + [node] + routes[r][position:]
+            if constraints.ok(candidate):
+                routes[r] = candidate
+                return True
+        return False
+
+    # ── Improvement ──
+
+    def _improve(self, route: list[int], cost: np.ndarray, constraints: _Constraints, depot: int) -> list[int]:
+        """2-opt and Or-opt until neither finds an improving feasible move."""
+        while True:
+            for moves in (self._two_opt_moves, self._or_opt_moves):
+                improved = None
+                for candidate in moves(route, cost, depot):
+                    # Reordering keeps the load; only distance and windows can break
+                    if constraints.ok(candidate, check_load=False):
+                        improved = candidate
+                        break
+                if improved is not None:
+                    route = improved
+                    break
+            else:
+                return route
+
+    def _two_opt_moves(self, route: list[int], cost: np.ndarray, depot: int):
+        """Improving segment reversals, best first."""
+        path = np.array([depot, *route, depot])
+        m = len(route)
+        if m < 2:
+            return
+        fwd = np.concatenate(([0], np.cumsum(cost[path[:-1], path[1:]])))
+        bwd = np.concatenate(([0], np.cumsum(cost[path[1:], path[:-1]])))
+
+        # Reverse path[a..b] (1 ≤ a < b ≤ m)
+        a = np.arange(1, m + 1)[:, None]
+        b = np.arange(1, m + 1)[None, :]
+        delta = (
+            cost[path[a - 1], path[b]] + cost[path[a], path[b + 1]] + (bwd[b] - bwd[a])
+            - cost[path[a - 1], path[a]] - cost[path[b], path[b + 1]] - (fwd[b] - fwd[a])
+        )
+        delta = np.where(b > a, delta, 0)
+        for flat in np.argsort(delta, axis=None)[:_MAX_CANDIDATE_MOVES]:
+            i, j = divmod(int(flat), m)
+            if delta[i, j] >= 0:
+                return
+            yield route[:i] + route[i:j + 1][::-1] + route[j + 1:]
+
+    def _or_opt_moves(self, route: list[int], cost: np.ndarray, depot: int):
+        """Improving moves of a run of 1–3 stops elsewhere in the route, best first."""
+        path = np.array([depot, *route, depot])
+        m = len(route)
+        candidates = []
+        for run in range(1, min(OR_OPT_MAX_RUN, m - 1) + 1):
+            a = np.arange(1, m - run + 2)[:, None]  # run is path[a .. a + run - 1]
+            q = np.arange(0, m + 1)[None, :]        # insert between path[q] and path[q + 1]
+            last = a + run - 1
+            removal = cost[path[a - 1], path[a]] + cost[path[last], path[last + 1]] - cost[path[a - 1], path[last + 1]]
+            insertion = cost[path[q], path[a]] + cost[path[last], path[q + 1]] - cost[path[q], path[q + 1]]
+            delta = np.where((q < a - 1) | (q > last), insertion - removal, 0)
+            best = np.argsort(delta, axis=None)[:_MAX_CANDIDATE_MOVES]
+            candidates.extend((int(delta.flat[f]), run, *divmod(int(f), m + 1)) for f in best if delta.flat[f] < 0)
+
+        for _, run, i, q in sorted(candidates)[:_MAX_CANDIDATE_MOVES]:
+            start = i  # route index of path[i + 1]
+            segment = route[start:start + run]
+            rest = route[:start] + route[start + run:]
+            # path[q] is route[q - 1]; positions after the run shift left by `run`
+            at = q if q < start + 1 else q - run
+            yield rest[:at] + segment + rest[at:]
+
+    # ── Result ──
+
+    def _result(self, problem, routes, cost, costs, constraints, start_time, on_solution, timer) -> SolverResult:
+        with timer.phase("extraction"):
+            all_routes, total_m, total_s, objective = self._extract(problem, routes, cost, costs, constraints)
+
+        total_distance_km = round(total_m / 1000, 2)
+        self._last_metrics = self._metrics(
+            problem,
+            start_time,
+            total_distance_km=total_distance_km,
+            total_duration_min=round(total_s / 60, 1),
+            stops_optimized=problem.stop_count,
+            quality_score=min(100.0, round(80 + (20 * (1 - total_distance_km / max(total_distance_km * 1.3, 1))), 1)),
+            objective=objective,
+            phases_ms=timer.phases_ms,
+            # One answer, no search tree: the improvement loop stops at its local optimum
+            search=SearchStats(solutions=1, trace=[(timer.phases_ms["matrix"] + timer.phases_ms["search"], objective)]),
+        )
+        if on_solution is not None:
+            ids = problem.columns.ids
+            depot_id = ids[problem.depot_index]
+            on_solution(SolutionUpdate(
+                elapsed_ms=self._last_metrics.execution_time_ms,
+                objective=objective,
+                total_distance_km=total_distance_km,
+                routes=[[depot_id, *ids[route].tolist(), depot_id] for route in routes],
+            ))
+        return SolverResult(success=True, routes=all_routes, metrics=self._last_metrics)
+
+    def _extract(self, problem, routes, cost, costs, constraints):
+        """(OptimizedStop routes, total metres, total seconds, objective) of the plan."""
+        depot = problem.depot_index
+        time_s = costs.time_s
+        columns = problem.columns
+        service_s = columns.service_time_min * 60
+        all_routes, total_m, total_s, objective = [], 0, 0, 0
+        for route in routes:
+            path = [depot, *route, depot]
+            starts = constraints.schedule(route) if constraints.windows is not None else None
+            depart = 0
+            if starts is not None:
+                # Leave just in time for the first stop instead of waiting there
+                w = constraints.windows
+                depart = max(int(w.earliest[depot]), starts[0] - int(w.transit_s[depot, route[0]]))
+
+            stops, clock, prev = [], depart, depot
+            for order, node in enumerate(path[:-1]):
+                if order:
+                    # Service at the previous stop, then the drive; windows may add waiting
+                    clock += (int(service_s[prev]) if order > 1 else 0) + int(time_s[prev, node])
+                    if starts is not None:
+                        clock = starts[order - 1]
+                stops.append(OptimizedStop(
+                    stop_id=columns.ids[node],
+                    order=order,
+                    lat=float(columns.lat[node]),
+                    lng=float(columns.lng[node]),
+                    arrival_eta_min=round((clock - depart) / 60, 1),
+                    distance_from_prev_km=round(int(costs.distance_m[prev, node]) / 1000, 2),
+                ))
+                prev = node
+            all_routes.append(stops)
+
+            total_m += int(costs.distance_m[path[:-1], path[1:]].sum())
+            # Departure to return, waiting included
+            total_s += clock + int(service_s[prev]) + int(time_s[prev, depot]) - depart
+            objective += int(cost[path[:-1], path[1:]].sum())
+
+        return all_routes, total_m, total_s, objective
+
+    def _metrics(self, problem: RoutingProblem, start_time: float, **values) -> SolverMetrics:
+        return SolverMetrics(
+            solver_type=SolverType.classical,
+            strategy=self.strategy,
+            execution_time_ms=int((time.perf_counter() - start_time) * 1000),
+            **values,
+        )
+
+    async def validate(self, result: SolverResult) -> bool:
+        """Check that the result is valid (all stops visited)."""
+        if not result.success:
+            return False
+        return len(result.routes) > 0
+
+    def get_metrics(self) -> SolverMetrics:
+        """Return metrics from the last solve run."""
+        if self._last_metrics is None:
+            return SolverMetrics(solver_type=SolverType.classical, strategy=self.strategy)
+        return self._last_metrics
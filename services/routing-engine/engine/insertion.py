@@ -0,0 +1,352 @@
+"""
+OmniRoute AI — Live Stop Insertion
+
+A pickup that arrives mid-shift joins a plan that is already
+optimized; re-running the whole search for it costs seconds.
+InsertionSolver keeps the plan (problem.initial_routes, stop ids per
+vehicle, mapped as in engine/warm_start.py) in its order and places
+every stop the plan does not cover by cheapest feasible insertion:
+
+  - arcs: only the k new stops' rows and columns (n × k great-circle
+    distances) and the plan's own legs are computed, never the n²
+    matrix. The road metric has no partial query, so there the full
+    matrices come through the matrix caches instead.
+  - positions: each round scores every remaining new stop at every gap
+    of every route in one (gaps × new stops) array expression and
+    inserts the cheapest feasible one.
+  - feasibility: the largest vehicle capacity, the first vehicle's max
+    distance and time windows, as in FastSolver: the new stop must
+    start service in its window after the earliest start at the stop
+    before it, and leave the stop after it its latest start that keeps
+    the rest of the route on time.
+
+When a stop fits nowhere, or the insertions add more than
+`max_added_ratio` of the plan's cost, the solve fails with the reason:
+the caller should re-solve in full, warm-started from the plan.
+"""
+
+import time
+from collections.abc import Callable
+
+import numpy as np
+
+from engine.costs import CostBundle
+from engine.distance import haversine_km_array, stop_coordinates
+from engine.instrumentation import PhaseTimer
+from engine.models import (
+    CostObjective,
+    DistanceMetric,
+    OptimizedStop,
+    RoutingProblem,
+    SearchStats,
+    SolutionUpdate,
+    SolverMetrics,
+    SolverResult,
+    SolverType,
+)
+from engine.time_windows import service_seconds, window_bounds
+from engine.warm_start import prior_node_routes
+
+
+# Insertions adding more than this share of the plan's cost call for a re-solve
+DEFAULT_MAX_ADDED_RATIO = 0.15
+
+# (distance_m, time_s, cost) of the same arcs, int64
+Layers = tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class _Arcs:
+    """
+    Distance, time and objective cost of the arcs insertion looks at:
+    blocks into and out of the new stops, (n, k) with one column per
+    new stop, and the legs between any given nodes.
+    """
+
+    def __init__(self, problem: RoutingProblem, new: np.ndarray, costs: CostBundle | None):
+        self.objective = problem.optimize_for
+        self.cost_per_km = problem.vehicles[0].cost_per_km
+        self.avg_speed_kmh = problem.avg_speed_kmh
+        self.costs = costs
+        if costs is None:
+            self.lats, self.lngs = stop_coordinates(problem.columns)
+            # Great-circle distances are symmetric: one block serves both directions
+            self.into = self.out_of = self.legs(np.arange(problem.stop_count)[:, None], new[None, :])
+        else:
+            self.into = self.legs(np.arange(problem.stop_count)[:, None], new[None, :])
+            self.out_of = self.legs(new[None, :], np.arange(problem.stop_count)[:, None])
+
+    def legs(self, a: np.ndarray, b: np.ndarray) -> Layers:
+        """Layers of the arcs a → b (broadcasting), in CostBundle's units and rounding."""
+        if self.costs is not None:
+            return self._layers(self.costs.distance_m[a, b], self.costs.time_s[a, b])
+        km = haversine_km_array(self.lats[a], self.lngs[a], self.lats[b], self.lngs[b])
+        return self._layers((km * 1000.0).astype(np.int32))
+
+    def _layers(self, distance_m: np.ndarray, time_s: np.ndarray | None = None) -> Layers:
+        if time_s is None:
+            time_s = (distance_m * (3.6 / self.avg_speed_kmh)).astype(np.int32)
+        if self.objective == CostObjective.time:
+            cost = time_s
+        elif self.objective == CostObjective.fuel:
+            cost = (distance_m * (self.cost_per_km / 10.0)).astype(np.int32)
+        else:
+            cost = distance_m
+        return distance_m.astype(np.int64), time_s.astype(np.int64), cost.astype(np.int64)
+
+
+class _Plan:
+    """Routes being extended: per-route path (depot at both ends), legs, load and schedule."""
+
+    def __init__(self, problem: RoutingProblem, routes: list[list[int]], arcs: _Arcs):
+        self.depot = problem.depot_index
+        self.arcs = arcs
+        self.demand = problem.columns.demand_kg
+        capacity = max(v.capacity_kg for v in problem.vehicles)
+        self.capacity = capacity if capacity > 0 else np.inf
+        self.max_distance_m = int(problem.vehicles[0].max_distance_km * 1000)
+        self.timed = problem.has_time_windows
+        self.service_s = service_seconds(problem)
+        self.earliest, self.latest = window_bounds(problem)
+
+        self.paths: list[np.ndarray] = []
+        self.legs: list[Layers] = []
+        self.schedules: list[tuple[np.ndarray, np.ndarray]] = []
+        for route in routes:
+            self._set_route(len(self.paths), np.array([self.depot, *route, self.depot]))
+        self.loads = np.array([self.demand[path[1:-1]].sum() for path in self.paths], dtype=np.float64)
+
+    @property
+    def cost(self) -> int:
+        return int(sum(legs[2].sum() for legs in self.legs))
+
+    @property
+    def lengths_m(self) -> np.ndarray:
+        return np.array([legs[0].sum() for legs in self.legs], dtype=np.int64)
+
+    def _set_route(self, r: int, path: np.ndarray) -> None:
+        legs = self.arcs.legs(path[:-1], path[1:])
+        schedule = self._schedule(path, legs[1])
+        if r == len(self.paths):
+            self.paths.append(path)
+            self.legs.append(legs)
+            self.schedules.append(schedule)
+        else:
+            self.paths[r], self.legs[r], self.schedules[r] = path, legs, schedule
+
+    def _schedule(self, path: np.ndarray, leg_s: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Earliest service start at each position (forward pass, waiting
+        allowed) and the latest start that keeps the rest of the route on
+        time (backward pass); the depot closes the route at its window's end.
+        """
+        nodes = path.tolist()
+        service = self.service_s[path[:-1]]
+        if not self.timed:
+            service[0] = 0  # as in FastSolver, the depot's own service only counts against windows
+        transit = (service + leg_s).tolist()
+        earliest, latest = self.earliest[path].tolist(), self.latest[path].tolist()
+        start = [earliest[0]]
+        for k in range(1, len(nodes)):
+            start.append(max(earliest[k], start[-1] + transit[k - 1]))
+        deadline = [latest[-1]]
+        for k in range(len(nodes) - 2, -1, -1):
+            deadline.append(min(latest[k], deadline[-1] - transit[k]))
+        return np.array(start, dtype=np.int64), np.array(deadline[::-1], dtype=np.int64)
+
+    def cheapest(self, new: np.ndarray, columns: np.ndarray) -> tuple[int, int, int] | None:
+        """
+        (column, route, position) of the cheapest feasible insertion of
+        any of the new stops new[columns] into any gap, or None.
+        """
+        sizes = np.array([len(path) - 1 for path in self.paths])
+        before = np.concatenate([path[:-1] for path in self.paths])
+        after = np.concatenate([path[1:] for path in self.paths])
+        route_of = np.repeat(np.arange(len(self.paths)), sizes)
+        leg_m, _, leg_cost = (np.concatenate(layer) for layer in zip(*self.legs))
+        into_m, into_s, into_cost = (block[before][:, columns] for block in self.arcs.into)
+        out_m, out_s, out_cost = (block[after][:, columns] for block in self.arcs.out_of)
+        nodes = new[columns]
+
+        # (gaps, candidates): what each insertion adds, and whether the route still holds
+        added_m = into_m + out_m - leg_m[:, None]
+        added_cost = into_cost + out_cost - leg_cost[:, None]
+        ok = self.loads[route_of][:, None] + self.demand[nodes][None, :] <= self.capacity
+        ok &= self.lengths_m[route_of][:, None] + added_m <= self.max_distance_m
+        if self.timed:
+            start = np.concatenate([s[:-1] for s, _ in self.schedules])
+            deadline = np.concatenate([d[1:] for _, d in self.schedules])
+            node_start = np.maximum(self.earliest[nodes][None, :], (start + self.service_s[before])[:, None] + into_s)
+            ok &= node_start <= self.latest[nodes][None, :]
+            ok &= node_start + self.service_s[nodes][None, :] + out_s <= deadline[:, None]
+        if not ok.any():
+            return None
+
+        gap, column = divmod(int(np.argmin(np.where(ok, added_cost, np.iinfo(np.int64).max))), len(columns))
+        r = int(route_of[gap])
+        return int(columns[column]), r, gap - int(sizes[:r].sum())
+
+    def insert(self, node: int, r: int, position: int) -> None:
+        """Put `node` after the position-th stop of route r (0: right after the depot)."""
+        self._set_route(r, np.insert(self.paths[r], position + 1, node))
+        self.loads[r] += self.demand[node]
+
+
+class InsertionSolver:
+    """Cheapest feasible insertion of new stops into an existing plan, no search."""
+
+    def __init__(self, max_added_ratio: float = DEFAULT_MAX_ADDED_RATIO):
+        self.strategy = "insertion"
+        self.max_added_ratio = max_added_ratio
+        self._last_metrics: SolverMetrics | None = None
+
+    async def solve(self, problem: RoutingProblem) -> SolverResult:
+        """Solve on the calling thread; takes milliseconds."""
+        return self.solve_sync(problem)
+
+    def uses_dense_costs(self, problem: RoutingProblem) -> bool:
+        """Only road distances need full matrices; great-circle arcs are computed as needed."""
+        return problem.distance_metric == DistanceMetric.road
+
+    def solve_sync(
+        self,
+        problem: RoutingProblem,
+        costs: CostBundle | None = None,
+        on_solution: Callable[[SolutionUpdate], bool | None] | None = None,
+    ) -> SolverResult:
+        """Blocking solve. `on_solution` gets the final plan, as from FastSolver."""
+        start_time = time.perf_counter()
+        if problem.stop_count < 2:
+            return SolverResult(success=False, error="Need at least 2 stops to optimize")
+        if not problem.initial_routes:
+            return SolverResult(success=False, error="No plan to insert into: initial_routes is empty")
+
+        timer = PhaseTimer()
+        try:
+            with timer.phase("matrix"):
+                routes = prior_node_routes(problem, problem.initial_routes)
+                routed = np.zeros(problem.stop_count, dtype=bool)
+                routed[[problem.depot_index, *(node for route in routes for node in route)]] = True
+                new = np.flatnonzero(~routed)
+                if costs is None and self.uses_dense_costs(problem):
+                    costs = CostBundle.for_problem(problem)
+                arcs = _Arcs(problem, new, costs)
+
+            with timer.phase("model"):
+                plan = _Plan(problem, routes, arcs)
+                base_cost = plan.cost
+
+            with timer.phase("search"):
+                error = self._insert_all(problem, plan, new)
+            if error is not None:
+                self._last_metrics = self._metrics(problem, start_time, phases_ms=timer.phases_ms)
+                return SolverResult(success=False, error=error)
+            return self._result(problem, plan, base_cost, start_time, on_solution, timer)
+
+        except Exception as e:
+            self._last_metrics = self._metrics(problem, start_time, phases_ms=timer.phases_ms)
+            return SolverResult(success=False, error=str(e))
+
+    def _insert_all(self, problem: RoutingProblem, plan: _Plan, new: np.ndarray) -> str | None:
+        """Insert every new stop, cheapest first; the reason to re-solve instead, if any."""
+        base_cost = plan.cost
+        remaining = np.arange(len(new))
+        while remaining.size:
+            best = plan.cheapest(new, remaining)
+            if best is None:
+                ids = ", ".join(problem.columns.ids[new[remaining[:5]]])
+                return f"Stop(s) {ids} fit in no route of the plan; re-solve"
+            column, r, position = best
+            plan.insert(int(new[column]), r, position)
+            remaining = remaining[remaining != column]
+
+        added = plan.cost - base_cost
+        if added > self.max_added_ratio * base_cost:
+            share = f"{added / base_cost:.0%}" if base_cost else "all"
+            return (
+                f"Inserting {len(new)} stop(s) adds {share} of the plan's cost "
+                f"(limit {self.max_added_ratio:.0%}); re-solve"
+            )
+        return None
+
+    # ── Result ──
+
+    def _result(self, problem, plan: _Plan, base_cost: int, start_time, on_solution, timer) -> SolverResult:
+        with timer.phase("extraction"):
+            all_routes, total_m, total_s = self._extract(problem, plan)
+            objective = plan.cost
+
+        total_distance_km = round(total_m / 1000, 2)
+        self._last_metrics = self._metrics(
+            problem,
+            start_time,
+            total_distance_km=total_distance_km,
+            total_duration_min=round(total_s / 60, 1),
+            stops_optimized=problem.stop_count,
+            quality_score=min(100.0, round(80 + (20 * (1 - total_distance_km / max(total_distance_km * 1.3, 1))), 1)),
+            objective=objective,
+            phases_ms=timer.phases_ms,
+            # The plan as given, then with the new stops in
+            search=SearchStats(
+                solutions=1,
+                trace=[
+                    (timer.phases_ms["matrix"] + timer.phases_ms["model"], base_cost),
+                    (timer.phases_ms["matrix"] + timer.phases_ms["model"] + timer.phases_ms["search"], objective),
+                ],
+            ),
+        )
+        if on_solution is not None:
+            ids = problem.columns.ids
+            on_solution(SolutionUpdate(
+                elapsed_ms=self._last_metrics.execution_time_ms,
+                objective=objective,
+                total_distance_km=total_distance_km,
+                routes=[ids[path].tolist() for path in plan.paths if len(path) > 2],
+            ))
+        return SolverResult(success=True, routes=all_routes, metrics=self._last_metrics)
+
+    def _extract(self, problem: RoutingProblem, plan: _Plan):
+        """(OptimizedStop routes, total metres, total seconds) of the plan's non-empty routes."""
+        columns = problem.columns
+        all_routes, total_m, total_s = [], 0, 0
+        for path, (leg_m, leg_s, _), (start, _) in zip(plan.paths, plan.legs, plan.schedules):
+            if len(path) <= 2:
+                continue
+            depart = int(start[0])
+            if plan.timed:
+                # Leave just in time for the first stop instead of waiting there
+                depart = max(depart, int(start[1] - plan.service_s[path[0]] - leg_s[0]))
+            stops = []
+            for order, node in enumerate(path[:-1].tolist()):
+                clock = int(start[order]) if order else depart
+                stops.append(OptimizedStop(
+                    stop_id=columns.ids[node],
+                    order=order,
+                    lat=float(columns.lat[node]),
+                    lng=float(columns.lng[node]),
+                    arrival_eta_min=round((clock - depart) / 60, 1),
+                    distance_from_prev_km=round(int(leg_m[order - 1]) / 1000, 2) if order else 0.0,
+                ))
+            all_routes.append(stops)
+            total_m += int(leg_m.sum())
+            total_s += int(start[-1]) - depart  # departure to return, waiting included
+        return all_routes, total_m, total_s
+
+    def _metrics(self, problem: RoutingProblem, start_time: float, **values) -> SolverMetrics:
+        return SolverMetrics(
+            solver_type=SolverType.classical,
+            strategy=self.strategy,
+            execution_time_ms=int((time.perf_counter() - start_time) * 1000),
+            **values,
+        )
+
+    async def validate(self, result: SolverResult) -> bool:
+        """Check that the result is valid (all stops visited)."""
+        if not result.success:
+            return False
+        return len(result.routes) > 0
+
+    def get_metrics(self) -> SolverMetrics:
+        """Return metrics from the last solve run."""
+        if self._last_metrics is None:
+            return SolverMetrics(solver_type=SolverType.classical, strategy=self.strategy)
+        return self._last_metrics
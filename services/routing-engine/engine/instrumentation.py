@@ -0,0 +1,57 @@
+"""
+OmniRoute AI — Solver Instrumentation
+
+Where a slow solve spends its time. Solvers run in phases:
+
+  matrix      distance/time matrices (or the sparse candidate arcs)
+  model       OR-Tools model: dimensions, constraints, warm-start seed
+  search      the search itself (FastSolver: construction + local search)
+  extraction  reading routes and totals off the solution
+
+A PhaseTimer adds each phase's wall-clock milliseconds to
+SolverMetrics.phases_ms and calls every registered phase listener as
+the phase ends, e.g. to trace solves in a profiler. Listeners are per
+process: under SolverExecutor they run in the worker, while the
+timings come back to the caller in the metrics.
+"""
+
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+PHASES = ("matrix", "model", "search", "extraction")
+
+# (phase, milliseconds), called as each phase of a solve ends
+PhaseListener = Callable[[str, int], None]
+
+_listeners: list[PhaseListener] = []
+
+
+def add_phase_listener(listener: PhaseListener) -> None:
+    """Call `listener` at the end of every solve phase in this process."""
+    _listeners.append(listener)
+
+
+def remove_phase_listener(listener: PhaseListener) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+class PhaseTimer:
+    """Milliseconds per phase of one solve; a repeated phase accumulates."""
+
+    def __init__(self):
+        self.phases_ms: dict[str, int] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, int((time.perf_counter() - t0) * 1000))
+
+    def add(self, name: str, ms: int) -> None:
+        self.phases_ms[name] = self.phases_ms.get(name, 0) + ms
+        for listener in _listeners:
+            listener(name, ms)
@@ -0,0 +1,345 @@
+"""
+OmniRoute AI — Learned Solver Selection
+
+The rule-based selector gives every mid-size problem a 10 s guided
+local search. How much of those 10 s actually improves the plan
+depends on the instance: size, fleet, how tight capacity and time
+windows are. This model learns it from recorded solves and, for a
+latency SLO, picks the candidate (strategy + time limit) expected to
+give the best plan within it.
+
+History is one SolveRecord per solve, as JSON lines:
+
+  - `calibrate` replays sample problems under every candidate. A single
+    guided local search run on the longest budget, traced through
+    on_solution, yields the objective at every shorter budget too.
+  - The API exports completed optimization_jobs the same way
+    (app/workers/solver_history.py); those records add latency samples.
+
+`fit` groups records into buckets of similar problems (stop count
+band, time windows, constraint tightness) and keeps, per bucket and
+candidate, the p90 latency and the mean gap to the best objective
+found for the same problem. The model is a small JSON file, refit
+offline and loaded once per process from OMNIROUTE_SELECTOR_MODEL.
+
+Usage (from services/routing-engine):
+    python -m engine.learned_selector calibrate problems.jsonl history.jsonl
+    python -m engine.learned_selector fit history.jsonl model.json
+    python -m engine.learned_selector explain model.json problem.json --slo-ms 3000
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from engine.fast_solver import FastSolver
+from engine.models import RoutingProblem
+from engine.time_windows import DAY_SECONDS, window_bounds
+
+
+# Candidate → (strategy, time limit in seconds; None = until local optimum).
+# "fast" is FastSolver; the others are ClassicalSolver strategies
+CANDIDATES: dict[str, tuple[str, float | None]] = {
+    "fast": ("fast", None),
+    "first_solution": ("first_solution", None),
+    "guided_local_search@1s": ("guided_local_search", 1.0),
+    "guided_local_search@2s": ("guided_local_search", 2.0),
+    "guided_local_search@5s": ("guided_local_search", 5.0),
+    "guided_local_search@10s": ("guided_local_search", 10.0),
+    "guided_local_search@20s": ("guided_local_search", 20.0),
+}
+
+SIZE_BANDS = [50, 100, 200, 500, 1000]
+
+# Fewer samples than this in a bucket and the model backs off to a coarser one
+MIN_SAMPLES = 3
+
+
+# ── Features ─────────────────────────────────────────────────────
+
+def problem_features(problem: RoutingProblem) -> dict:
+    """What the model conditions on: size, fleet and constraint tightness."""
+    demand = float(problem.columns.demand_kg.sum())
+    capacity = sum(v.capacity_kg for v in problem.vehicles)
+    window_ratio = 1.0
+    if problem.has_time_windows:
+        earliest, latest = window_bounds(problem)
+        windowed = (earliest > 0) | (latest < DAY_SECONDS)
+        windowed[problem.depot_index] = False
+        if windowed.any():
+            window_ratio = float(np.mean((latest - earliest)[windowed]) / DAY_SECONDS)
+    return {
+        "stops": problem.stop_count,
+        "vehicles": len(problem.vehicles),
+        "demand_ratio": round(demand / capacity, 4) if capacity > 0 else 0.0,
+        "time_windows": problem.has_time_windows,
+        "window_ratio": round(window_ratio, 4),
+    }
+
+
+def problem_key(problem: RoutingProblem) -> str:
+    """Identity of a problem regardless of solver and warm start, to compare candidates on it."""
+    canonical = problem.model_dump(mode="json", exclude={"initial_routes"})
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode()).hexdigest()[:24]
+
+
+def _size_band(stops: int) -> str:
+    lower = 0
+    for upper in SIZE_BANDS:
+        if stops < upper:
+            return f"{lower}-{upper - 1}"
+        lower = upper
+    return f"{lower}+"
+
+
+def bucket_keys(features: dict) -> list[str]:
+    """Bucket keys from finest to coarsest."""
+    size = _size_band(features["stops"])
+    windows = "windows" if features["time_windows"] else "open"
+    tight = features["demand_ratio"] > 0.8 or features["window_ratio"] < 0.25
+    return [f"{size}|{windows}|{'tight' if tight else 'loose'}", f"{size}|{windows}", size]
+
+
+# ── History ──────────────────────────────────────────────────────
+
+class SolveRecord(BaseModel):
+    """One solve of a problem under one candidate."""
+    problem_key: str
+    features: dict
+    candidate: str
+    elapsed_ms: int
+    objective: int | None = None  # None when only the latency is known
+
+
+def calibrate(problems: list[RoutingProblem]) -> list[SolveRecord]:
+    """Replay problems under every candidate; guided local search runs once per problem."""
+    from engine.classical_solver import ClassicalSolver
+
+    longest = max(limit for _, limit in CANDIDATES.values() if limit is not None)
+    records = []
+    for problem in problems:
+        key, features = problem_key(problem), problem_features(problem)
+
+        for candidate, solver in (("fast", FastSolver()), ("first_solution", ClassicalSolver("first_solution"))):
+            t0 = time.perf_counter()
+            result = solver.solve_sync(problem)
+            if result.success:
+                records.append(SolveRecord(
+                    problem_key=key,
+                    features=features,
+                    candidate=candidate,
+                    elapsed_ms=int((time.perf_counter() - t0) * 1000),
+                    objective=result.metrics.objective,
+                ))
+
+        trace: list[tuple[int, int]] = []
+        t0 = time.perf_counter()
+        result = ClassicalSolver(strategy="guided_local_search", time_limit_s=longest).solve_sync(
+            problem, on_solution=lambda u, trace=trace: trace.append((u.elapsed_ms, u.objective))
+        )
+        if not result.success:
+            continue
+        # Model building and extraction, paid whatever the budget
+        overhead_ms = max(0, int((time.perf_counter() - t0) * 1000) - int(longest * 1000))
+        for candidate, (strategy, limit) in CANDIDATES.items():
+            if strategy != "guided_local_search":
+                continue
+            reached = [objective for elapsed_ms, objective in trace if elapsed_ms <= limit * 1000]
+            if reached:
+                records.append(SolveRecord(
+                    problem_key=key,
+                    features=features,
+                    candidate=candidate,
+                    elapsed_ms=int(limit * 1000) + overhead_ms,
+                    objective=min(reached),
+                ))
+    return records
+
+
+# ── Model ────────────────────────────────────────────────────────
+
+class CandidateStats(BaseModel):
+    samples: int
+    p90_ms: int
+    mean_gap: float | None = None  # vs. the best objective found for the same problem
+    gap_samples: int = 0
+
+
+class Selection(BaseModel):
+    """A solver choice and why it was made."""
+    solver: str  # fast | classical | portfolio | decomposition
+    strategy: str
+    time_limit_s: float | None = None
+    candidate: str | None = None
+    source: str = "rules"  # rules | model
+    predicted_ms: int | None = None
+    predicted_gap: float | None = None
+    reasons: list[str] = Field(default_factory=list)
+
+
+class SelectorModel(BaseModel):
+    """Per-bucket, per-candidate latency and quality statistics."""
+    fitted_at: float = 0.0
+    records: int = 0
+    buckets: dict[str, dict[str, CandidateStats]] = Field(default_factory=dict)
+
+    @classmethod
+    def fit(cls, records: list[SolveRecord]) -> "SelectorModel":
+        best: dict[str, int] = {}
+        for r in records:
+            if r.objective is not None:
+                best[r.problem_key] = min(best.get(r.problem_key, r.objective), r.objective)
+        compared = defaultdict(set)
+        for r in records:
+            if r.objective is not None:
+                compared[r.problem_key].add(r.candidate)
+
+        latencies: dict[tuple[str, str], list[int]] = defaultdict(list)
+        gaps: dict[tuple[str, str], list[float]] = defaultdict(list)
+        for r in records:
+            for bucket in bucket_keys(r.features):
+                latencies[bucket, r.candidate].append(r.elapsed_ms)
+                # A gap only means something if another candidate solved the same problem
+                if r.objective is not None and len(compared[r.problem_key]) > 1 and best[r.problem_key] > 0:
+                    gaps[bucket, r.candidate].append(r.objective / best[r.problem_key] - 1)
+
+        model = cls(fitted_at=time.time(), records=len(records))
+        for (bucket, candidate), samples in latencies.items():
+            bucket_gaps = gaps.get((bucket, candidate), [])
+            model.buckets.setdefault(bucket, {})[candidate] = CandidateStats(
+                samples=len(samples),
+                p90_ms=int(np.percentile(samples, 90)),
+                mean_gap=round(float(np.mean(bucket_gaps)), 5) if bucket_gaps else None,
+                gap_samples=len(bucket_gaps),
+            )
+        return model
+
+    @classmethod
+    def load(cls, path: str) -> "SelectorModel":
+        with open(path) as f:
+            return cls.model_validate_json(f.read())
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            f.write(self.model_dump_json(indent=2))
+
+    def choose(self, problem: RoutingProblem, slo_ms: int) -> Selection | None:
+        """
+        The candidate with the lowest expected gap whose p90 latency fits
+        the SLO, from the finest bucket with enough samples; the fastest
+        candidate when none fits. None when no bucket has the data.
+        """
+        features = problem_features(problem)
+        for bucket in bucket_keys(features):
+            stats = {
+                name: s
+                for name, s in self.buckets.get(bucket, {}).items()
+                if name in CANDIDATES and s.samples >= MIN_SAMPLES and s.mean_gap is not None
+            }
+            if not stats:
+                continue
+
+            reasons = [
+                (
+                    f"{features['stops']} stops, {features['vehicles']} vehicles, demand/capacity "
+                    f"{features['demand_ratio']:.2f}, window width {features['window_ratio']:.2f} of a day"
+                ),
+                f"bucket {bucket}: {len(stats)} candidates with history",
+            ]
+            within = {name: s for name, s in stats.items() if s.p90_ms <= slo_ms}
+            if within:
+                name = min(within, key=lambda n: (within[n].mean_gap, within[n].p90_ms))
+                reasons.append(
+                    f"{name}: lowest expected gap ({within[name].mean_gap:+.2%}) among "
+                    f"{len(within)} candidates with p90 ≤ {slo_ms} ms"
+                )
+            else:
+                name = min(stats, key=lambda n: stats[n].p90_ms)
+                reasons.append(f"no candidate meets {slo_ms} ms; {name} is the fastest (p90 {stats[name].p90_ms} ms)")
+
+            strategy, limit = CANDIDATES[name]
+            return Selection(
+                solver="fast" if strategy == "fast" else "classical",
+                strategy=strategy,
+                time_limit_s=limit,
+                candidate=name,
+                source="model",
+                predicted_ms=stats[name].p90_ms,
+                predicted_gap=stats[name].mean_gap,
+                reasons=reasons,
+            )
+        return None
+
+
+# ── Process-wide model ───────────────────────────────────────────
+
+_model: SelectorModel | None = None
+_model_loaded = False
+_model_lock = threading.Lock()
+
+
+def get_selector_model() -> SelectorModel | None:
+    """The model at OMNIROUTE_SELECTOR_MODEL, loaded once per process (None if unset)."""
+    global _model, _model_loaded
+    if not _model_loaded:
+        with _model_lock:
+            if not _model_loaded:
+                path = os.environ.get("OMNIROUTE_SELECTOR_MODEL")
+                _model = SelectorModel.load(path) if path else None
+                _model_loaded = True
+    return _model
+
+
+def configure_selector_model(model: SelectorModel | None) -> None:
+    """Install a model directly (None disables the learned selection)."""
+    global _model, _model_loaded
+    _model, _model_loaded = model, True
+
+
+# ── CLI ──────────────────────────────────────────────────────────
+
+def _read_jsonl(path: str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fit and inspect the learned solver selector.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cal = sub.add_parser("calibrate", help="problems.jsonl (RoutingProblem per line) → history.jsonl (appended)")
+    cal.add_argument("problems")
+    cal.add_argument("history")
+    fit = sub.add_parser("fit", help="history.jsonl → model.json")
+    fit.add_argument("history", nargs="+")
+    fit.add_argument("model")
+    explain = sub.add_parser("explain", help="show the choice for one problem")
+    explain.add_argument("model")
+    explain.add_argument("problem")
+    explain.add_argument("--slo-ms", type=int, default=10_000)
+    args = parser.parse_args()
+
+    if args.command == "calibrate":
+        problems = [RoutingProblem.model_validate(p) for p in _read_jsonl(args.problems)]
+        with open(args.history, "a") as f:
+            f.writelines(record.model_dump_json() + "\n" for record in calibrate(problems))
+    elif args.command == "fit":
+        records = [SolveRecord.model_validate(r) for path in args.history for r in _read_jsonl(path)]
+        model = SelectorModel.fit(records)
+        model.save(args.model)
+        print(f"{model.records} records → {len(model.buckets)} buckets → {args.model}")
+    else:
+        with open(args.problem) as f:
+            problem = RoutingProblem.model_validate_json(f.read())
+        selection = SelectorModel.load(args.model).choose(problem, args.slo_ms)
+        print(selection.model_dump_json(indent=2) if selection else "no history for this kind of problem")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+OmniRoute AI — In-Process Matrix Cache
+
+LRU cache of distance matrices that also serves subsets. Most optimize
+requests draw from the same workspace locations (today's 40 customers
+out of 600 regulars), so when every requested point is already in a
+cached matrix the answer is a fancy-indexed slice of it — no trig.
+
+Points are matched on the same quantized grid as the persistent
+MatrixStore. Eviction is bounded by total matrix bytes.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+
+DEFAULT_MAX_BYTES = 256 * 1024**2
+
+
+@dataclass
+class _Entry:
+    metric: str
+    sorted_keys: np.ndarray   # point keys, ascending
+    rows: np.ndarray          # matrix row of each sorted key
+    matrix: np.ndarray
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes + self.sorted_keys.nbytes + self.rows.nbytes
+
+
+class MatrixCache:
+    """Memory-bounded LRU of matrices with subset slicing and hit/miss counters."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple[str, bytes], _Entry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.subset_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "MatrixCache | None":
+        """Build from OMNIROUTE_MATRIX_CACHE_MB (default 256; 0 disables)."""
+        max_mb = int(os.environ.get("OMNIROUTE_MATRIX_CACHE_MB", DEFAULT_MAX_BYTES // 1024**2))
+        return cls(max_mb * 1024**2) if max_mb > 0 else None
+
+    def get(self, keys: np.ndarray, metric: str = "haversine") -> np.ndarray | None:
+        """Return the matrix for these point keys (exact or sliced from a superset), or None."""
+        with self._lock:
+            exact_id = (metric, keys.tobytes())
+            entry = self._entries.get(exact_id)
+            if entry is not None:
+                self._entries.move_to_end(exact_id)
+                self.hits += 1
+                return entry.matrix
+
+            # Most recently used first: today's superset is usually the last one touched
+            for entry_id in reversed(self._entries):
+                entry = self._entries[entry_id]
+                if entry.metric != metric or entry.sorted_keys.shape[0] < keys.shape[0]:
+                    continue
+                pos = np.searchsorted(entry.sorted_keys, keys)
+                pos[pos == entry.sorted_keys.shape[0]] = 0
+                if not np.array_equal(entry.sorted_keys[pos], keys):
+                    continue
+
+                rows = entry.rows[pos]
+                self._entries.move_to_end(entry_id)
+                self.subset_hits += 1
+                return entry.matrix[np.ix_(rows, rows)]
+
+            self.misses += 1
+            return None
+
+    def put(self, keys: np.ndarray, matrix: np.ndarray, metric: str = "haversine") -> None:
+        """Insert a matrix computed for these point keys, evicting LRU entries as needed."""
+        if matrix.nbytes > self.max_bytes:
+            return
+        if matrix.flags.writeable:
+            matrix.flags.writeable = False  # shared between callers
+
+        order = np.argsort(keys, kind="stable")
+        entry = _Entry(metric=metric, sorted_keys=keys[order], rows=order, matrix=matrix)
+        entry_id = (metric, keys.tobytes())
+
+        with self._lock:
+            old = self._entries.pop(entry_id, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._entries[entry_id] = entry
+            self._bytes += entry.nbytes
+
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Counters for health/metrics endpoints."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "subset_hits": self.subset_hits,
+                "misses": self.misses,
+            }
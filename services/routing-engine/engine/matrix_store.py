@@ -0,0 +1,148 @@
+"""
+OmniRoute AI — Persistent Distance Matrix Store
+
+On-disk cache of distance matrices, shared by every worker on a host.
+
+  - Keyed by a canonical fingerprint of the quantized coordinates
+    (1e-6° ≈ 0.1 m) plus the distance metric that produced them.
+  - Stored as plain .npy files and opened with mmap_mode="r", so a
+    5k×5k matrix is mapped zero-copy instead of read and parsed.
+  - Writes go to a temp file in the same directory and are published
+    with os.replace(), so readers never see a half-written matrix.
+  - Size-bounded: least-recently-used files (by mtime, refreshed on
+    every hit) are evicted once the directory exceeds max_bytes.
+
+Enabled by setting OMNIROUTE_MATRIX_STORE_DIR.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+COORD_SCALE = 1_000_000  # quantization: 1e-6 degrees
+
+DEFAULT_MAX_BYTES = 2 * 1024**3
+DEFAULT_MIN_STOPS = 100
+
+# Temp files older than this are leftovers from a crashed writer
+_STALE_TMP_SECONDS = 3600
+
+
+def quantize_coords(lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """Round coordinates to the fingerprint grid. Returns an int64 (n, 2) array."""
+    coords = np.column_stack((np.asarray(lats, dtype=np.float64), np.asarray(lngs, dtype=np.float64)))
+    return np.rint(coords * COORD_SCALE).astype(np.int64)
+
+
+def point_keys(lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """One int64 key per point on the fingerprint grid (lat-major, collision-free)."""
+    q = quantize_coords(lats, lngs)
+    return (q[:, 0] + 90 * COORD_SCALE) * (360 * COORD_SCALE + 1) + (q[:, 1] + 180 * COORD_SCALE)
+
+
+def matrix_fingerprint(lats: np.ndarray, lngs: np.ndarray, metric: str = "haversine") -> str:
+    """Canonical key for the matrix of an ordered coordinate list under a metric."""
+    digest = hashlib.sha256()
+    digest.update(metric.encode())
+    digest.update(np.ascontiguousarray(quantize_coords(lats, lngs)).tobytes())
+    return digest.hexdigest()
+
+
+class MatrixStore:
+    """Directory of memory-mappable .npy distance matrices with LRU eviction."""
+
+    def __init__(self, root: str | Path, max_bytes: int = DEFAULT_MAX_BYTES, min_stops: int = DEFAULT_MIN_STOPS):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.min_stops = min_stops
+
+    @classmethod
+    def from_env(cls) -> "MatrixStore | None":
+        """
+        Build a store from OMNIROUTE_MATRIX_STORE_* env vars, or None if
+        unset or the directory is unusable (the store is only a cache).
+        """
+        root = os.environ.get("OMNIROUTE_MATRIX_STORE_DIR")
+        if not root:
+            return None
+        max_mb = int(os.environ.get("OMNIROUTE_MATRIX_STORE_MAX_MB", DEFAULT_MAX_BYTES // 1024**2))
+        min_stops = int(os.environ.get("OMNIROUTE_MATRIX_STORE_MIN_STOPS", DEFAULT_MIN_STOPS))
+        try:
+            return cls(root, max_bytes=max_mb * 1024**2, min_stops=min_stops)
+        except OSError as e:
+            logger.warning("Matrix store disabled, cannot use %s: %s", root, e)
+            return None
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.npy"
+
+    def get(self, key: str, size: int) -> np.ndarray | None:
+        """Map a stored (size, size) matrix read-only, or None on miss/corruption."""
+        path = self._path(key)
+        try:
+            matrix = np.load(path, mmap_mode="r", allow_pickle=False)
+        except FileNotFoundError:
+            return None
+        except (ValueError, OSError):
+            # Truncated or garbled file — drop it and recompute
+            path.unlink(missing_ok=True)
+            return None
+
+        if matrix.shape != (size, size) or matrix.dtype != np.int32:
+            path.unlink(missing_ok=True)
+            return None
+
+        try:
+            os.utime(path)  # LRU touch
+        except FileNotFoundError:
+            pass  # evicted by another worker; our mapping stays valid
+        return matrix
+
+    def put(self, key: str, matrix: np.ndarray) -> None:
+        """Atomically publish a matrix, then enforce the size bound."""
+        if matrix.shape[0] < self.min_stops:
+            return
+
+        fd, tmp_name = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.ascontiguousarray(matrix, dtype=np.int32), allow_pickle=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_name, self._path(key))
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete least-recently-used matrices until the store fits in max_bytes."""
+        now = time.time()
+        entries = []
+        for path in self.root.iterdir():
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.suffix == ".tmp":
+                if now - st.st_mtime > _STALE_TMP_SECONDS:
+                    path.unlink(missing_ok=True)
+            elif path.suffix == ".npy":
+                entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
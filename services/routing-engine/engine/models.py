@@ -5,10 +5,13 @@ Pydantic models for routing problems, solutions, and metrics.
 Shared across all solver implementations (classical + quantum).
 """
 
+import datetime as dt
+from collections.abc import Iterator
 from datetime import datetime
 from enum import Enum
 
-from pydantic import BaseModel, Field
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_serializer
 
 
 class SolverType(str, Enum):
@@ -17,6 +20,19 @@ class SolverType(str, Enum):
     quantum = "quantum"
 
 
+class CostObjective(str, Enum):
+    """What the solver minimizes along each arc."""
+    distance = "distance"
+    time = "time"
+    fuel = "fuel"
+
+
+class DistanceMetric(str, Enum):
+    """How arc distances/times are measured."""
+    haversine = "haversine"  # straight-line, great-circle
+    road = "road"            # offline road graph (engine/road_network.py)
+
+
 class Stop(BaseModel):
     """A single stop/location in a routing problem."""
     id: str
@@ -28,6 +44,101 @@ class Stop(BaseModel):
     time_window_end: str | None = None    # ISO time e.g. "17:00"
 
 
+def parse_clock(value: str) -> int:
+    """Seconds since midnight for an ISO time ("09:00", "09:00:30")."""
+    t = dt.time.fromisoformat(value)
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+
+def format_clock(seconds: int) -> str:
+    """ISO time for seconds since midnight ("09:00", or "09:00:30" with seconds)."""
+    hours, rest = divmod(int(seconds), 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours:02d}:{minutes:02d}" + (f":{secs:02d}" if secs else "")
+
+
+class StopTable:
+    """
+    Stops as parallel NumPy columns, for problems too large for a list of
+    Stop objects: nothing is validated or allocated per stop. Windows are
+    seconds of day, −1 where a side is open. Indexing materializes one Stop.
+    """
+
+    __slots__ = ("demand_kg", "ids", "lat", "lng", "service_time_min", "window_end_s", "window_start_s")
+
+    def __init__(
+        self,
+        lat,
+        lng,
+        ids=None,
+        demand_kg=None,
+        service_time_min=None,
+        window_start_s=None,
+        window_end_s=None,
+    ):
+        self.lat = np.ascontiguousarray(lat, dtype=np.float64)
+        n = len(self.lat)
+        self.lng = np.ascontiguousarray(lng, dtype=np.float64)
+        self.ids = np.arange(n).astype(str).astype(object) if ids is None else np.asarray(ids, dtype=object)
+        self.demand_kg = np.zeros(n) if demand_kg is None else np.ascontiguousarray(demand_kg, dtype=np.float64)
+        self.service_time_min = (
+            np.zeros(n, dtype=np.int64) if service_time_min is None
+            else np.ascontiguousarray(service_time_min, dtype=np.int64)
+        )
+        self.window_start_s = (
+            np.full(n, -1, dtype=np.int64) if window_start_s is None
+            else np.ascontiguousarray(window_start_s, dtype=np.int64)
+        )
+        self.window_end_s = (
+            np.full(n, -1, dtype=np.int64) if window_end_s is None
+            else np.ascontiguousarray(window_end_s, dtype=np.int64)
+        )
+        for name in self.__slots__:
+            column = getattr(self, name)
+            if column.shape != (n,):
+                raise ValueError(f"StopTable column {name} has shape {column.shape}, expected ({n},)")
+
+    @classmethod
+    def from_stops(cls, stops: list[Stop]) -> "StopTable":
+        n = len(stops)
+        return cls(
+            lat=np.fromiter((s.lat for s in stops), dtype=np.float64, count=n),
+            lng=np.fromiter((s.lng for s in stops), dtype=np.float64, count=n),
+            ids=[s.id for s in stops],
+            demand_kg=np.fromiter((s.demand_kg for s in stops), dtype=np.float64, count=n),
+            service_time_min=np.fromiter((s.service_time_min for s in stops), dtype=np.int64, count=n),
+            window_start_s=[parse_clock(s.time_window_start) if s.time_window_start else -1 for s in stops],
+            window_end_s=[parse_clock(s.time_window_end) if s.time_window_end else -1 for s in stops],
+        )
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def __getitem__(self, i: int) -> Stop:
+        start, end = int(self.window_start_s[i]), int(self.window_end_s[i])
+        return Stop(
+            id=self.ids[i],
+            lat=float(self.lat[i]),
+            lng=float(self.lng[i]),
+            demand_kg=float(self.demand_kg[i]),
+            service_time_min=int(self.service_time_min[i]),
+            time_window_start=format_clock(start) if start >= 0 else None,
+            time_window_end=format_clock(end) if end >= 0 else None,
+        )
+
+    def __iter__(self) -> Iterator[Stop]:
+        return (self[i] for i in range(len(self)))
+
+    def take(self, indices) -> "StopTable":
+        """The stops at `indices`, in that order."""
+        indices = np.asarray(indices, dtype=np.intp)
+        return StopTable(**{name: getattr(self, name)[indices] for name in self.__slots__})
+
+    @property
+    def has_time_windows(self) -> bool:
+        return bool((self.window_start_s >= 0).any() or (self.window_end_s >= 0).any())
+
+
 class VehicleSpec(BaseModel):
     """Vehicle constraints for the optimizer."""
     id: str
@@ -39,14 +150,56 @@ class VehicleSpec(BaseModel):
 
 class RoutingProblem(BaseModel):
     """Input to any solver — describes what needs to be optimized."""
-    stops: list[Stop]
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    stops: StopTable | list[Stop]  # a StopTable skips per-stop objects on large inputs
     vehicles: list[VehicleSpec] = Field(default_factory=lambda: [VehicleSpec(id="default")])
     depot_index: int = 0  # Index of the starting/ending point in stops[]
+    optimize_for: CostObjective = CostObjective.distance
+    avg_speed_kmh: float = 40.0  # Used to derive travel time from distance
+    distance_metric: DistanceMetric = DistanceMetric.haversine
+    # Previous plan (stop ids per vehicle) to warm-start from, see engine/warm_start.py
+    initial_routes: list[list[str]] | None = None
+
+    _columns: tuple[list[Stop], StopTable] | None = PrivateAttr(default=None)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        lat,
+        lng,
+        ids=None,
+        demand_kg=None,
+        service_time_min=None,
+        window_start_s=None,
+        window_end_s=None,
+        **fields,
+    ) -> "RoutingProblem":
+        """A problem over column arrays (see StopTable); `fields` are the other RoutingProblem fields."""
+        table = StopTable(lat, lng, ids, demand_kg, service_time_min, window_start_s, window_end_s)
+        return cls(stops=table, **fields)
+
+    @field_serializer("stops")
+    def _serialize_stops(self, stops):
+        return list(stops) if isinstance(stops, StopTable) else stops
+
+    @property
+    def columns(self) -> StopTable:
+        """The stops as columns; built once from a list of Stop, free for a StopTable."""
+        if isinstance(self.stops, StopTable):
+            return self.stops
+        if self._columns is None or self._columns[0] is not self.stops:
+            self._columns = (self.stops, StopTable.from_stops(self.stops))
+        return self._columns[1]
 
     @property
     def stop_count(self) -> int:
         return len(self.stops)
 
+    @property
+    def has_time_windows(self) -> bool:
+        return self.columns.has_time_windows
+
 
 class OptimizedStop(BaseModel):
     """A stop in the optimized route with ordering and ETA."""
@@ -58,6 +211,14 @@ class OptimizedStop(BaseModel):
     distance_from_prev_km: float = 0.0
 
 
+class SearchStats(BaseModel):
+    """What the search did on the way to its answer."""
+    solutions: int = 0  # strictly improving solutions found
+    branches: int = 0  # constraint solver branches explored
+    time_limit_hit: bool = False  # stopped by its time limit, not at a local optimum
+    trace: list[tuple[int, int]] = Field(default_factory=list)  # (elapsed ms, objective) per improvement
+
+
 class SolverMetrics(BaseModel):
     """Performance metrics from a solver run."""
     solver_type: SolverType
@@ -67,6 +228,17 @@ class SolverMetrics(BaseModel):
     total_duration_min: float = 0.0
     stops_optimized: int = 0
     quality_score: float = 0.0  # 0-100
+    objective: int | None = None  # search cost in the units of problem.optimize_for
+    phases_ms: dict[str, int] = Field(default_factory=dict)  # see engine/instrumentation.py
+    search: SearchStats | None = None
+
+
+class SolutionUpdate(BaseModel):
+    """An improved solution reported while the search is still running."""
+    elapsed_ms: int
+    objective: int  # search cost in the units of problem.optimize_for
+    total_distance_km: float
+    routes: list[list[str]]  # stop ids per vehicle, depot at both ends
 
 
 class SolverResult(BaseModel):
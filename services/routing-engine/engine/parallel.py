@@ -0,0 +1,59 @@
+"""
+OmniRoute AI — Parallel Sub-Solves
+
+Solvers that fan out into independent ClassicalSolver runs
+(DecompositionSolver, PortfolioSolver) describe their work as a
+generator of batches, `steps(problem, on_solution)`: it yields a list
+of sub-solves, receives their results through send(), and returns
+the final SolverResult. Any pool can drive it:
+
+  - run_steps: a process pool of its own, for a direct solve_sync
+  - SolverExecutor: its pre-started workers (engine/executor.py)
+
+The sub-solves run in separate processes: OR-Tools holds the GIL
+while it searches.
+"""
+
+import multiprocessing
+from collections.abc import Callable, Generator
+from concurrent.futures import ProcessPoolExecutor
+
+from engine.classical_solver import ClassicalSolver
+from engine.models import RoutingProblem, SolutionUpdate, SolverResult
+
+
+# One sub-solve: (solver, sub-problem, callback for its improved solutions or None).
+# The solver is a ClassicalSolver or another picklable one with the same
+# solve_sync/uses_dense_costs interface (decomposition's PathSolver).
+# Callbacks only reach the search when the pool can relay them (not run_steps' pool)
+SubSolve = tuple[ClassicalSolver, RoutingProblem, Callable[[SolutionUpdate], bool | None] | None]
+
+Steps = Generator[list[SubSolve], list[SolverResult], SolverResult]
+
+
+def _solve_one(job: SubSolve) -> SolverResult:
+    solver, problem, _ = job
+    return solver.solve_sync(problem)
+
+
+def run_steps(steps: Steps, workers: int) -> SolverResult:
+    """
+    Drive `steps` over a spawn process pool of `workers` processes, or
+    sequentially (relaying callbacks) with one worker or inside a
+    daemonic process, which may not start children.
+    """
+    parallel = workers > 1 and not multiprocessing.current_process().daemon
+    pool = ProcessPoolExecutor(workers, multiprocessing.get_context("spawn")) if parallel else None
+    try:
+        batch = next(steps)
+        while True:
+            if pool is not None and len(batch) > 1:
+                results = list(pool.map(_solve_one, batch))
+            else:
+                results = [solver.solve_sync(problem, None, relay) for solver, problem, relay in batch]
+            batch = steps.send(results)
+    except StopIteration as done:
+        return done.value
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
@@ -0,0 +1,149 @@
+"""
+OmniRoute AI — Portfolio Solver
+
+Which search configuration wins varies a lot between instance shapes:
+savings beats cheapest-arc on clustered depots, tabu search beats
+guided local search on some tight-capacity fleets. Instead of
+guessing, the portfolio races several configurations, each an OR-Tools
+first-solution strategy paired with a metaheuristic, in parallel
+processes under one shared deadline, and keeps the lowest-cost result.
+
+Idle cores become solution quality at the latency of a single search.
+The winning configuration is recorded in the result's metrics
+(strategy "portfolio (<first solution>/<metaheuristic>)").
+
+Configurations are raced at most `workers` at a time, so the deadline
+holds: with one worker the portfolio is the default guided local
+search alone.
+"""
+
+import os
+import time
+from collections.abc import Callable
+
+from engine.classical_solver import ClassicalSolver
+from engine.costs import CostBundle
+from engine.models import RoutingProblem, SolutionUpdate, SolverMetrics, SolverResult, SolverType
+from engine.parallel import Steps, run_steps
+
+
+# (first solution strategy, metaheuristic) in race order; with fewer workers the tail sits out
+DEFAULT_CONFIGS: list[tuple[str, str]] = [
+    ("PATH_CHEAPEST_ARC", "GUIDED_LOCAL_SEARCH"),  # what ClassicalSolver runs alone
+    ("SAVINGS", "GUIDED_LOCAL_SEARCH"),
+    ("PARALLEL_CHEAPEST_INSERTION", "TABU_SEARCH"),
+    ("CHRISTOFIDES", "GUIDED_LOCAL_SEARCH"),
+    ("LOCAL_CHEAPEST_INSERTION", "SIMULATED_ANNEALING"),
+    ("PATH_MOST_CONSTRAINED_ARC", "TABU_SEARCH"),
+]
+
+
+class PortfolioSolver:
+    """Race several ClassicalSolver configurations and keep the best result."""
+
+    def __init__(
+        self,
+        configs: list[tuple[str, str]] | None = None,
+        workers: int | None = None,
+        time_limit_s: float | None = None,
+    ):
+        """
+        Args:
+            configs: (FirstSolutionStrategy, LocalSearchMetaheuristic) names
+                     in priority order (default: DEFAULT_CONFIGS).
+            workers: configurations raced at once (default: one per CPU
+                     core). Under SolverExecutor its pool runs them.
+            time_limit_s: the shared deadline, every configuration's budget
+                     (default: guided local search's, 10 s or 2 s warm).
+        """
+        self.strategy = "portfolio"
+        self.configs = configs or DEFAULT_CONFIGS
+        self.workers = workers or os.cpu_count() or 1
+        self.time_limit_s = time_limit_s
+        self._last_metrics: SolverMetrics | None = None
+
+    async def solve(self, problem: RoutingProblem) -> SolverResult:
+        """Solve on the calling thread (see ClassicalSolver.solve)."""
+        return self.solve_sync(problem)
+
+    def uses_dense_costs(self, problem: RoutingProblem) -> bool:
+        """Each configuration builds its own matrices."""
+        return False
+
+    def solve_sync(
+        self,
+        problem: RoutingProblem,
+        costs: CostBundle | None = None,
+        on_solution: Callable[[SolutionUpdate], bool | None] | None = None,
+    ) -> SolverResult:
+        """
+        Blocking solve over a process pool. `on_solution` only sees
+        improvements when the configurations run in this process (one
+        worker); over a process pool it is not called.
+        """
+        return run_steps(self.steps(problem, on_solution), self.workers)
+
+    def members(self) -> list[ClassicalSolver]:
+        """The solvers raced, one per configuration, at most `workers`."""
+        return [
+            ClassicalSolver(
+                strategy=f"{first_solution}/{metaheuristic}",
+                time_limit_s=self.time_limit_s,
+                first_solution=first_solution,
+                metaheuristic=metaheuristic,
+            )
+            for first_solution, metaheuristic in self.configs[: self.workers]
+        ]
+
+    def steps(
+        self,
+        problem: RoutingProblem,
+        on_solution: Callable[[SolutionUpdate], bool | None] | None = None,
+    ) -> Steps:
+        """One batch: every member on the whole problem (see engine/parallel.py)."""
+        start_time = time.perf_counter()
+        relay = self._best_only(on_solution) if on_solution is not None else None
+        results = yield [(member, problem, relay) for member in self.members()]
+
+        solved = [r for r in results if r.success and r.metrics is not None]
+        if not solved:
+            self._last_metrics = SolverMetrics(
+                solver_type=SolverType.classical,
+                strategy=self.strategy,
+                execution_time_ms=int((time.perf_counter() - start_time) * 1000),
+            )
+            errors = "; ".join(sorted({r.error for r in results if r.error}))
+            return SolverResult(success=False, error=errors or "No solution found. Try relaxing constraints.")
+
+        # Ties go to the earlier, more trusted configuration
+        best = min(solved, key=lambda r: r.metrics.objective)
+        self._last_metrics = best.metrics.model_copy(update={
+            "strategy": f"{self.strategy} ({best.metrics.strategy})",
+            "execution_time_ms": int((time.perf_counter() - start_time) * 1000),
+        })
+        return best.model_copy(update={"metrics": self._last_metrics})
+
+    @staticmethod
+    def _best_only(on_solution: Callable[[SolutionUpdate], bool | None]) -> Callable[[SolutionUpdate], bool | None]:
+        """Forward only updates that beat every member's best so far."""
+        best: list[int] = []
+
+        def relay(update: SolutionUpdate) -> bool | None:
+            if best and update.objective >= best[0]:
+                return None
+            best[:] = [update.objective]
+            return on_solution(update)
+
+        return relay
+
+    async def validate(self, result: SolverResult) -> bool:
+        """Check that the result is valid (all stops visited)."""
+        if not result.success:
+            return False
+        return len(result.routes) > 0
+
+    def get_metrics(self) -> SolverMetrics:
+        """Return metrics from the last solve run."""
+        if self._last_metrics is None:
+            return SolverMetrics(solver_type=SolverType.classical, strategy=self.strategy)
+        return self._last_metrics
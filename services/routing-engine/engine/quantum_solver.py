@@ -0,0 +1,240 @@
+"""
+OmniRoute AI — Quantum-Inspired Solver (QUBO + annealing on the CPU)
+
+The SolverType.quantum backend: the problem is encoded as a QUBO
+(engine/qubo.py) and sampled by simulated annealing or parallel
+tempering over a batch of replicas (engine/annealing.py). The QUBO is
+the one a quantum annealer would take, so this is both a baseline for
+a hardware backend and a way to benchmark the formulation against
+ClassicalSolver today (benchmarks/bench_qubo.py).
+
+Encodings grow quickly; only small problems are accepted (at most
+MAX_QUBO_CUSTOMERS stops besides the depot), without time windows.
+Capacity is the largest vehicle's, the distance limit the first
+vehicle's, as in ClassicalSolver. After every sweep the replicas are
+decoded and the cheapest feasible plan is kept; routes are reported as
+sampled, with no classical polishing.
+"""
+
+import time
+from collections.abc import Callable
+
+import numpy as np
+
+from engine.annealing import anneal, temper
+from engine.costs import CostBundle
+from engine.instrumentation import PhaseTimer
+from engine.models import (
+    OptimizedStop,
+    RoutingProblem,
+    SearchStats,
+    SolutionUpdate,
+    SolverMetrics,
+    SolverResult,
+    SolverType,
+)
+from engine.qubo import DEFAULT_PENALTY, MAX_QUBO_CUSTOMERS, RoutingQUBO
+
+
+SAMPLERS = {"annealing": anneal, "tempering": temper}
+
+
+class QuantumSolver:
+    """QUBO encoding sampled by batched simulated annealing / parallel tempering."""
+
+    def __init__(
+        self,
+        method: str = "tempering",
+        replicas: int = 32,
+        sweeps: int = 1000,
+        time_limit_s: float | None = None,
+        seed: int | None = None,
+        penalty: float = DEFAULT_PENALTY,
+    ):
+        if method not in SAMPLERS:
+            raise ValueError(f"Unknown sampling method {method!r}; expected one of {sorted(SAMPLERS)}")
+        self.method = method
+        self.strategy = f"qubo_{method}"
+        self.replicas = replicas
+        self.sweeps = sweeps
+        self.time_limit_s = time_limit_s
+        self.seed = seed
+        self.penalty = penalty
+        self._last_metrics: SolverMetrics | None = None
+
+    async def solve(self, problem: RoutingProblem) -> SolverResult:
+        """Solve on the calling thread."""
+        return self.solve_sync(problem)
+
+    def uses_dense_costs(self, problem: RoutingProblem) -> bool:
+        return True
+
+    def solve_sync(
+        self,
+        problem: RoutingProblem,
+        costs: CostBundle | None = None,
+        on_solution: Callable[[SolutionUpdate], bool | None] | None = None,
+    ) -> SolverResult:
+        """Blocking solve. `on_solution` gets every improving feasible sample; returning False stops."""
+        start_time = time.perf_counter()
+        if problem.stop_count < 2:
+            return SolverResult(success=False, error="Need at least 2 stops to optimize")
+        if problem.has_time_windows:
+            return SolverResult(success=False, error="The QUBO encoding does not support time windows")
+        if problem.stop_count - 1 > MAX_QUBO_CUSTOMERS:
+            return SolverResult(
+                success=False,
+                error=f"The QUBO encoding handles at most {MAX_QUBO_CUSTOMERS + 1} stops, got {problem.stop_count}",
+            )
+
+        timer = PhaseTimer()
+        try:
+            with timer.phase("matrix"):
+                if costs is None:
+                    costs = CostBundle.for_problem(problem)
+                cost = costs.layer(problem.optimize_for, problem.vehicles[0].cost_per_km).astype(np.int64)
+
+            with timer.phase("model"):
+                model = RoutingQUBO(
+                    cost,
+                    problem.depot_index,
+                    np.ceil(problem.columns.demand_kg).astype(np.int64),
+                    int(max(v.capacity_kg for v in problem.vehicles)),
+                    # More vehicles than stops only add idle variables
+                    min(len(problem.vehicles), problem.stop_count - 1),
+                    distance_m=costs.distance_m,
+                    max_distance_m=int(problem.vehicles[0].max_distance_km * 1000),
+                    penalty=self.penalty,
+                )
+
+            with timer.phase("search"):
+                best = self._search(problem, model, start_time, on_solution)
+            if best["slots"] is None:
+                self._last_metrics = self._metrics(
+                    problem, start_time, phases_ms=timer.phases_ms, search=self._search_stats(best)
+                )
+                return SolverResult(success=False, error="No feasible sample found. Try more sweeps or replicas.")
+            routes = [[int(n) for n in vehicle if n >= 0] for vehicle in best["slots"]]
+            return self._result(problem, [r for r in routes if r], cost, costs, start_time, best, timer)
+
+        except Exception as e:
+            self._last_metrics = self._metrics(problem, start_time, phases_ms=timer.phases_ms)
+            return SolverResult(success=False, error=str(e))
+
+    # ── Search ──
+
+    def _search(self, problem, model: RoutingQUBO, start_time: float, on_solution) -> dict:
+        """Run the sampler, keeping the cheapest feasible decoding seen after any sweep."""
+        best = {"cost": None, "slots": None, "solutions": 0, "trace": []}
+        deadline = start_time + self.time_limit_s if self.time_limit_s is not None else None
+        ids = problem.columns.ids
+        depot_id = ids[problem.depot_index]
+
+        def inspect(x: np.ndarray, energies: np.ndarray):
+            feasible, cost, slots = model.decode(x)
+            if not feasible.any():
+                return None
+            r = int(np.flatnonzero(feasible)[np.argmin(cost[feasible])])
+            if best["cost"] is not None and cost[r] >= best["cost"]:
+                return None
+            elapsed_ms = int((time.perf_counter() - start_time) * 1000)
+            best.update(cost=int(cost[r]), slots=slots[r].copy(), solutions=best["solutions"] + 1)
+            best["trace"].append((elapsed_ms, best["cost"]))
+            if on_solution is not None:
+                routes = [[int(n) for n in vehicle if n >= 0] for vehicle in best["slots"]]
+                update = SolutionUpdate(
+                    elapsed_ms=elapsed_ms,
+                    objective=best["cost"],
+                    total_distance_km=round(sum(self._length_m(model, r) for r in routes) / 1000, 2),
+                    routes=[[depot_id, *ids[r].tolist(), depot_id] for r in routes if r],
+                )
+                if on_solution(update) is False:
+                    return False
+            return None
+
+        SAMPLERS[self.method](
+            model.qubo,
+            replicas=self.replicas,
+            sweeps=self.sweeps,
+            seed=self.seed,
+            deadline=deadline,
+            inspect=inspect,
+        )
+        best["time_limit_hit"] = deadline is not None and time.perf_counter() >= deadline
+        return best
+
+    @staticmethod
+    def _length_m(model: RoutingQUBO, route: list[int]) -> int:
+        path = [model.depot, *route, model.depot]
+        return int(model.distance_m[path[:-1], path[1:]].sum())
+
+    @staticmethod
+    def _search_stats(best: dict) -> SearchStats:
+        return SearchStats(
+            solutions=best["solutions"],
+            time_limit_hit=best.get("time_limit_hit", False),
+            trace=best["trace"],
+        )
+
+    # ── Result ──
+
+    def _result(self, problem, routes, cost, costs, start_time, best, timer) -> SolverResult:
+        with timer.phase("extraction"):
+            depot = problem.depot_index
+            time_s = costs.time_s
+            columns = problem.columns
+            service_s = columns.service_time_min * 60
+            all_routes, total_m, total_s, objective = [], 0, 0, 0
+            for route in routes:
+                path = [depot, *route, depot]
+                stops, clock, prev = [], 0, depot
+                for order, node in enumerate(path[:-1]):
+                    if order:
+                        clock += (int(service_s[prev]) if order > 1 else 0) + int(time_s[prev, node])
+                    stops.append(OptimizedStop(
+                        stop_id=columns.ids[node],
+                        order=order,
+                        lat=float(columns.lat[node]),
+                        lng=float(columns.lng[node]),
+                        arrival_eta_min=round(clock / 60, 1),
+                        distance_from_prev_km=round(int(costs.distance_m[prev, node]) / 1000, 2),
+                    ))
+                    prev = node
+                all_routes.append(stops)
+                total_m += int(costs.distance_m[path[:-1], path[1:]].sum())
+                total_s += clock + int(service_s[prev]) + int(time_s[prev, depot])
+                objective += int(cost[path[:-1], path[1:]].sum())
+
+        total_distance_km = round(total_m / 1000, 2)
+        self._last_metrics = self._metrics(
+            problem,
+            start_time,
+            total_distance_km=total_distance_km,
+            total_duration_min=round(total_s / 60, 1),
+            stops_optimized=problem.stop_count,
+            quality_score=min(100.0, round(80 + (20 * (1 - total_distance_km / max(total_distance_km * 1.3, 1))), 1)),
+            objective=objective,
+            phases_ms=timer.phases_ms,
+            search=self._search_stats(best),
+        )
+        return SolverResult(success=True, routes=all_routes, metrics=self._last_metrics)
+
+    def _metrics(self, problem: RoutingProblem, start_time: float, **values) -> SolverMetrics:
+        return SolverMetrics(
+            solver_type=SolverType.quantum,
+            strategy=self.strategy,
+            execution_time_ms=int((time.perf_counter() - start_time) * 1000),
+            **values,
+        )
+
+    async def validate(self, result: SolverResult) -> bool:
+        """Check that the result is valid (all stops visited)."""
+        if not result.success:
+            return False
+        return len(result.routes) > 0
+
+    def get_metrics(self) -> SolverMetrics:
+        """Return metrics from the last solve run."""
+        if self._last_metrics is None:
+            return SolverMetrics(solver_type=SolverType.quantum, strategy=self.strategy)
+        return self._last_metrics
@@ -0,0 +1,244 @@
+"""
+OmniRoute AI — QUBO Encoding
+
+Small routing problems as a QUBO (minimize xᵀQx over binary x), the
+input quantum annealers and QAOA take, and which engine/annealing.py
+samples on the CPU.
+
+Position encoding: x[v, p, i] = 1 when vehicle v's p-th slot holds
+node i, where i is a customer or the "idle" node (the depot: an idle
+slot costs nothing, so idle slots collect at the route's end). With
+P slots per vehicle and N customers that is V·P·(N+1) variables, plus
+⌈log2(C + 1)⌉ slack bits per vehicle for the capacity constraint:
+
+  route cost     Σ_v [c(depot, slot 0) + Σ_p c(slot p, slot p+1) + c(slot P−1, depot)]
+  one node/slot  A · Σ_{v,p} (Σ_i x[v,p,i] − 1)²
+  visit once     A · Σ_j (Σ_{v,p} x[v,p,j] − 1)²
+  capacity       B · Σ_v ((Σ_{p,j} q_j x[v,p,j] + Σ_k 2^k s[v,k] − C) / C)²
+
+Costs are scaled so the longest arc is 1; A and B default to a few
+longest arcs, enough that breaking a constraint never pays. Q is
+stored sparse (upper-triangular COO, duplicates summed).
+
+Time windows and the max-distance limit are not encoded; decode()
+reports a route over the distance limit as infeasible.
+"""
+
+import math
+
+import numpy as np
+
+# Encodings grow as V·P·N²; beyond this many customers decompose first
+MAX_QUBO_CUSTOMERS = 15
+
+DEFAULT_PENALTY = 2.0  # in longest arcs
+
+
+class QUBO:
+    """Sparse upper-triangular Q (i ≤ j) plus a constant offset: E(x) = xᵀQx + offset."""
+
+    def __init__(self, size: int, rows: np.ndarray, cols: np.ndarray, values: np.ndarray, offset: float = 0.0):
+        self.size = size
+        self.rows = rows
+        self.cols = cols
+        self.values = values
+        self.offset = offset
+
+    @classmethod
+    def from_terms(cls, size: int, rows, cols, values, offset: float = 0.0) -> "QUBO":
+        """Sum duplicate (i, j) terms, fold (j, i) onto (i, j) and drop zeros."""
+        rows, cols = np.concatenate(rows), np.concatenate(cols)
+        lo, hi = np.minimum(rows, cols), np.maximum(rows, cols)
+        keys, inverse = np.unique(lo * size + hi, return_inverse=True)
+        summed = np.bincount(inverse, weights=np.concatenate(values))
+        keep = summed != 0
+        return cls(size, keys[keep] // size, keys[keep] % size, summed[keep], offset)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.values)
+
+    def diagonal(self) -> np.ndarray:
+        diag = np.zeros(self.size)
+        on = self.rows == self.cols
+        diag[self.rows[on]] = self.values[on]
+        return diag
+
+    def couplings(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Symmetric off-diagonal couplings as CSR (indptr, indices, data): each i<j term under both rows."""
+        off = self.rows != self.cols
+        rows = np.concatenate((self.rows[off], self.cols[off]))
+        cols = np.concatenate((self.cols[off], self.rows[off]))
+        data = np.concatenate((self.values[off], self.values[off]))
+        order = np.argsort(rows, kind="stable")
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=self.size))))
+        return indptr, cols[order], data[order]
+
+    def energy(self, x: np.ndarray) -> np.ndarray:
+        """Energies of a batch of samples x (replicas × size, 0/1)."""
+        x = np.atleast_2d(x).astype(np.float64)
+        return (x[:, self.rows] * x[:, self.cols]) @ self.values + self.offset
+
+
+class RoutingQUBO:
+    """The QUBO of a routing problem and the map back from samples to routes."""
+
+    def __init__(
+        self,
+        cost: np.ndarray,
+        depot: int,
+        demands: np.ndarray,
+        capacity: int,
+        vehicles: int,
+        distance_m: np.ndarray | None = None,
+        max_distance_m: int | None = None,
+        penalty: float = DEFAULT_PENALTY,
+    ):
+        """
+        Args:
+            cost: (n, n) arc costs over all stops, depot included.
+            demands: per stop, integer units (kg); the depot's is ignored.
+            capacity: per vehicle, same units; 0 means uncapacitated.
+            distance_m / max_distance_m: checked when decoding, not encoded.
+            penalty: constraint weight in units of the longest arc.
+        """
+        self.depot = depot
+        self.customers = np.array([i for i in range(len(cost)) if i != depot])
+        self.vehicles = vehicles
+        n = len(self.customers)
+        if n > MAX_QUBO_CUSTOMERS:
+            raise ValueError(f"QUBO encoding handles at most {MAX_QUBO_CUSTOMERS} stops besides the depot, got {n}")
+
+        self.cost = cost
+        self.distance_m = distance_m
+        self.max_distance_m = max_distance_m
+        self.demands = np.asarray(demands, dtype=np.int64)[self.customers]
+        total = int(self.demands.sum())
+        self.capacity = capacity if capacity > 0 and total > capacity else 0  # 0: cannot bind
+        if self.capacity and self.demands.max() > self.capacity:
+            raise ValueError("A stop's demand exceeds vehicle capacity")
+
+        # A vehicle never needs more slots than the most stops that fit in it
+        fit = n
+        if self.capacity and vehicles > 1:
+            fit = int(np.searchsorted(np.cumsum(np.sort(self.demands)), self.capacity, side="right"))
+        self.positions = max(1, min(n, fit))
+        self.nodes = n + 1  # customers, then idle
+        self.slack_bits = math.ceil(math.log2(self.capacity + 1)) if self.capacity else 0
+        self.routing_size = vehicles * self.positions * self.nodes
+        self.size = self.routing_size + vehicles * self.slack_bits
+
+        self.scale = float(cost.max()) or 1.0
+        self.qubo = self._build(penalty)
+
+    def var(self, v, p, i):
+        return (v * self.positions + p) * self.nodes + i
+
+    def _node_costs(self) -> np.ndarray:
+        """(N+1, N+1) scaled costs between customers and idle (= depot)."""
+        nodes = np.append(self.customers, self.depot)
+        return self.cost[np.ix_(nodes, nodes)] / self.scale
+
+    def _build(self, penalty: float) -> QUBO:
+        V, P, M = self.vehicles, self.positions, self.nodes
+        n = M - 1
+        c = self._node_costs()
+        rows, cols, values = [], [], []
+        offset = 0.0
+
+        def one_hot(group: np.ndarray, weight: float):
+            """weight · (Σ x − 1)² over each row of `group` (groups × members)."""
+            nonlocal offset
+            rows.append(group.ravel())
+            cols.append(group.ravel())
+            values.append(np.full(group.size, -weight))
+            i, j = np.triu_indices(group.shape[1], 1)
+            rows.append(group[:, i].ravel())
+            cols.append(group[:, j].ravel())
+            values.append(np.full(group.shape[0] * len(i), 2 * weight))
+            offset += weight * group.shape[0]
+
+        index = np.arange(self.routing_size).reshape(V, P, M)
+        one_hot(index.reshape(V * P, M), penalty)                               # one node per slot
+        one_hot(index[:, :, :n].transpose(2, 0, 1).reshape(n, V * P), penalty)  # each customer once
+
+        # Route cost: depot → slot 0, slot p → slot p+1, last slot → depot (idle = depot)
+        depot_out, depot_in = c[M - 1], c[:, M - 1]
+        rows.append(index[:, 0].ravel())
+        cols.append(index[:, 0].ravel())
+        values.append(np.tile(depot_out, V))
+        rows.append(index[:, P - 1].ravel())
+        cols.append(index[:, P - 1].ravel())
+        values.append(np.tile(depot_in, V))
+        if P > 1:
+            a, b = np.meshgrid(np.arange(M), np.arange(M), indexing="ij")
+            here = index[:, :-1, :, None] + 0 * b        # (V, P-1, M, M): x[v, p, a]
+            there = index[:, 1:, None, :] + 0 * a        # x[v, p+1, b]
+            rows.append(here.ravel())
+            cols.append(there.ravel())
+            values.append(np.broadcast_to(c, here.shape).ravel())
+
+        if self.capacity:
+            # (Σ a_t y_t − C)² = Σ a_t² y_t − 2C Σ a_t y_t + 2 Σ_{t<u} a_t a_u y_t y_u + C², scaled by B / C²
+            weight = penalty / self.capacity**2
+            slack = 2 ** np.arange(self.slack_bits)
+            slack[-1] = self.capacity - (slack[:-1].sum())  # bounded encoding: sums reach exactly 0..C
+            for v in range(V):
+                bits = self.routing_size + v * self.slack_bits + np.arange(self.slack_bits)
+                ys = np.concatenate((index[v, :, :n].ravel(), bits))
+                coef = np.concatenate((np.tile(self.demands, P), slack)).astype(np.float64)
+                rows.append(ys)
+                cols.append(ys)
+                values.append(weight * (coef**2 - 2 * self.capacity * coef))
+                i, j = np.triu_indices(len(ys), 1)
+                rows.append(ys[i])
+                cols.append(ys[j])
+                values.append(weight * 2 * coef[i] * coef[j])
+                offset += weight * self.capacity**2
+
+        return QUBO.from_terms(self.size, rows, cols, values, offset)
+
+    # ── Decoding ──
+
+    def decode(self, x: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (feasible, cost, slots) for a batch of samples. slots is
+        (replicas, V, P) node indices into the problem's stops, −1 idle;
+        cost is the unscaled route cost (meaningful where feasible).
+        """
+        V, P, M = self.vehicles, self.positions, self.nodes
+        n = M - 1
+        grid = np.atleast_2d(x)[:, : self.routing_size].reshape(-1, V, P, M).astype(bool)
+        feasible = (grid.sum(axis=3) == 1).all(axis=(1, 2)) & (grid[..., :n].sum(axis=(1, 2)) == 1).all(axis=1)
+
+        chosen = grid.argmax(axis=3)  # arbitrary where a slot is empty or clashes, exact where feasible
+        nodes = np.append(self.customers, self.depot)[chosen]
+        if self.capacity:
+            loads = np.where(chosen < n, self.demands[np.minimum(chosen, n - 1)], 0).sum(axis=2)
+            feasible &= (loads <= self.capacity).all(axis=1)
+
+        depot = np.full(nodes.shape[:2] + (1,), self.depot)
+        path = np.concatenate((depot, nodes, depot), axis=2)
+        cost = self.cost[path[..., :-1], path[..., 1:]].sum(axis=(1, 2))
+        if self.max_distance_m is not None and self.distance_m is not None:
+            lengths = self.distance_m[path[..., :-1], path[..., 1:]].sum(axis=2)
+            feasible &= (lengths <= self.max_distance_m).all(axis=1)
+
+        return feasible, cost, np.where(chosen < n, nodes, -1)
+
+    def encode(self, routes: list[list[int]]) -> np.ndarray:
+        """The sample of a plan (stop indices per vehicle), slack bits set to the leftover capacity."""
+        x = np.zeros(self.size, dtype=np.int8)
+        position = {int(c): k for k, c in enumerate(self.customers)}
+        for v in range(self.vehicles):
+            route = routes[v] if v < len(routes) else []
+            for p in range(self.positions):
+                x[self.var(v, p, position[route[p]] if p < len(route) else self.nodes - 1)] = 1
+            if self.capacity:
+                spare = self.capacity - int(sum(self.demands[position[s]] for s in route))
+                base = self.routing_size + v * self.slack_bits
+                for k in reversed(range(self.slack_bits)):
+                    weight = 2**k if k < self.slack_bits - 1 else self.capacity - (2 ** (self.slack_bits - 1) - 1)
+                    if spare >= weight:
+                        x[base + k], spare = 1, spare - weight
+        return x
@@ -0,0 +1,444 @@
+"""
+OmniRoute AI — Offline Road Network Distances
+
+Local road-graph backend: real driving distance and time without a
+network hop to OSRM/Valhalla.
+
+  1. Offline: a road extract (nodes.csv + edges.csv, e.g. exported from
+     OSM) is contracted into a Contraction Hierarchy and saved as a
+     compact .npz of CSR arrays:
+
+         python -m engine.road_network build nodes.csv edges.csv city.npz
+
+  2. Online: RoadNetwork.load() maps the arrays, stops are snapped to
+     their nearest graph node, and many-to-many matrices come from the
+     bucket CH algorithm: one small upward search per distinct target
+     fills per-node buckets, one upward search per distinct source
+     scans them, keeping the best meeting node per target with a
+     scatter-min (linear in bucket hits). Upward searches stall on
+     demand, so search spaces stay a few hundred nodes even on city
+     graphs and thousands of stops fit the latency budget.
+
+The hierarchy is built on travel time; distance is the length of the
+fastest path (carried along every shortcut), as OSRM reports it.
+
+Enabled per request with distance_metric="road" once
+OMNIROUTE_ROAD_GRAPH_PATH points at a built graph.
+"""
+
+import argparse
+import csv
+import hashlib
+import heapq
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from engine.spatial import GridIndex
+
+
+# Cost used for pairs with no road connection (meters / seconds)
+UNREACHABLE = 100_000_000
+
+# Speed assumed for the straight leg between a stop and its snapped node
+SNAP_SPEED_KMH = 20.0
+
+# Stops further than this from every graph node lie outside the extract
+MAX_SNAP_KM = 5.0
+
+# Witness searches during contraction give up after this many settled nodes
+DEFAULT_WITNESS_SETTLED = 60
+
+# Packs (time, length) into one int64 that orders by time, then length
+_LENGTH_SPAN = 1 << 31
+
+
+@dataclass
+class _UpwardGraph:
+    """CSR adjacency of one search direction in the hierarchy."""
+    indptr: np.ndarray     # int64 (n + 1)
+    indices: np.ndarray    # int32 (m)
+    time_s: np.ndarray     # int32 (m)
+    length_m: np.ndarray   # int32 (m)
+
+    def __post_init__(self):
+        # Python lists are much faster than array scalars inside heapq loops
+        self._lists = (self.indptr.tolist(), self.indices.tolist(), self.time_s.tolist(), self.length_m.tolist())
+
+    def search(self, start: int, stall: "_UpwardGraph | None" = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Full Dijkstra over upward edges: (nodes, time_s, length_m) of the search space.
+
+        With `stall` (the opposite direction's graph, i.e. the edges
+        entering each node from higher-ranked nodes), stall-on-demand
+        skips nodes already reached faster through a higher node: their
+        distance is not exact, so they can be neither expanded nor
+        meeting nodes of a shortest path.
+        """
+        indptr, indices, times, lengths = self._lists
+        if stall is not None:
+            stall_indptr, stall_indices, stall_times, _ = stall._lists
+        best = {start: (0, 0)}
+        heap = [(0, 0, start)]
+        settled_nodes, settled_time, settled_len = [], [], []
+        done = set()
+
+        while heap:
+            t, length, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            if stall is not None:
+                stalled = False
+                for e in range(stall_indptr[node], stall_indptr[node + 1]):
+                    higher = best.get(stall_indices[e])
+                    if higher is not None and higher[0] + stall_times[e] < t:
+                        stalled = True
+                        break
+                if stalled:
+                    continue
+            settled_nodes.append(node)
+            settled_time.append(t)
+            settled_len.append(length)
+
+            for e in range(indptr[node], indptr[node + 1]):
+                nxt = indices[e]
+                nt = t + times[e]
+                cur = best.get(nxt)
+                if cur is None or nt < cur[0]:
+                    nl = length + lengths[e]
+                    best[nxt] = (nt, nl)
+                    heapq.heappush(heap, (nt, nl, nxt))
+
+        return (
+            np.asarray(settled_nodes, dtype=np.int64),
+            np.asarray(settled_time, dtype=np.int64),
+            np.asarray(settled_len, dtype=np.int64),
+        )
+
+
+class RoadNetwork:
+    """Contracted road graph with snapping and many-to-many matrix queries."""
+
+    def __init__(self, node_lat: np.ndarray, node_lng: np.ndarray, up: _UpwardGraph, down: _UpwardGraph):
+        self.node_lat = node_lat
+        self.node_lng = node_lng
+        self.up = up        # forward search: edges to higher-ranked nodes
+        self.down = down    # backward search: reversed edges to higher-ranked nodes
+        self._grid = GridIndex(node_lat, node_lng)
+
+        digest = hashlib.sha256()
+        for arr in (node_lat, up.indptr, up.indices, up.time_s, down.indices, down.time_s):
+            digest.update(np.ascontiguousarray(arr).tobytes())
+        self.fingerprint = digest.hexdigest()[:16]
+
+    @property
+    def node_count(self) -> int:
+        return self.node_lat.shape[0]
+
+    # ── Persistence ──
+
+    @classmethod
+    def load(cls, path: str | Path) -> "RoadNetwork":
+        """Load a graph written by save() / the build command."""
+        with np.load(path, allow_pickle=False) as data:
+            up = _UpwardGraph(data["up_indptr"], data["up_indices"], data["up_time_s"], data["up_length_m"])
+            down = _UpwardGraph(data["down_indptr"], data["down_indices"], data["down_time_s"], data["down_length_m"])
+            return cls(data["node_lat"], data["node_lng"], up, down)
+
+    def save(self, path: str | Path) -> None:
+        np.savez(
+            path,
+            node_lat=self.node_lat,
+            node_lng=self.node_lng,
+            up_indptr=self.up.indptr,
+            up_indices=self.up.indices,
+            up_time_s=self.up.time_s,
+            up_length_m=self.up.length_m,
+            down_indptr=self.down.indptr,
+            down_indices=self.down.indices,
+            down_time_s=self.down.time_s,
+            down_length_m=self.down.length_m,
+        )
+
+    # ── Build (offline) ──
+
+    @classmethod
+    def build(
+        cls,
+        node_lat: np.ndarray,
+        node_lng: np.ndarray,
+        src: np.ndarray,
+        dst: np.ndarray,
+        length_m: np.ndarray,
+        time_s: np.ndarray,
+        witness_settled: int = DEFAULT_WITNESS_SETTLED,
+    ) -> "RoadNetwork":
+        """Contract a directed edge list into a hierarchy. Offline; minutes for a city."""
+        n = len(node_lat)
+        up_edges, down_edges = _contract(
+            n,
+            np.asarray(src).tolist(),
+            np.asarray(dst).tolist(),
+            np.asarray(time_s).tolist(),
+            np.asarray(length_m).tolist(),
+            witness_settled,
+        )
+        return cls(
+            np.asarray(node_lat, dtype=np.float64),
+            np.asarray(node_lng, dtype=np.float64),
+            _to_csr(n, up_edges),
+            _to_csr(n, down_edges),
+        )
+
+    # ── Queries ──
+
+    def snap(self, lats: np.ndarray, lngs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Nearest graph node per coordinate: (node ids, snap distance in km).
+        Raises ValueError for coordinates over MAX_SNAP_KM from the graph.
+        """
+        node_ids, snap_km = self._grid.nearest(lats, lngs)
+        far = np.flatnonzero(snap_km > MAX_SNAP_KM)
+        if far.size:
+            worst = int(far[np.argmax(snap_km[far])])
+            raise ValueError(
+                f"{far.size} stop(s) lie outside the road network (over {MAX_SNAP_KM:g} km from any road), "
+                f"e.g. ({float(lats[worst]):.5f}, {float(lngs[worst]):.5f}) at {float(snap_km[worst]):.1f} km"
+            )
+        return node_ids, snap_km
+
+    def node_matrices(self, nodes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Bucket many-to-many among distinct nodes: (length_m, time_s) int64 (k, k)."""
+        k = nodes.shape[0]
+
+        # Backward searches fill buckets: (node → target, time, length)
+        b_node, b_time, b_len, b_tgt = [], [], [], []
+        for j, node in enumerate(nodes.tolist()):
+            sn, st, sl = self.down.search(node, stall=self.up)
+            b_node.append(sn)
+            b_time.append(st)
+            b_len.append(sl)
+            b_tgt.append(np.full(sn.shape[0], j, dtype=np.int64))
+        b_node, b_time, b_len, b_tgt = (np.concatenate(a) for a in (b_node, b_time, b_len, b_tgt))
+        order = np.argsort(b_node, kind="stable")
+        b_node, b_time, b_len, b_tgt = b_node[order], b_time[order], b_len[order], b_tgt[order]
+
+        time_out = np.full((k, k), UNREACHABLE, dtype=np.int64)
+        length_out = np.full((k, k), UNREACHABLE, dtype=np.int64)
+
+        # Forward searches scan the buckets of every node they settle
+        for i, node in enumerate(nodes.tolist()):
+            fn, ft, fl = self.up.search(node, stall=self.down)
+            lo = np.searchsorted(b_node, fn, side="left")
+            hi = np.searchsorted(b_node, fn, side="right")
+            counts = hi - lo
+            total = int(counts.sum())
+            if total == 0:
+                continue
+
+            owner = np.repeat(np.arange(fn.shape[0]), counts)
+            starts = np.cumsum(counts) - counts
+            bucket = np.arange(total) - np.repeat(starts, counts) + np.repeat(lo, counts)
+
+            via = (ft[owner] + b_time[bucket]) * _LENGTH_SPAN + fl[owner] + b_len[bucket]
+
+            # Best meeting node per target: scatter-min of the packed (time, length)
+            row = np.full(k, UNREACHABLE * _LENGTH_SPAN, dtype=np.int64)
+            np.minimum.at(row, b_tgt[bucket], via)
+            reached = row < UNREACHABLE * _LENGTH_SPAN
+            time_out[i, reached] = row[reached] // _LENGTH_SPAN
+            length_out[i, reached] = row[reached] % _LENGTH_SPAN
+
+        return length_out, time_out
+
+    def matrices(self, lats: np.ndarray, lngs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Stop-to-stop road (distance_m, time_s) as int32 matrices, including snap legs."""
+        node_ids, snap_km = self.snap(lats, lngs)
+        nodes, inverse = np.unique(node_ids, return_inverse=True)
+        length_nodes, time_nodes = self.node_matrices(nodes)
+
+        snap_m = snap_km * 1000.0
+        snap_s = snap_km * (3600.0 / SNAP_SPEED_KMH)
+        distance = length_nodes[np.ix_(inverse, inverse)] + snap_m[:, None] + snap_m[None, :]
+        time = time_nodes[np.ix_(inverse, inverse)] + snap_s[:, None] + snap_s[None, :]
+        np.fill_diagonal(distance, 0)
+        np.fill_diagonal(time, 0)
+
+        return (
+            np.minimum(distance, UNREACHABLE).astype(np.int32),
+            np.minimum(time, UNREACHABLE).astype(np.int32),
+        )
+
+
+# ── Contraction ──────────────────────────────────────────────────
+
+def _contract(n, src, dst, times, lengths, witness_settled):
+    """Node-by-node contraction with lazy edge-difference ordering."""
+    out_adj: list[dict[int, tuple[int, int]]] = [{} for _ in range(n)]
+    in_adj: list[dict[int, tuple[int, int]]] = [{} for _ in range(n)]
+    for u, v, t, length in zip(src, dst, times, lengths):
+        if u == v:
+            continue
+        cur = out_adj[u].get(v)
+        if cur is None or t < cur[0]:
+            out_adj[u][v] = (t, length)
+            in_adj[v][u] = (t, length)
+
+    contracted_neighbours = [0] * n
+    up_edges: list[tuple[int, int, int, int]] = []
+    down_edges: list[tuple[int, int, int, int]] = []
+
+    def witness(source, skip, limit):
+        dist = {source: 0}
+        heap = [(0, source)]
+        settled = 0
+        while heap:
+            d, x = heapq.heappop(heap)
+            if d > dist[x]:
+                continue
+            if d > limit or settled >= witness_settled:
+                break
+            settled += 1
+            for y, (t, _) in out_adj[x].items():
+                if y == skip:
+                    continue
+                nd = d + t
+                if nd < dist.get(y, nd + 1):
+                    dist[y] = nd
+                    heapq.heappush(heap, (nd, y))
+        return dist
+
+    def shortcuts(v):
+        outs = out_adj[v]
+        if not outs:
+            return []
+        max_out = max(t for t, _ in outs.values())
+        needed = []
+        for u, (tu, lu) in in_adj[v].items():
+            dist = witness(u, v, tu + max_out)
+            for w, (tw, lw) in outs.items():
+                if w == u:
+                    continue
+                via = tu + tw
+                if dist.get(w, via + 1) > via:
+                    needed.append((u, w, via, lu + lw))
+        return needed
+
+    def priority(v, needed):
+        return len(needed) - len(in_adj[v]) - len(out_adj[v]) + contracted_neighbours[v]
+
+    heap = [(priority(v, shortcuts(v)), v) for v in range(n)]
+    heapq.heapify(heap)
+    while heap:
+        _, v = heapq.heappop(heap)
+        added = shortcuts(v)
+        current = priority(v, added)
+        if heap and current > heap[0][0]:
+            heapq.heappush(heap, (current, v))
+            continue
+
+        # Every remaining neighbour outranks v
+        for w, (t, length) in out_adj[v].items():
+            up_edges.append((v, w, t, length))
+        for u, (t, length) in in_adj[v].items():
+            down_edges.append((v, u, t, length))
+
+        for w in out_adj[v]:
+            del in_adj[w][v]
+            contracted_neighbours[w] += 1
+        for u in in_adj[v]:
+            del out_adj[u][v]
+            contracted_neighbours[u] += 1
+        out_adj[v].clear()
+        in_adj[v].clear()
+
+        for u, w, t, length in added:
+            cur = out_adj[u].get(w)
+            if cur is None or t < cur[0]:
+                out_adj[u][w] = (t, length)
+                in_adj[w][u] = (t, length)
+
+    return up_edges, down_edges
+
+
+def _to_csr(n: int, edges: list[tuple[int, int, int, int]]) -> _UpwardGraph:
+    arr = np.asarray(edges, dtype=np.int64).reshape(-1, 4)
+    arr = arr[np.argsort(arr[:, 0], kind="stable")]
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(arr[:, 0], minlength=n), out=indptr[1:])
+    return _UpwardGraph(
+        indptr=indptr,
+        indices=arr[:, 1].astype(np.int32),
+        time_s=arr[:, 2].astype(np.int32),
+        length_m=arr[:, 3].astype(np.int32),
+    )
+
+
+# ── Process-wide graph ───────────────────────────────────────────
+
+_network: RoadNetwork | None = None
+_network_lock = threading.Lock()
+
+
+def get_road_network() -> RoadNetwork:
+    """The graph at OMNIROUTE_ROAD_GRAPH_PATH, loaded once per process."""
+    global _network
+    if _network is None:
+        with _network_lock:
+            if _network is None:
+                path = os.environ.get("OMNIROUTE_ROAD_GRAPH_PATH")
+                if not path:
+                    raise RuntimeError("Road network not configured. Set OMNIROUTE_ROAD_GRAPH_PATH.")
+                _network = RoadNetwork.load(path)
+    return _network
+
+
+def configure_road_network(network: RoadNetwork | None) -> None:
+    """Install a graph directly (or reset to lazy env loading with None)."""
+    global _network
+    _network = network
+
+
+# ── CLI ──────────────────────────────────────────────────────────
+
+def _read_csv(path: str, columns: list[str]) -> list[np.ndarray]:
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    return [np.asarray([float(r[c]) for r in rows]) for c in columns]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build a contracted road graph for the routing engine.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="nodes.csv (id,lat,lng) + edges.csv (src,dst,length_m,time_s) → .npz")
+    build.add_argument("nodes")
+    build.add_argument("edges")
+    build.add_argument("out")
+    build.add_argument("--witness-settled", type=int, default=DEFAULT_WITNESS_SETTLED)
+    args = parser.parse_args()
+
+    node_id, lat, lng = _read_csv(args.nodes, ["id", "lat", "lng"])
+    src, dst, length_m, time_s = _read_csv(args.edges, ["src", "dst", "length_m", "time_s"])
+
+    # Remap arbitrary (e.g. OSM) node ids to 0..n-1
+    order = np.argsort(node_id)
+    sorted_ids = node_id[order]
+    network = RoadNetwork.build(
+        lat[order],
+        lng[order],
+        np.searchsorted(sorted_ids, src),
+        np.searchsorted(sorted_ids, dst),
+        np.rint(length_m).astype(np.int64),
+        np.rint(time_s).astype(np.int64),
+        witness_settled=args.witness_settled,
+    )
+    network.save(args.out)
+    print(f"{network.node_count} nodes, {network.up.indices.shape[0] + network.down.indices.shape[0]} CH edges → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,23 +3,117 @@ OmniRoute AI — Solver Selector
 
 Picks the right solver based on problem size and configuration.
 MVP: Classical only. Quantum plugs in post-MVP.
+
+OMNIROUTE_PORTFOLIO_WORKERS (default 1, off) races that many search
+configurations on mid-size problems (engine/portfolio.py); set it to
+the cores a solve may use.
+
+With a fitted model at OMNIROUTE_SELECTOR_MODEL, problems solved by a
+single search get the strategy and time limit the model expects to do
+best within the latency SLO (the caller's, or OMNIROUTE_SELECTOR_SLO_MS);
+see engine/learned_selector.py. explain_selection says why.
+
+Without OR-Tools installed every problem goes to the pure-NumPy
+FastSolver; the OR-Tools solvers are only imported when chosen.
 """
 
-from engine.classical_solver import ClassicalSolver
+import importlib.util
+import os
+
+from engine.base_solver import BaseSolver
+from engine.fast_solver import FastSolver
+from engine.learned_selector import Selection, get_selector_model
 from engine.models import RoutingProblem
 
 
-def select_solver(problem: RoutingProblem) -> ClassicalSolver:
+ORTOOLS_AVAILABLE = importlib.util.find_spec("ortools") is not None
+
+# Below this size OR-Tools' model building costs more than the whole
+# answer; savings + 2-opt/Or-opt match its first solution (engine/fast_solver.py)
+FAST_MAX_STOPS = 30
+
+# From this size a single search over all stops converges too slowly;
+# clusters solved in parallel get there in seconds (see engine/decomposition.py)
+DECOMPOSE_MIN_STOPS = 1000
+
+DEFAULT_SLO_MS = 12_000
+
+
+def select_solver(problem: RoutingProblem, latency_slo_ms: int | None = None) -> BaseSolver:
     """
     Select the best solver for a given problem.
 
     Rules (MVP — classical only):
-      - < 50 stops → fast 'first_solution' strategy
-      - ≥ 50 stops → 'guided_local_search' for better quality
+      - < 30 stops     → FastSolver, no OR-Tools model at all
+      - < 50 stops     → fast 'first_solution' strategy
+      - ≥ 50 stops     → 'guided_local_search' for better quality, or a
+                         portfolio of configurations when cores allow
+      - ≥ 1,000 stops  → sweep decomposition into clusters solved in
+                         parallel (time-window problems stay monolithic)
+
+    Below 1,000 stops a fitted selector model overrides the rules.
+
+    Sparse k-nearest-neighbour mode (ClassicalSolver(sparse_k=...)) is
+    available for callers that need a single search over 5k+ stops.
 
     Post-MVP: Add quantum branch here via config flag.
     """
+    return build_solver(explain_selection(problem, latency_slo_ms))
+
+
+def explain_selection(problem: RoutingProblem, latency_slo_ms: int | None = None) -> Selection:
+    """The choice select_solver makes for `problem`, with its reasons."""
+    if not ORTOOLS_AVAILABLE:
+        return Selection(solver="fast", strategy="fast", reasons=["OR-Tools not installed"])
+    if problem.stop_count >= DECOMPOSE_MIN_STOPS and not problem.has_time_windows:
+        return Selection(
+            solver="decomposition",
+            strategy="decomposition",
+            reasons=[f"{problem.stop_count} stops ≥ {DECOMPOSE_MIN_STOPS}: clusters solved in parallel"],
+        )
+
+    workers = int(os.environ.get("OMNIROUTE_PORTFOLIO_WORKERS", "1"))
+    model = get_selector_model()
+    if model is not None:
+        slo_ms = latency_slo_ms or int(os.environ.get("OMNIROUTE_SELECTOR_SLO_MS", str(DEFAULT_SLO_MS)))
+        selection = model.choose(problem, slo_ms)
+        if selection is not None:
+            if workers > 1 and selection.strategy == "guided_local_search":
+                selection.solver = "portfolio"
+                selection.reasons.append(f"raced as a portfolio of {workers} configurations")
+            return selection
+
+    reasons = ["no selector model" if model is None else "selector model has no history for this kind of problem"]
+    if problem.stop_count < FAST_MAX_STOPS:
+        return Selection(solver="fast", strategy="fast", reasons=[*reasons, f"{problem.stop_count} stops < {FAST_MAX_STOPS}"])
     if problem.stop_count < 50:
-        return ClassicalSolver(strategy="first_solution")
-    else:
-        return ClassicalSolver(strategy="guided_local_search")
+        return Selection(
+            solver="classical", strategy="first_solution", reasons=[*reasons, f"{problem.stop_count} stops < 50"]
+        )
+    reasons.append(
+        f"{problem.stop_count} stops with time windows" if problem.has_time_windows
+        else f"50 ≤ {problem.stop_count} stops < {DECOMPOSE_MIN_STOPS}"
+    )
+    if workers > 1:
+        reasons.append(f"raced as a portfolio of {workers} configurations")
+        return Selection(solver="portfolio", strategy="guided_local_search", reasons=reasons)
+    return Selection(solver="classical", strategy="guided_local_search", reasons=reasons)
+
+
+def build_solver(selection: Selection) -> BaseSolver:
+    """Instantiate the solver a Selection describes."""
+    if selection.solver == "fast":
+        return FastSolver()
+    if selection.solver == "decomposition":
+        from engine.decomposition import DecompositionSolver
+
+        return DecompositionSolver()
+    if selection.solver == "portfolio":
+        from engine.portfolio import PortfolioSolver
+
+        workers = int(os.environ.get("OMNIROUTE_PORTFOLIO_WORKERS", "1"))
+        return PortfolioSolver(workers=workers, time_limit_s=selection.time_limit_s)
+
+    from engine.classical_solver import ClassicalSolver
+
+    return ClassicalSolver(strategy=selection.strategy, time_limit_s=selection.time_limit_s)
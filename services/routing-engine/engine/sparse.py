@@ -0,0 +1,136 @@
+"""
+OmniRoute AI — Sparse k-Nearest-Neighbour Costs
+
+For 5k–20k stop problems a dense n² matrix is gigabytes and OR-Tools'
+first-solution and local-search phases scan every arc. Sparse mode
+keeps only candidate arcs:
+
+  - each stop's k nearest neighbours (from a GridIndex), symmetrized
+  - every depot → stop and stop → depot arc
+
+stored in CSR form, so memory is O(n·k). The solver restricts each
+node's successor domain to its candidate row, which also bounds the
+neighbourhoods searched by OR-Tools.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from engine.distance import haversine_km_array
+from engine.models import CostObjective
+from engine.spatial import GridIndex
+
+
+DEFAULT_K = 20
+
+
+@dataclass
+class SparseCosts:
+    """Candidate arcs in CSR form with their distances in meters."""
+    indptr: np.ndarray      # int64 (n + 1)
+    indices: np.ndarray     # int32 (m), sorted within each row
+    distance_m: np.ndarray  # int32 (m)
+    avg_speed_kmh: float = 40.0
+
+    @property
+    def size(self) -> int:
+        return self.indptr.shape[0] - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.indices.nbytes + self.distance_m.nbytes
+
+    def row(self, i: int) -> np.ndarray:
+        """Candidate successors of node i."""
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def scale(self, objective: CostObjective, cost_per_km: float = 0.0) -> float:
+        """Factor from meters to the objective's units (same units as CostBundle)."""
+        if objective == CostObjective.time:
+            return 3.6 / self.avg_speed_kmh
+        if objective == CostObjective.fuel:
+            return cost_per_km / 10.0
+        return 1.0
+
+    def layer(self, objective: CostObjective, cost_per_km: float = 0.0) -> np.ndarray:
+        """Arc values for an objective, aligned with `indices`."""
+        if objective == CostObjective.distance:
+            return self.distance_m
+        return (self.distance_m * self.scale(objective, cost_per_km)).astype(np.int32)
+
+    def row_dicts(self, values: np.ndarray) -> list[dict[int, int]]:
+        """Per-row {successor: value} lookups for transit callbacks."""
+        indptr = self.indptr.tolist()
+        cols = self.indices.tolist()
+        vals = values.tolist()
+        return [dict(zip(cols[indptr[i]:indptr[i + 1]], vals[indptr[i]:indptr[i + 1]])) for i in range(self.size)]
+
+
+def build_sparse_costs(
+    lats: np.ndarray,
+    lngs: np.ndarray,
+    k: int = DEFAULT_K,
+    depot_index: int = 0,
+    avg_speed_kmh: float = 40.0,
+) -> SparseCosts:
+    """kNN + depot candidate arcs with great-circle distances in meters."""
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    n = lats.shape[0]
+
+    neighbours = GridIndex(lats, lngs).knn(k)
+    rows = np.repeat(np.arange(n, dtype=np.int64), neighbours.shape[1])
+    cols = neighbours.ravel()
+    everyone = np.arange(n, dtype=np.int64)
+    depot = np.full(n, depot_index, dtype=np.int64)
+
+    # kNN both ways (j near i ⇒ arc j→i is a candidate too) plus depot arcs
+    src = np.concatenate((rows, cols, depot, everyone))
+    dst = np.concatenate((cols, rows, everyone, depot))
+    keep = src != dst
+    arc_keys = np.unique(src[keep] * n + dst[keep])
+    src, dst = arc_keys // n, arc_keys % n
+
+    distance_m = (haversine_km_array(lats[src], lngs[src], lats[dst], lngs[dst]) * 1000.0).astype(np.int32)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+
+    return SparseCosts(
+        indptr=indptr,
+        indices=dst.astype(np.int32),
+        distance_m=distance_m,
+        avg_speed_kmh=avg_speed_kmh,
+    )
+
+
+def nearest_neighbour_tour(sparse: SparseCosts, lats: np.ndarray, lngs: np.ndarray, depot_index: int = 0) -> list[int]:
+    """
+    Greedy tour from the depot over candidate arcs. When every candidate of the
+    current stop is already visited, jump to the nearest unvisited stop overall.
+    Returns stop indices in visiting order, depot excluded.
+    """
+    n = sparse.size
+    rows = sparse.row_dicts(sparse.distance_m)
+    unvisited = np.ones(n, dtype=bool)
+    unvisited[depot_index] = False
+    remaining = n - 1
+
+    tour: list[int] = []
+    current = depot_index
+    while remaining:
+        best, best_dist = -1, None
+        for j, d in rows[current].items():
+            if unvisited[j] and (best_dist is None or d < best_dist):
+                best, best_dist = j, d
+        if best < 0:
+            open_ids = np.flatnonzero(unvisited)
+            dist = haversine_km_array(lats[current], lngs[current], lats[open_ids], lngs[open_ids])
+            best = int(open_ids[np.argmin(dist)])
+
+        tour.append(best)
+        unvisited[best] = False
+        remaining -= 1
+        current = best
+
+    return tour
@@ -0,0 +1,123 @@
+"""
+OmniRoute AI — Spatial Grid Index
+
+Uniform lat/lng grid over a point set, stored as a sorted array of
+cell keys (no per-cell Python objects). Queries start at the first
+ring of cells that reaches the points' bounding box (the query may lie
+far outside it) and widen until enough candidates are found. The k-th
+candidate's distance then bounds how much further to look: a point
+beyond ring r is at least r cell widths away, and a cell is narrowest
+east to west (its width shrinks with cos(latitude)).
+"""
+
+import math
+
+import numpy as np
+
+from engine.distance import EARTH_RADIUS_KM, haversine_km_array
+
+
+_KEY_STRIDE = 1 << 32
+_KEY_OFFSET = 1 << 31
+
+# Target average number of points per occupied cell
+_POINTS_PER_CELL = 4
+_MIN_CELL_DEG = 1e-4
+
+_KM_PER_DEG = EARTH_RADIUS_KM * math.pi / 180
+
+
+class GridIndex:
+    """Sorted-cell grid over (lat, lng) points for nearest-neighbour queries."""
+
+    def __init__(self, lats: np.ndarray, lngs: np.ndarray, cell_deg: float | None = None):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lngs = np.asarray(lngs, dtype=np.float64)
+        n = self.lats.shape[0]
+        if n == 0:
+            raise ValueError("GridIndex needs at least one point")
+
+        if cell_deg is None:
+            area = max(np.ptp(self.lats) * np.ptp(self.lngs), _MIN_CELL_DEG**2)
+            cell_deg = max(float(np.sqrt(area * _POINTS_PER_CELL / n)), _MIN_CELL_DEG)
+        self.cell_deg = cell_deg
+
+        cy, cx = self._cells(self.lats, self.lngs)
+        keys = cy * _KEY_STRIDE + cx
+        self._order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[self._order]
+
+        # Cell bounding box of the points, and their highest |latitude|
+        self._cy_range = (int(cy.min()), int(cy.max()))
+        self._cx_range = (int(cx.min()), int(cx.max()))
+        self._max_abs_lat = float(np.abs(self.lats).max())
+
+    @property
+    def size(self) -> int:
+        return self.lats.shape[0]
+
+    def _cells(self, lats, lngs) -> tuple[np.ndarray, np.ndarray]:
+        cy = np.floor(np.asarray(lats) / self.cell_deg).astype(np.int64) + _KEY_OFFSET
+        cx = np.floor(np.asarray(lngs) / self.cell_deg).astype(np.int64) + _KEY_OFFSET
+        return cy, cx
+
+    def _box_members(self, cy: int, cx: int, radius: int) -> np.ndarray:
+        """Point ids in all cells within Chebyshev distance `radius` of (cy, cx)."""
+        rows = np.arange(cy - radius, cy + radius + 1, dtype=np.int64)
+        lo = np.searchsorted(self._sorted_keys, rows * _KEY_STRIDE + (cx - radius), side="left")
+        hi = np.searchsorted(self._sorted_keys, rows * _KEY_STRIDE + (cx + radius), side="right")
+        spans = [self._order[a:b] for a, b in zip(lo.tolist(), hi.tolist()) if b > a]
+        return np.concatenate(spans) if spans else np.empty(0, dtype=np.int64)
+
+    def query(self, lat: float, lng: float, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """The k nearest points to one coordinate: (ids, distances_km), nearest first."""
+        k = min(k, self.size)
+        cy, cx = self._cells(lat, lng)
+        cy, cx = int(cy), int(cx)
+
+        (y0, y1), (x0, x1) = self._cy_range, self._cx_range
+        # Rings from the first that touches the bounding box to the one that covers it
+        radius = max(0, y0 - cy, cy - y1, x0 - cx, cx - x1)
+        max_ring = max(cy - y0, y1 - cy, cx - x0, x1 - cx)
+
+        members = self._box_members(cy, cx, radius)
+        while members.shape[0] < k and radius < max_ring:
+            radius += 1
+            members = self._box_members(cy, cx, radius)
+
+        dist = haversine_km_array(lat, lng, self.lats[members], self.lngs[members])
+        if radius < max_ring:
+            # Points beyond ring r are at least r cell widths away; widen until that covers the k-th distance
+            kth_km = float(np.partition(dist, k - 1)[k - 1])
+            cos_lat = math.cos(math.radians(min(90.0, max(self._max_abs_lat, abs(lat)) + self.cell_deg)))
+            cell_km = self.cell_deg * _KM_PER_DEG * max(cos_lat, 1e-9)
+            needed = min(max_ring, math.ceil(kth_km / cell_km))
+            if needed > radius:
+                members = self._box_members(cy, cx, needed)
+                dist = haversine_km_array(lat, lng, self.lats[members], self.lngs[members])
+
+        if members.shape[0] > k:
+            part = np.argpartition(dist, k - 1)[:k]
+            members, dist = members[part], dist[part]
+        order = np.argsort(dist, kind="stable")
+        return members[order], dist[order]
+
+    def nearest(self, lats: np.ndarray, lngs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Nearest indexed point for each query coordinate: (ids, distances_km)."""
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        ids = np.empty(lats.shape[0], dtype=np.int64)
+        dist = np.empty(lats.shape[0], dtype=np.float64)
+        for q in range(lats.shape[0]):
+            found, d = self.query(lats[q], lngs[q], 1)
+            ids[q], dist[q] = found[0], d[0]
+        return ids, dist
+
+    def knn(self, k: int) -> np.ndarray:
+        """k nearest other indexed points for every indexed point: int64 (n, k)."""
+        k = min(k, self.size - 1)
+        out = np.empty((self.size, k), dtype=np.int64)
+        for i in range(self.size):
+            found, _ = self.query(self.lats[i], self.lngs[i], k + 1)
+            out[i] = found[found != i][:k]
+        return out
@@ -0,0 +1,110 @@
+"""
+OmniRoute AI — Time Window Preprocessing
+
+Turns stop time windows into integer seconds-of-day bounds for the
+OR-Tools "Time" dimension, and prunes arcs that no schedule can use
+before the solver ever sees them.
+
+Cumul semantics: a stop's cumul is the time its service STARTS. The
+transit of arc i→j is service(i) + travel(i, j).
+
+Preprocessing, all vectorized over the (n, n) travel-time matrix:
+  1. Tighten windows against the depot:
+       earliest(i) ≥ depot_open + travel(depot, i)
+       latest(i)   ≤ depot_close − service(i) − travel(i, depot)
+  2. Remove arc i→j when
+       earliest(i) + service(i) + travel(i, j) > latest(j)
+     or when, having served j as early as possible after i, the vehicle
+     can no longer get back to the depot before it closes.
+"""
+
+import numpy as np
+
+from engine.models import RoutingProblem
+
+
+DAY_SECONDS = 24 * 3600
+
+
+class InfeasibleWindowError(ValueError):
+    """A stop cannot be served inside its window from this depot."""
+
+
+def service_seconds(problem: RoutingProblem) -> np.ndarray:
+    """Service time per stop in seconds as int64."""
+    return problem.columns.service_time_min * 60
+
+
+def window_bounds(problem: RoutingProblem) -> tuple[np.ndarray, np.ndarray]:
+    """Raw (earliest, latest) service-start bounds per stop; open sides span the day."""
+    columns = problem.columns
+    earliest = np.where(columns.window_start_s >= 0, columns.window_start_s, 0)
+    latest = np.where(columns.window_end_s >= 0, columns.window_end_s, DAY_SECONDS)
+    return earliest, latest
+
+
+def tighten_windows(
+    time_s: np.ndarray,
+    service_s: np.ndarray,
+    earliest: np.ndarray,
+    latest: np.ndarray,
+    depot: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Clip windows to what is reachable from, and returnable to, the depot."""
+    travel = time_s.astype(np.int64, copy=False)
+    depot_open, depot_close = earliest[depot], latest[depot]
+    earliest = np.maximum(earliest, depot_open + travel[depot])
+    latest = np.minimum(latest, depot_close - service_s - travel[:, depot])
+    latest[depot] = depot_close  # the depot window bounds departure and return
+    return earliest, latest
+
+
+def feasible_arcs(
+    time_s: np.ndarray,
+    service_s: np.ndarray,
+    earliest: np.ndarray,
+    latest: np.ndarray,
+    depot: int,
+) -> np.ndarray:
+    """Boolean (n, n) mask of arcs some schedule can use (windows already tightened)."""
+    travel = time_s.astype(np.int64, copy=False)
+    arrive = (earliest + service_s)[:, None] + travel
+    mask = arrive <= latest[None, :]
+
+    # Serve j as early as possible after i, then return to the depot
+    back = np.maximum(arrive, earliest[None, :]) + (service_s + travel[:, depot])[None, :]
+    mask &= back <= latest[depot]
+
+    # Depot arcs are governed by the depot-tightened windows alone
+    mask[depot, :] = True
+    mask[:, depot] = True
+    np.fill_diagonal(mask, False)
+    return mask
+
+
+class TimeWindows:
+    """Tightened windows, transit matrix and arc mask for one problem."""
+
+    def __init__(self, problem: RoutingProblem, time_s: np.ndarray):
+        depot = problem.depot_index
+        self.service_s = service_seconds(problem)
+        earliest, latest = window_bounds(problem)
+        self.earliest, self.latest = tighten_windows(time_s, self.service_s, earliest, latest, depot)
+
+        bad = np.flatnonzero(self.earliest > self.latest)
+        if bad.size:
+            ids = ", ".join(problem.columns.ids[bad[:5]])
+            raise InfeasibleWindowError(f"Stop(s) {ids} cannot be served within their time window")
+
+        self.arcs = feasible_arcs(time_s, self.service_s, self.earliest, self.latest, depot)
+        self.transit_s = time_s.astype(np.int64) + self.service_s[:, None]
+
+    @property
+    def horizon(self) -> int:
+        return int(self.latest.max())
+
+    @property
+    def pruned_fraction(self) -> float:
+        """Share of off-diagonal arcs removed by preprocessing."""
+        n = self.arcs.shape[0]
+        return 1.0 - float(self.arcs.sum()) / max(n * (n - 1), 1)
@@ -0,0 +1,79 @@
+"""
+OmniRoute AI — Decomposition Solver Tests
+
+Stitched routes must respect the constraints each cluster was solved
+under, and the boundary pass must also run when one vehicle serves
+every cluster (the API's single-vehicle requests).
+"""
+
+import math
+import random
+
+from engine.decomposition import DecompositionSolver, partition
+from engine.models import RoutingProblem, Stop, VehicleSpec
+
+
+def _stops(count: int, demand_kg: float = 10, seed: int = 7) -> list[Stop]:
+    rng = random.Random(seed)
+    depot = Stop(id="depot", lat=12.97, lng=77.59)
+    return [depot] + [
+        Stop(id=f"s{i}", lat=12.97 + rng.uniform(-0.2, 0.2), lng=77.59 + rng.uniform(-0.2, 0.2), demand_kg=demand_kg)
+        for i in range(count)
+    ]
+
+
+def _solver() -> DecompositionSolver:
+    return DecompositionSolver(cluster_size=10, workers=1, cluster_seconds=0.2, boundary_seconds=0.2)
+
+
+def test_one_vehicle_over_capacity_fails():
+    # 40 stops × 10 kg on one 100 kg vehicle: every cluster fits, the stitched route does not
+    problem = RoutingProblem(stops=_stops(40), vehicles=[VehicleSpec(id="v0", capacity_kg=100)])
+    result = _solver().solve_sync(problem)
+    assert not result.success
+    assert "capacity" in result.error
+
+
+def test_stitched_route_over_max_distance_falls_back():
+    # The stitched route is ~253 km; a monolithic solve finds one under the limit
+    problem = RoutingProblem(
+        stops=_stops(40),
+        vehicles=[VehicleSpec(id="v0", capacity_kg=1000, max_distance_km=245)],
+    )
+    result = _solver().solve_sync(problem)
+    assert result.success, result.error
+    assert not result.metrics.strategy.startswith("decomposition")
+    assert result.metrics.total_distance_km <= 245
+
+
+def test_single_vehicle_plan_is_costed_and_timed():
+    stops = [s.model_copy(update={"service_time_min": 5 if i else 0}) for i, s in enumerate(_stops(40))]
+    problem = RoutingProblem(stops=stops, vehicles=[VehicleSpec(id="v0", capacity_kg=1000)])
+    result = _solver().solve_sync(problem)
+    assert result.success, result.error
+
+    (route,) = result.routes
+    assert sorted(o.stop_id for o in route[1:]) == sorted(s.id for s in stops[1:])
+    etas = [o.arrival_eta_min for o in route]
+    assert etas[0] == 0 and all(b > a for a, b in zip(etas[1:], etas[2:]))
+    # Distance objective: metres, summed per leg
+    assert math.isclose(result.metrics.objective, result.metrics.total_distance_km * 1000, abs_tol=len(route) + 10)
+    # 40 services of 5 minutes on top of the driving
+    assert result.metrics.total_duration_min > 200
+
+
+def test_single_vehicle_borders_are_route_windows():
+    problem = RoutingProblem(stops=_stops(40), vehicles=[VehicleSpec(id="v0", capacity_kg=1000)])
+    clusters = partition(problem, 10)
+    plan, starts = [[]], []
+    for nodes, _ in clusters:
+        starts.append(len(plan[0]))
+        plan[0].extend(nodes)
+
+    solver = _solver()
+    for parity in (0, 1):
+        borders = solver._borders(plan, clusters, starts, parity)
+        assert len(borders) == len(range(parity, len(clusters) - 1, 2))
+        windows = sorted(window for _, window in borders)
+        assert all(lo < hi for lo, hi in windows)
+        assert all(a[1] <= b[0] for a, b in zip(windows, windows[1:]))
@@ -0,0 +1,52 @@
+"""
+OmniRoute AI — Spatial Grid Index Tests
+
+Nearest-neighbour queries must match a brute-force scan, including for
+query points far outside the indexed extent and at high latitude.
+"""
+
+import numpy as np
+import pytest
+
+from engine.distance import haversine_km_array
+from engine.road_network import RoadNetwork
+from engine.spatial import GridIndex
+
+
+def _points(lat: float, lng: float, dlat: float, dlng: float, n: int = 2000, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return lat + rng.uniform(0, dlat, n), lng + rng.uniform(0, dlng, n)
+
+
+def _brute(lats, lngs, lat: float, lng: float, k: int) -> np.ndarray:
+    return np.sort(haversine_km_array(lat, lng, lats, lngs))[:k]
+
+
+def test_nearest_outside_the_indexed_extent():
+    # 2,000 nodes in a 0.2° box, queried 0.5° north of it
+    lats, lngs = _points(12.9, 77.5, 0.2, 0.2)
+    ids, dist = GridIndex(lats, lngs).nearest(np.array([13.6]), np.array([77.6]))
+    assert dist[0] == pytest.approx(_brute(lats, lngs, 13.6, 77.6, 1)[0])
+    assert dist[0] == pytest.approx(haversine_km_array(13.6, 77.6, lats[ids[0]], lngs[ids[0]]))
+
+
+@pytest.mark.parametrize("box", [(12.9, 77.5, 0.2, 0.2), (69.5, 20.0, 0.1, 2.0), (-33.9, 151.1, 0.02, 0.5)])
+def test_query_matches_brute_force(box):
+    lats, lngs = _points(*box)
+    grid = GridIndex(lats, lngs)
+    rng = np.random.default_rng(1)
+    lat, lng, dlat, dlng = box
+    for qlat, qlng in zip(rng.uniform(lat - 1, lat + dlat + 1, 100), rng.uniform(lng - 1, lng + dlng + 1, 100)):
+        for k in (1, 5):
+            _, dist = grid.query(qlat, qlng, k)
+            np.testing.assert_allclose(dist, _brute(lats, lngs, qlat, qlng, k))
+
+
+def test_snap_rejects_stops_off_the_graph():
+    lats, lngs = np.array([12.97, 12.98, 12.99]), np.array([77.59, 77.59, 77.59])
+    network = RoadNetwork.build(lats, lngs, np.array([0, 1]), np.array([1, 2]), np.array([1100, 1100]), np.array([90, 90]))
+
+    _, snap_km = network.snap(np.array([12.975]), np.array([77.59]))
+    assert snap_km[0] < 1
+    with pytest.raises(ValueError, match="outside the road network"):
+        network.snap(np.array([12.975, 13.5]), np.array([77.59, 77.59]))